@@ -0,0 +1,4 @@
+import time
+
+# Reference point of the startup report (see ``backend.startup``): the first import of the package.
+IMPORT_STARTED = time.perf_counter()
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Literal
+
+Method = Literal["exact", "normalized", "fuzzy"]
+
+FUZZY_MIN_CONFIDENCE = float(os.getenv("ALIGNMENT_FUZZY_MIN_CONFIDENCE", "0.85"))
+INDEX_CACHE_SIZE = int(os.getenv("ALIGNMENT_INDEX_CACHE_SIZE", "4"))
+SHINGLE_SIZE = 3
+# Only every n-th shingle (by a stable hash, so the same excerpt aligns the
+# same way in every process) is indexed; excerpts contribute all of theirs,
+# so any excerpt longer than a dozen words still hits.
+SHINGLE_SAMPLING = 2
+# Shingles occurring more often than this ("im Sinne dieses") say nothing
+# about where an excerpt is; their postings are capped and ignored.
+MAX_POSTINGS = 32
+FUZZY_CANDIDATES = 3
+BOUNDARY_SLACK = 24
+
+# One-to-one character folds: typographic quotes, dashes and exotic spaces.
+_FOLD = str.maketrans(
+    {
+        **dict.fromkeys("\u201c\u201d\u201e\u201f\u00ab\u00bb\u2033", '"'),
+        **dict.fromkeys("\u2018\u2019\u201a\u201b\u2039\u203a\u2032`\u00b4", "'"),
+        **dict.fromkeys("\u2010\u2011\u2012\u2013\u2014\u2015\u2212", "-"),
+        **dict.fromkeys("\t\n\r\f\v\u00a0\u2002\u2003\u2009\u202f\u3000", " "),
+    }
+)
+_COLLAPSE = re.compile(r" {2,}|\u00ad")
+_WORD = re.compile(r"\w+")
+
+
+def _shingle_key(words: list[str]) -> int:
+    return zlib.crc32(" ".join(words).encode())
+
+
+def locate(full_text: str, excerpt: str, hint: int = 0) -> tuple[int, int] | None:
+    """Offsets of the occurrence of ``excerpt`` in ``full_text`` closest to ``hint``."""
+
+    if not excerpt:
+        return None
+    if full_text.startswith(excerpt, hint):
+        return hint, hint + len(excerpt)
+    best = None
+    position = full_text.find(excerpt)
+    while position != -1:
+        if best is None or abs(position - hint) < abs(best - hint):
+            best = position
+        if position > hint:
+            break
+        position = full_text.find(excerpt, position + 1)
+    return (best, best + len(excerpt)) if best is not None else None
+
+
+@dataclass(frozen=True)
+class Alignment:
+    start: int
+    end: int
+    confidence: float
+    method: Method
+
+
+def normalize(text: str) -> tuple[str, list[int], list[int]]:
+    """Fold quotes/dashes/whitespace and collapse space runs.
+
+    Returns the normalized text plus a sparse offset map: from normalized
+    index ``breaks[k]`` on, ``original = normalized + deltas[k]``. Only
+    collapsed runs and dropped soft hyphens create breakpoints, so the map
+    stays small even for multi-megabyte texts.
+    """
+
+    folded = text.translate(_FOLD)
+    pieces: list[str] = []
+    breaks, deltas = [0], [0]
+    position = 0
+    length = 0
+    for match in _COLLAPSE.finditer(folded):
+        pieces.append(folded[position : match.start()])
+        length += match.start() - position
+        replacement = " " if match.group(0)[0] == " " else ""
+        pieces.append(replacement)
+        length += len(replacement)
+        breaks.append(length)
+        deltas.append(match.end() - length)
+        position = match.end()
+    pieces.append(folded[position:])
+    return "".join(pieces), breaks, deltas
+
+
+class TextIndex:
+    """Prebuilt alignment index over one full text (cached per text by ``index_for``)."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.normalized, self._breaks, self._deltas = normalize(text)
+        self._token_starts = array("I")
+        self._token_ends = array("I")
+        self._shingles: dict[int, int | list[int]] = {}
+        window: list[str] = []
+        for match in _WORD.finditer(self.normalized):
+            self._token_starts.append(match.start())
+            self._token_ends.append(match.end())
+            window.append(match.group(0).lower())
+            if len(window) > SHINGLE_SIZE:
+                window.pop(0)
+            if len(window) == SHINGLE_SIZE:
+                key = _shingle_key(window)
+                if key % SHINGLE_SAMPLING == 0:
+                    # Most shingles occur once: store a bare int, promote to a list on repeat.
+                    position = len(self._token_starts) - SHINGLE_SIZE
+                    postings = self._shingles.get(key)
+                    if postings is None:
+                        self._shingles[key] = position
+                    elif isinstance(postings, int):
+                        self._shingles[key] = [postings, position]
+                    elif len(postings) <= MAX_POSTINGS:
+                        postings.append(position)
+
+    def original_start(self, index: int) -> int:
+        return index + self._deltas[bisect_right(self._breaks, index) - 1]
+
+    def original_end(self, index: int) -> int:
+        return self.original_start(index - 1) + 1 if index > 0 else 0
+
+    def _to_original(self, start: int, end: int) -> tuple[int, int]:
+        return self.original_start(start), self.original_end(end)
+
+    def _refine(self, needle: str, start: int, end: int) -> tuple[int, int, float] | None:
+        """Snap a token window to the needle via difflib matching blocks; returns span and ratio."""
+
+        region_start = max(start - BOUNDARY_SLACK, 0)
+        region = self.normalized[region_start : end + BOUNDARY_SLACK].lower()
+        matcher = SequenceMatcher(None, needle, region, autojunk=False)
+        blocks = [block for block in matcher.get_matching_blocks() if block.size >= 3]
+        if not blocks:
+            return None
+        start = region_start + blocks[0].b
+        end = region_start + blocks[-1].b + blocks[-1].size
+        ratio = SequenceMatcher(None, needle, self.normalized[start:end].lower(), autojunk=False).ratio()
+        return start, end, ratio
+
+    def align(self, excerpt: str, hint: int = 0) -> Alignment | None:
+        excerpt = excerpt.strip()
+        if not excerpt:
+            return None
+
+        located = locate(self.text, excerpt, hint)
+        if located is not None:
+            return Alignment(*located, confidence=1.0, method="exact")
+
+        needle = normalize(excerpt)[0].strip()
+        position = self.normalized.find(needle)
+        if position != -1:
+            return Alignment(*self._to_original(position, position + len(needle)), confidence=0.99, method="normalized")
+
+        return self._fuzzy(needle)
+
+    def _fuzzy(self, needle: str) -> Alignment | None:
+        tokens = [match.group(0).lower() for match in _WORD.finditer(needle)]
+        if len(tokens) < SHINGLE_SIZE:
+            return None
+        votes: Counter[int] = Counter()
+        for offset in range(len(tokens) - SHINGLE_SIZE + 1):
+            postings = self._shingles.get(_shingle_key(tokens[offset : offset + SHINGLE_SIZE]), ())
+            if isinstance(postings, int):
+                postings = (postings,)
+            elif len(postings) > MAX_POSTINGS:
+                continue
+            for token_index in postings:
+                votes[token_index - offset] += 1
+
+        best: Alignment | None = None
+        token_count = len(self._token_starts)
+        for first, _ in votes.most_common(FUZZY_CANDIDATES):
+            first = max(first, 0)
+            last = min(first + len(tokens), token_count) - 1
+            if last < first:
+                continue
+            refined = self._refine(needle.lower(), self._token_starts[first], self._token_ends[last])
+            if refined is None:
+                continue
+            start, end, confidence = refined
+            if best is None or confidence > best.confidence:
+                best = Alignment(*self._to_original(start, end), confidence=round(confidence, 3), method="fuzzy")
+        if best is None or best.confidence < FUZZY_MIN_CONFIDENCE:
+            return None
+        return best
+
+
+@lru_cache(maxsize=INDEX_CACHE_SIZE)
+def index_for(text: str) -> TextIndex:
+    return TextIndex(text)
+
+
+def align(full_text: str, excerpt: str, hint: int = 0) -> Alignment | None:
+    """Locate ``excerpt`` in ``full_text``: exact, then whitespace/quote-normalized, then fuzzy."""
+
+    return index_for(full_text).align(excerpt, hint)
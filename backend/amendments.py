@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from datetime import date
+from difflib import SequenceMatcher
+from typing import Any, Literal
+
+from sqlalchemy.orm import Session
+
+from . import legal_spans, models, segmenter
+from .alignment import align, locate
+from .hashing import hash_text
+
+SectionChangeKind = Literal["unchanged", "changed", "added", "removed"]
+DTLChangeKind = Literal["unchanged", "changed", "removed", "unmatched"]
+
+# DTLs in these states are history and are not carried into an amendment.
+RETIRED_STATUSES = ("Superseded", "Repealed")
+
+
+@dataclass
+class SectionChange:
+    change: SectionChangeKind
+    old: segmenter.Section | None
+    new: segmenter.Section | None
+
+    @property
+    def label(self) -> str:
+        return (self.new or self.old).label
+
+
+@dataclass
+class DTLChange:
+    dtl: models.DTL
+    change: DTLChangeKind
+    sections: list[str]
+    span: tuple[int, int] | None = None
+
+
+def diff_sections(old_text: str, new_text: str) -> list[SectionChange]:
+    """Pair the structural units of two versions of a law.
+
+    Units with identical text are matched in order (so renumbered but
+    unchanged sections still count as unchanged); within each differing
+    stretch, units are paired by label as changed, and the rest are added or
+    removed.
+    """
+
+    old_units = segmenter.candidates(old_text)
+    new_units = segmenter.candidates(new_text)
+    old_keys = [hash_text(old_text[unit.start : unit.end]) for unit in old_units]
+    new_keys = [hash_text(new_text[unit.start : unit.end]) for unit in new_units]
+
+    changes: list[SectionChange] = []
+    matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+    for tag, old_from, old_to, new_from, new_to in matcher.get_opcodes():
+        if tag == "equal":
+            changes.extend(
+                SectionChange("unchanged", old, new)
+                for old, new in zip(old_units[old_from:old_to], new_units[new_from:new_to])
+            )
+            continue
+        by_label: dict[str, deque[segmenter.Section]] = defaultdict(deque)
+        for new in new_units[new_from:new_to]:
+            by_label[new.label].append(new)
+        paired = set()
+        for old in old_units[old_from:old_to]:
+            new = by_label[old.label].popleft() if by_label.get(old.label) else None
+            changes.append(SectionChange("changed" if new else "removed", old, new))
+            if new is not None:
+                paired.add(id(new))
+        changes.extend(
+            SectionChange("added", None, new) for new in new_units[new_from:new_to] if id(new) not in paired
+        )
+    return changes
+
+
+def _follow_text(dtl: models.DTL, excerpt: str, new_text: str) -> DTLChange:
+    """Text outside any section: only an exact or close match says where it went."""
+
+    found = locate(new_text, excerpt)
+    if found is not None:
+        return DTLChange(dtl, "unchanged", [], found)
+    aligned = align(new_text, excerpt) if excerpt else None
+    if aligned is not None:
+        return DTLChange(dtl, "changed", [], (aligned.start, aligned.end))
+    return DTLChange(dtl, "unmatched", [])
+
+
+def _map_dtl(
+    dtl: models.DTL, old_text: str, new_text: str, changes: list[SectionChange], starts: list[int]
+) -> DTLChange:
+    """Where a DTL's source went: ``changes`` are the units of the old text, sorted, ``starts`` their offsets."""
+
+    if dtl.legal_text_start is None:
+        return _follow_text(dtl, dtl.legal_text_stored or "", new_text)
+
+    start, end = dtl.legal_text_start, dtl.legal_text_end
+    excerpt = old_text[start:end]
+    first = max(bisect_right(starts, start) - 1, 0)
+    touched = []
+    for change in changes[first:]:
+        if change.old.start >= max(end, start + 1):
+            break
+        if change.old.end > start:
+            touched.append(change)
+    if not touched:
+        return _follow_text(dtl, excerpt, new_text)
+    labels = [change.label for change in touched]
+
+    if all(change.change == "unchanged" for change in touched):
+        hint = start - touched[0].old.start + touched[0].new.start
+        found = locate(new_text, excerpt, hint)
+        if found is not None:
+            return DTLChange(dtl, "unchanged", labels, found)
+    counterparts = [change.new for change in touched if change.new is not None]
+    if not counterparts:
+        return DTLChange(dtl, "removed", labels)
+    region = (min(unit.start for unit in counterparts), max(unit.end for unit in counterparts))
+    # A DTL over part of a section follows the amended wording of that part when it is still recognizable.
+    aligned = align(new_text, excerpt, region[0])
+    if aligned is not None and region[0] <= aligned.start and aligned.end <= region[1]:
+        region = (aligned.start, aligned.end)
+    return DTLChange(dtl, "changed", labels, region)
+
+
+def plan(db: Session, dtlib: models.DTLIB, new_text: str) -> tuple[list[SectionChange], list[DTLChange]]:
+    """Section diff and the fate of every current DTL, without writing anything."""
+
+    old_text = dtlib.full_text
+    section_changes = diff_sections(old_text, new_text)
+    changes = sorted((change for change in section_changes if change.old is not None), key=lambda c: c.old.start)
+    starts = [change.old.start for change in changes]
+    dtls = (
+        db.query(models.DTL)
+        .filter(
+            models.DTL.dtlib_id == dtlib.id,
+            models.DTL.status.notin_(RETIRED_STATUSES),
+            models.DTL.deleted_at.is_(None),
+        )
+        .order_by(models.DTL.position, models.DTL.id)
+        .all()
+    )
+    return section_changes, [_map_dtl(dtl, old_text, new_text, changes, starts) for dtl in dtls]
+
+
+def report(section_changes: list[SectionChange], dtl_changes: list[DTLChange]) -> dict[str, Any]:
+    counts: dict[str, int] = defaultdict(int)
+    for change in section_changes:
+        counts[change.change] += 1
+    return {
+        "sections": dict(counts),
+        "added_sections": [change.label for change in section_changes if change.change == "added"],
+        "removed_sections": [change.label for change in section_changes if change.change == "removed"],
+        "dtls": [
+            {"dtl_id": change.dtl.id, "title": change.dtl.title, "change": change.change, "sections": change.sections}
+            for change in dtl_changes
+        ],
+    }
+
+
+def apply(
+    db: Session,
+    dtlib: models.DTLIB,
+    *,
+    version: str,
+    full_text: str,
+    effective_date: date | None = None,
+) -> tuple[models.DTLIBAmendment, list[tuple[int, int]]]:
+    """Move the library to a new version of its law text, keeping unchanged DTLs.
+
+    Unchanged DTLs keep their rows and get their span in the new text.
+    Changed DTLs are frozen with their old text as ``Superseded`` and get a
+    successor row (``supersedes_id``) over the new section text, in status
+    ``Regenerating``. DTLs whose sections disappeared become ``Repealed``.
+    Added sections become structural segmentation suggestions. Commits and
+    returns the amendment plus ``(successor_id, predecessor_id)`` pairs to
+    regenerate.
+    """
+
+    section_changes, dtl_changes = plan(db, dtlib, full_text)
+    old_text = dtlib.full_text
+
+    for change in dtl_changes:
+        if change.change in ("changed", "removed"):
+            # Freeze the wording the DTL was built from before the library text moves on.
+            wording = change.dtl.legal_text
+            change.dtl.legal_text = wording
+            change.dtl.status = "Superseded" if change.change == "changed" else "Repealed"
+
+    amendment = models.DTLIBAmendment(
+        dtlib_id=dtlib.id,
+        from_version=dtlib.version,
+        to_version=version,
+        previous_full_text=old_text,
+        report=report(section_changes, dtl_changes),
+    )
+    db.add(amendment)
+    dtlib.full_text = full_text
+    dtlib.version = version
+    if effective_date is not None:
+        dtlib.effective_date = effective_date
+    db.flush()
+
+    successors: list[tuple[models.DTL, models.DTL]] = []
+    for change in dtl_changes:
+        old = change.dtl
+        if change.change == "unchanged":
+            legal_spans.set_span(old, *change.span)
+        elif change.change == "changed":
+            successor = models.DTL(
+                dtlib_id=dtlib.id,
+                title=old.title,
+                description=old.description,
+                owner_user_id=old.owner_user_id,
+                version=version,
+                legal_reference=", ".join(change.sections) or old.legal_reference,
+                source_url=old.source_url,
+                classification=old.classification,
+                status="Regenerating",
+                position=old.position,
+                supersedes_id=old.id,
+            )
+            legal_spans.set_span(successor, *change.span)
+            db.add(successor)
+            successors.append((successor, old))
+    for change in section_changes:
+        if change.change == "added":
+            suggestion = models.SegmentationSuggestion(
+                dtlib_id=dtlib.id,
+                suggestion_title=f"{change.label} {change.new.title}" if change.new.title else change.label,
+                suggestion_description=f"Added in version {version}",
+                legal_reference=change.label,
+                alignment_method="structural",
+                alignment_confidence=1.0,
+            )
+            legal_spans.set_span(suggestion, change.new.start, change.new.end)
+            db.add(suggestion)
+    db.flush()
+
+    amendment.report = {
+        **amendment.report,
+        "successors": {str(old.id): successor.id for successor, old in successors},
+    }
+    db.commit()
+    return amendment, [(successor.id, old.id) for successor, old in successors]
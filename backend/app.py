@@ -1,40 +1,87 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import Response
+from sqlalchemy.orm.exc import StaleDataError
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
+from . import IMPORT_STARTED, events, purge, query_budget, replicas, similarity, startup, tracing
 from .config import settings
-from .database import Base, SessionLocal, engine
-from .models import User
+from .database import READ_METHODS, READ_PRIMARY_COOKIE, REPLICA_STICKY_SECONDS, replica_engines
+from .owl_validation import shutdown as shutdown_validation_pool
+from .responses import FastJSONResponse
+from .static_files import IMMUTABLE_PREFIX, StaticIndex
 from .routers import dtlibs, dtls, users
 
-Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.configure_logging()
+    # Database setup waits for the database instead of failing the import, so workers don't crash-loop.
+    await asyncio.to_thread(startup.initialize)
+    frontend = getattr(app.state, "frontend", None)
+    if frontend is not None:
+        with startup.report.phase("frontend"):
+            await asyncio.to_thread(frontend.load)
+    startup.report.log()
+    events.configure()
+    threading.Thread(target=similarity.backfill, name="similarity-backfill", daemon=True).start()
+    threading.Thread(target=purge.resume, name="purge-resume", daemon=True).start()
+    if replica_engines:
+        threading.Thread(target=replicas.monitor, name="replica-monitor", daemon=True).start()
+    yield
+    events.broker.backend.stop()
+    tracing.stop()
+    shutdown_validation_pool()
+
+
+app = FastAPI(
+    title="Digital Twin Legislation API",
+    servers=settings.servers,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+
+@app.exception_handler(StaleDataError)
+async def concurrent_update(request: Request, exc: StaleDataError):
+    """A row's ``row_version`` moved between loading and updating it: another request saved first."""
+
+    return FastJSONResponse(
+        status_code=status.HTTP_409_CONFLICT, content={"detail": "modified concurrently; reload and retry"}
+    )
 
 
-def ensure_default_user() -> None:
-    db = SessionLocal()
-    try:
-        if not db.query(User).first():
-            system_user = User(
-                external_id="system",
-                display_name="System",
-                email="system@example.com",
-            )
-            db.add(system_user)
-            db.commit()
-    finally:
-        db.close()
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, pin the client's reads to the primary until replicas have caught up."""
 
+    response = await call_next(request)
+    if replica_engines and request.method not in READ_METHODS and response.status_code < 400:
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=REPLICA_STICKY_SECONDS, httponly=True, samesite="lax")
+    return response
 
-ensure_default_user()
 
-app = FastAPI(title="Digital Twin Legislation API", servers=settings.servers)
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Time each request with its database queries and LLM calls (``Server-Timing``, slow-request log, OTLP)."""
+
+    return await tracing.trace_request(request, call_next)
+
+
+@app.middleware("http")
+async def check_query_budgets(request: Request, call_next):
+    """Report requests over their endpoint's ``query_budget`` and repeated SELECTs (N+1 loads)."""
+
+    return await query_budget.check_request(request, call_next)
 
 app.add_middleware(
     ProxyHeadersMiddleware,
@@ -59,14 +106,12 @@ def mount_frontend(app: FastAPI) -> None:
         os.getenv("FRONTEND_DIST_PATH")
         or Path(__file__).resolve().parents[1] / "frontend" / "dist"
     )
-    index_file = dist_path / "index.html"
-
-    if not index_file.exists():
+    if not (dist_path / "index.html").exists():
         return
 
-    assets_dir = dist_path / "assets"
-    if assets_dir.exists():
-        app.mount("/assets", StaticFiles(directory=assets_dir), name="assets")
+    # Loaded into memory in the lifespan; requests never touch the filesystem.
+    frontend = StaticIndex(dist_path)
+    app.state.frontend = frontend
 
     reserved_prefixes = {
         settings.api_prefix.lstrip("/"),
@@ -76,22 +121,24 @@ def mount_frontend(app: FastAPI) -> None:
     }
 
     @app.get("/", include_in_schema=False)
-    async def serve_index() -> FileResponse:
-        return FileResponse(index_file)
+    async def serve_index(request: Request) -> Response:
+        return frontend.response(frontend.get("index.html"), request)
 
     @app.get("/{full_path:path}", include_in_schema=False)
-    async def serve_spa(full_path: str) -> FileResponse:
+    async def serve_spa(full_path: str, request: Request) -> Response:
         if any(
             full_path == prefix or full_path.startswith(f"{prefix}/")
             for prefix in reserved_prefixes
         ):
             raise HTTPException(status_code=404)
 
-        candidate = dist_path / full_path
-        if candidate.is_file():
-            return FileResponse(candidate)
-
-        return FileResponse(index_file)
+        file = frontend.get(full_path)
+        if file is None:
+            if full_path.startswith(IMMUTABLE_PREFIX):
+                raise HTTPException(status_code=404)
+            file = frontend.get("index.html")
+        return frontend.response(file, request)
 
 
 mount_frontend(app)
+startup.report.phases["import"] = time.perf_counter() - IMPORT_STARTED
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import io
+import json
+import os
+import tarfile
+import time
+from datetime import date, datetime
+from typing import IO, Any, Iterator, Literal
+
+from sqlalchemy import Date, DateTime, select, union
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import models
+from .database import SessionLocal
+
+Compression = Literal["gz", "none"]
+
+FORMAT_VERSION = 1
+EXPORT_BATCH_SIZE = 100
+IMPORT_BATCH_SIZE = int(os.getenv("ARCHIVE_IMPORT_BATCH_SIZE", "200"))
+MAX_MEMBER_BYTES = int(os.getenv("ARCHIVE_MAX_MEMBER_MB", "64")) * 1024 * 1024
+
+# Columns that are identities, foreign keys or derived state; they are never
+# exported and are re-established by the importing environment.
+_EXCLUDED = {
+    models.DTLIB: {"id", "created_by", "created_at", "updated_at", "row_version"},
+    models.DTL: {"id", "dtlib_id", "legal_text_start", "legal_text_end", "supersedes_id", "row_version"},
+    models.DTLOntology: {"dtl_id", "is_valid", "diagnostics", "validated_hash", "validated_at", "row_version"},
+    models.DTLConfiguration: {"dtl_id", "is_valid", "diagnostics", "validated_hash", "validated_at", "row_version"},
+    models.DTLInterface: {"dtl_id", "row_version"},
+    models.DTLLogic: {"dtl_id", "row_version"},
+    models.DTLReview: {"dtl_id", "row_version"},
+    models.DTLTest: {"id", "dtl_id", "last_run_at", "last_result", "row_version"},
+    models.DTLComment: {"id", "dtl_id"},
+}
+_ARTIFACTS = {
+    "ontology": models.DTLOntology,
+    "interface": models.DTLInterface,
+    "configuration": models.DTLConfiguration,
+    "logic": models.DTLLogic,
+    "review": models.DTLReview,
+}
+
+
+class ArchiveError(ValueError):
+    """Raised when an uploaded archive is not a readable library export."""
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write target for ``tarfile`` stream mode whose buffer is drained after every member."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _drained(sink: _ChunkSink) -> Iterator[bytes]:
+    # The gzip layer buffers internally, so a member often produces no output yet.
+    data = sink.drain()
+    if data:
+        yield data
+
+
+def _encode(obj: Any) -> dict[str, Any]:
+    excluded = _EXCLUDED[type(obj)]
+    values = {}
+    for column in obj.__table__.columns:
+        if column.key in excluded:
+            continue
+        value = getattr(obj, column.key)
+        values[column.key] = value.isoformat() if isinstance(value, (date, datetime)) else value
+    return values
+
+
+def _decode(model: type, values: dict[str, Any]) -> dict[str, Any]:
+    """Keep the known, non-excluded columns of ``values`` and restore date/datetime types."""
+
+    excluded = _EXCLUDED[model]
+    decoded = {}
+    for column in model.__table__.columns:
+        if column.key in excluded or column.key not in values:
+            continue
+        value = values[column.key]
+        if value is not None and isinstance(column.type, DateTime):
+            value = datetime.fromisoformat(value)
+        elif value is not None and isinstance(column.type, Date):
+            value = date.fromisoformat(value)
+        decoded[column.key] = value
+    return decoded
+
+
+def _dump(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _add_member(tar: tarfile.TarFile, name: str, payload: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(payload)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(payload))
+
+
+def _referenced_users(db: Session, dtlib_id: int) -> list[dict[str, Any]]:
+    in_library = select(models.DTL.id).where(models.DTL.dtlib_id == dtlib_id)
+    user_ids = union(
+        select(models.DTL.owner_user_id).where(models.DTL.dtlib_id == dtlib_id),
+        select(models.DTLReview.reviewer_id).where(models.DTLReview.dtl_id.in_(in_library)),
+        select(models.DTLComment.author_id).where(models.DTLComment.dtl_id.in_(in_library)),
+    ).subquery()
+    users = db.scalars(select(models.User).where(models.User.id.in_(select(user_ids.c[0]))))
+    return [
+        {"id": user.id, "external_id": user.external_id, "display_name": user.display_name, "email": user.email}
+        for user in users
+    ]
+
+
+def stream_export(dtlib_id: int, compression: Compression = "gz") -> Iterator[bytes]:
+    """Yield a tar archive of the library one DTL member at a time.
+
+    DTLs are read in id-keyset batches and expunged after serialization, so
+    neither the session nor the output buffer grows with the library. Runs
+    in its own session because the response outlives the request's.
+    """
+
+    db = SessionLocal()
+    sink = _ChunkSink()
+    try:
+        with tarfile.open(fileobj=sink, mode="w|gz" if compression == "gz" else "w|") as tar:
+            dtlib = db.get(models.DTLIB, dtlib_id)
+            manifest = {"format_version": FORMAT_VERSION, "library": _encode(dtlib)}
+            _add_member(tar, "manifest.json", _dump(manifest))
+            _add_member(tar, "users.json", _dump(_referenced_users(db, dtlib_id)))
+            db.expunge_all()
+            yield from _drained(sink)
+
+            last_id = 0
+            while True:
+                batch = db.scalars(
+                    select(models.DTL)
+                    .options(
+                        *(joinedload(getattr(models.DTL, name)) for name in _ARTIFACTS),
+                        selectinload(models.DTL.tests),
+                        selectinload(models.DTL.comments),
+                    )
+                    .where(models.DTL.dtlib_id == dtlib_id, models.DTL.id > last_id)
+                    .order_by(models.DTL.id)
+                    .limit(EXPORT_BATCH_SIZE)
+                ).unique().all()
+                if not batch:
+                    break
+                for dtl in batch:
+                    record = {
+                        "source_id": dtl.id,
+                        "dtl": _encode(dtl),
+                        **{
+                            name: _encode(getattr(dtl, name)) if getattr(dtl, name) else None
+                            for name in _ARTIFACTS
+                        },
+                        "tests": [_encode(test) for test in sorted(dtl.tests, key=lambda test: test.id)],
+                        "comments": [
+                            _encode(comment) for comment in sorted(dtl.comments, key=lambda comment: comment.id)
+                        ],
+                    }
+                    _add_member(tar, f"dtls/{dtl.id:08d}.json", _dump(record))
+                    yield from _drained(sink)
+                last_id = batch[-1].id
+                db.expunge_all()
+        yield from _drained(sink)
+    finally:
+        db.close()
+
+
+def _map_users(db: Session, exported: list[dict[str, Any]]) -> dict[int, int]:
+    """Map exported user ids to local ones by external id, then email, creating missing users."""
+
+    mapping = {}
+    for user in exported:
+        local = db.scalars(select(models.User).where(models.User.external_id == user["external_id"])).first()
+        if local is None:
+            local = db.scalars(select(models.User).where(models.User.email == user["email"])).first()
+        if local is None:
+            local = models.User(
+                external_id=user["external_id"], display_name=user["display_name"], email=user["email"]
+            )
+            db.add(local)
+            db.flush()
+        mapping[user["id"]] = local.id
+    return mapping
+
+
+def _build_dtl(record: dict[str, Any], dtlib_id: int, users: dict[int, int], importer_id: int) -> models.DTL:
+    dtl = models.DTL(dtlib_id=dtlib_id, **_decode(models.DTL, record["dtl"]))
+    dtl.owner_user_id = users.get(dtl.owner_user_id)
+    for name, model in _ARTIFACTS.items():
+        if record.get(name):
+            setattr(dtl, name, model(**_decode(model, record[name])))
+    if dtl.review is not None:
+        dtl.review.reviewer_id = users.get(dtl.review.reviewer_id)
+    dtl.tests = [models.DTLTest(**_decode(models.DTLTest, test)) for test in record.get("tests", [])]
+    comments = []
+    for values in record.get("comments", []):
+        comment = models.DTLComment(**_decode(models.DTLComment, values))
+        comment.author_id = users.get(comment.author_id, importer_id)
+        comments.append(comment)
+    dtl.comments = comments
+    return dtl
+
+
+def import_archive(db: Session, fileobj: IO[bytes], created_by: int) -> tuple[int, list[int]]:
+    """Create a new library from an export read sequentially from ``fileobj``.
+
+    Members are parsed one at a time in tar stream mode and DTLs are flushed
+    in batches of ``IMPORT_BATCH_SIZE`` and expunged, so memory stays bounded
+    by one batch. Everything is committed at the end or not at all. Returns
+    the new library id and the ids of the imported DTLs.
+    """
+
+    dtlib_id: int | None = None
+    users: dict[int, int] = {}
+    imported: list[int] = []
+    pending: list[models.DTL] = []
+
+    def flush_pending() -> None:
+        db.flush()
+        imported.extend(dtl.id for dtl in pending)
+        pending.clear()
+        db.expunge_all()
+
+    try:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                if member.size > MAX_MEMBER_BYTES:
+                    raise ArchiveError(f"{member.name} exceeds {MAX_MEMBER_BYTES} bytes")
+                data = json.load(tar.extractfile(member))
+                if member.name == "manifest.json":
+                    if data.get("format_version") != FORMAT_VERSION:
+                        raise ArchiveError(f"unsupported format version {data.get('format_version')}")
+                    dtlib = models.DTLIB(created_by=created_by, **_decode(models.DTLIB, data["library"]))
+                    db.add(dtlib)
+                    db.flush()
+                    dtlib_id = dtlib.id
+                elif member.name == "users.json":
+                    users = _map_users(db, data)
+                elif member.name.startswith("dtls/"):
+                    if dtlib_id is None:
+                        raise ArchiveError("manifest.json must precede the DTL members")
+                    dtl = _build_dtl(data, dtlib_id, users, created_by)
+                    db.add(dtl)
+                    pending.append(dtl)
+                    if len(pending) >= IMPORT_BATCH_SIZE:
+                        flush_pending()
+    except ArchiveError:
+        raise
+    except (tarfile.TarError, ValueError, KeyError, TypeError) as exc:
+        raise ArchiveError(f"unreadable archive: {exc}") from exc
+    if dtlib_id is None:
+        raise ArchiveError("archive has no manifest.json")
+    flush_pending()
+    db.commit()
+    return dtlib_id, imported
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from . import models, ontology_merge, overview, responses, schemas
+from .database import Base
+
+_DTL_LIST = TypeAdapter(List[schemas.DTLRead])
+_OVERVIEW = TypeAdapter(schemas.OverviewSnapshot)
+
+
+def build_library(db: Session, dtl_count: int) -> int:
+    paragraphs = [
+        f"§ {number} Abschnitt {number}\n(1) Die Beihilfe beträgt {number} Euro monatlich.\n" for number in range(dtl_count)
+    ]
+    full_text = "".join(paragraphs)
+    user = models.User(external_id="bench", display_name="Bench", email="bench@example.com")
+    db.add(user)
+    db.flush()
+    dtlib = models.DTLIB(
+        law_name="Benchmark",
+        law_identifier="BENCH",
+        jurisdiction="AT",
+        version="1",
+        full_text=full_text,
+        created_by=user.id,
+    )
+    db.add(dtlib)
+    db.flush()
+    now = datetime.utcnow()
+    offset = 0
+    rows = []
+    for number, paragraph in enumerate(paragraphs):
+        spanned = number % 2 == 0  # half as spans into the full text, half as stored text
+        rows.append(
+            {
+                "dtlib_id": dtlib.id,
+                "title": f"DTL {number}",
+                "version": "1",
+                "legal_reference": f"§ {number}",
+                "legal_text": None if spanned else paragraph,
+                "legal_text_start": offset if spanned else None,
+                "legal_text_end": offset + len(paragraph) if spanned else None,
+                "classification": {"domain": "benefits", "tags": ["monthly"]},
+                "status": "Draft",
+                "position": number,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        offset += len(paragraph)
+    db.execute(insert(models.DTL.__table__), rows)
+    db.commit()
+    overview.get_snapshot(db, dtlib.id)
+    return dtlib.id
+
+
+def model_dtls(db: Session, dtlib_id: int) -> bytes:
+    dtls = db.query(models.DTL).filter_by(dtlib_id=dtlib_id, deleted_at=None).order_by(models.DTL.position).all()
+    return _DTL_LIST.dump_json(_DTL_LIST.validate_python(dtls))
+
+
+def row_dtls(db: Session, dtlib_id: int) -> bytes:
+    dtlib = db.get(models.DTLIB, dtlib_id)
+    rows = db.execute(responses.select_dtls(models.DTL.dtlib_id == dtlib_id).order_by(models.DTL.position))
+    return responses.FastJSONResponse(responses.dtl_rows(rows, dtlib.full_text)).body
+
+
+def model_overview(db: Session, dtlib_id: int) -> bytes:
+    dtlib = db.get(models.DTLIB, dtlib_id)
+    dtls = db.query(models.DTL).filter_by(dtlib_id=dtlib_id, deleted_at=None).order_by(models.DTL.id).all()
+    snapshot = schemas.OverviewSnapshot(
+        dtlib=dtlib,
+        dtls=dtls,
+        aggregated_ontology=ontology_merge.aggregated_graph(db, dtlib_id, "ontology"),
+        aggregated_configuration=ontology_merge.aggregated_graph(db, dtlib_id, "configuration"),
+        **overview.render(overview.get_snapshot(db, dtlib_id)),
+    )
+    return _OVERVIEW.dump_json(snapshot)
+
+
+def row_overview(db: Session, dtlib_id: int) -> bytes:
+    return responses.FastJSONResponse(overview.content(db, db.get(models.DTLIB, dtlib_id))).body
+
+
+def cpu_per_request(sessions: sessionmaker, render: Callable[[Session, int], bytes], dtlib_id: int, repeat: int):
+    """Mean CPU seconds per call, each in a fresh session like a request; also returns the last body."""
+
+    body = b""
+    started = time.process_time()
+    for _ in range(repeat):
+        with sessions() as db:
+            body = render(db, dtlib_id)
+    return (time.process_time() - started) / repeat, body
+
+
+def main(dtl_count: int = 5000, repeat: int = 10) -> None:
+    """CPU per request of the DTL list and overview, Pydantic models versus row serializers.
+
+    ``python -m backend.bench_serialization [dtls] [repeat]`` runs it on a
+    synthetic library in a private in-memory SQLite database.
+    """
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    sessions = sessionmaker(bind=engine, autoflush=False, future=True)
+    with sessions() as db:
+        dtlib_id = build_library(db, dtl_count)
+
+    print(f"{dtl_count} DTLs, {repeat} requests each (CPU ms per request)")
+    for name, before, after in (
+        ("GET .../dtls", model_dtls, row_dtls),
+        ("GET .../overview", model_overview, row_overview),
+    ):
+        model_seconds, model_body = cpu_per_request(sessions, before, dtlib_id, repeat)
+        row_seconds, row_body = cpu_per_request(sessions, after, dtlib_id, repeat)
+        if json.loads(model_body) != json.loads(row_body):
+            raise SystemExit(f"{name}: row serializer output differs from the Pydantic response")
+        print(
+            f"  {name:<18} models {model_seconds * 1000:8.1f}  rows {row_seconds * 1000:8.1f}  "
+            f"saved {(model_seconds - row_seconds) * 1000:8.1f} ({1 - row_seconds / model_seconds:.0%})"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:3]))
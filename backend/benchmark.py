@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import math
+import os
+import random
+import string
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from sqlalchemy.orm import Session
+
+from . import models, sandbox
+from .hashing import hash_text
+
+BENCHMARK_TIMEOUT_SECONDS = float(os.getenv("BENCHMARK_TIMEOUT_SECONDS", "120"))
+BENCHMARK_REGRESSION_FACTOR = float(os.getenv("BENCHMARK_REGRESSION_FACTOR", "1.5"))
+
+# Boundary values per declared input type. Large collections and strings are
+# included on purpose: they are what exposes accidental quadratic loops.
+_BOUNDARIES: dict[str, list[Any]] = {
+    "integer": [0, 1, -1, 2**31 - 1, -(2**31), 10**12],
+    "number": [0, 0.5, -1.0, 1e-9, 1e12, -1e12],
+    "boolean": [True, False],
+    "string": ["", "a", "Ä§ß€", "x" * 2_000],
+    "date": ["1970-01-01", "2000-02-29", "2099-12-31"],
+    "array": [[], [0], list(range(2_000))],
+    "object": [{}, {"key": "value"}],
+}
+
+_TYPE_ALIASES = {
+    "int": "integer",
+    "float": "number",
+    "decimal": "number",
+    "double": "number",
+    "bool": "boolean",
+    "str": "string",
+    "text": "string",
+    "datetime": "date",
+    "list": "array",
+    "dict": "object",
+}
+
+
+def _normalize_type(raw: Any) -> str:
+    name = str(raw or "string").strip().lower()
+    name = _TYPE_ALIASES.get(name, name)
+    return name if name in _BOUNDARIES else "string"
+
+
+def _random_value(kind: str, rng: random.Random) -> Any:
+    generators: dict[str, Callable[[], Any]] = {
+        "integer": lambda: rng.randint(-1_000_000, 1_000_000),
+        "number": lambda: rng.uniform(-1_000_000, 1_000_000),
+        "boolean": lambda: rng.random() < 0.5,
+        "string": lambda: "".join(rng.choices(string.ascii_letters + " ", k=rng.randint(0, 64))),
+        "date": lambda: (date(1970, 1, 1) + timedelta(days=rng.randint(0, 47_000))).isoformat(),
+        "array": lambda: [rng.randint(-1000, 1000) for _ in range(rng.randint(0, 100))],
+        "object": lambda: {"value": rng.randint(-1000, 1000)},
+    }
+    return generators[kind]()
+
+
+def synthesize_inputs(interface_json: dict | None, samples: int, seed: int) -> list[dict[str, Any]]:
+    """Build ``samples`` keyword-argument dicts from the typed interface inputs.
+
+    Every boundary value of every input is tried once (with the other inputs at
+    random values) before the remainder is filled with seeded random inputs, so
+    the same seed always produces the same workload.
+    """
+
+    rng = random.Random(seed)
+    specs = [
+        (spec["name"], _normalize_type(spec.get("type")))
+        for spec in (interface_json or {}).get("inputs", [])
+        if isinstance(spec, dict) and spec.get("name")
+    ]
+    if not specs:
+        return [{} for _ in range(samples)]
+
+    def random_row() -> dict[str, Any]:
+        return {name: _random_value(kind, rng) for name, kind in specs}
+
+    inputs: list[dict[str, Any]] = []
+    for name, kind in specs:
+        for boundary in _BOUNDARIES[kind]:
+            inputs.append(random_row() | {name: boundary})
+    while len(inputs) < samples:
+        inputs.append(random_row())
+    return inputs[:samples]
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float | None:
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def run_benchmark(db: Session, dtl: models.DTL, samples: int = 500, seed: int = 0) -> models.DTLBenchmarkRun:
+    """Benchmark the current logic of ``dtl`` and store the result (the caller commits).
+
+    Latencies come from an untraced pass; the memory peak from a second pass
+    under ``tracemalloc`` so its overhead does not skew the timings. Logic the
+    sandbox cannot execute is recorded with a ``load_error`` and no timings.
+    """
+
+    code = dtl.logic.code
+    interface_json = dtl.interface.interface_json if dtl.interface else None
+    function_name = (interface_json or {}).get("function_name")
+    inputs = synthesize_inputs(interface_json, samples, seed)
+
+    if sandbox.supports(dtl.logic.language):
+        timed = sandbox.execute(code, function_name, inputs, timeout=BENCHMARK_TIMEOUT_SECONDS)
+    else:
+        timed = sandbox.SandboxResult(load_error=f"{dtl.logic.language} logic cannot be executed")
+    traced = (
+        sandbox.execute(code, function_name, inputs, trace_memory=True, timeout=BENCHMARK_TIMEOUT_SECONDS)
+        if not timed.load_error
+        else timed
+    )
+
+    durations = sorted(call.duration_ms for call in timed.calls)
+    errors = Counter(call.error.split(":", 1)[0] for call in timed.calls if call.error)
+    total_seconds = sum(durations) / 1000
+    run = models.DTLBenchmarkRun(
+        dtl_id=dtl.id,
+        logic_hash=hash_text(code),
+        seed=seed,
+        samples=len(inputs),
+        p50_ms=_percentile(durations, 50),
+        p99_ms=_percentile(durations, 99),
+        max_ms=durations[-1] if durations else None,
+        throughput_per_s=len(durations) / total_seconds if total_seconds else None,
+        exceptions=sum(errors.values()),
+        exception_summary=dict(errors) or None,
+        memory_peak_kb=traced.memory_peak_kb,
+        load_error=timed.load_error,
+    )
+    db.add(run)
+    return run
+
+
+def baseline_for(db: Session, run: models.DTLBenchmarkRun) -> models.DTLBenchmarkRun | None:
+    """Latest earlier benchmark of the same DTL that ran a different logic version."""
+
+    return (
+        db.query(models.DTLBenchmarkRun)
+        .filter(
+            models.DTLBenchmarkRun.dtl_id == run.dtl_id,
+            models.DTLBenchmarkRun.logic_hash != run.logic_hash,
+            models.DTLBenchmarkRun.id < run.id,
+            models.DTLBenchmarkRun.load_error.is_(None),
+        )
+        .order_by(models.DTLBenchmarkRun.id.desc())
+        .first()
+    )
+
+
+def compare(run: models.DTLBenchmarkRun, baseline: models.DTLBenchmarkRun | None) -> dict[str, Any]:
+    """Summarize how ``run`` moved against ``baseline`` for the API response."""
+
+    if not baseline or not baseline.p99_ms or run.p99_ms is None:
+        return {"baseline_id": baseline.id if baseline else None, "p99_ratio": None, "regression": False}
+    ratio = run.p99_ms / baseline.p99_ms
+    slowest_ratio = run.max_ms / baseline.max_ms if run.max_ms and baseline.max_ms else 1.0
+    return {
+        "baseline_id": baseline.id,
+        "p99_ratio": ratio,
+        "regression": max(ratio, slowest_ratio) > BENCHMARK_REGRESSION_FACTOR
+        or run.exceptions > baseline.exceptions,
+    }
+
+
+def history(db: Session, dtl_id: int, limit: int = 50) -> list[tuple[models.DTLBenchmarkRun, dict[str, Any]]]:
+    """Stored benchmarks of a DTL, newest first, each paired with its comparison."""
+
+    runs = (
+        db.query(models.DTLBenchmarkRun)
+        .filter_by(dtl_id=dtl_id)
+        .order_by(models.DTLBenchmarkRun.id.desc())
+        .limit(limit)
+        .all()
+    )
+    paired = []
+    for index, run in enumerate(runs):
+        baseline = next(
+            (older for older in runs[index + 1 :] if older.logic_hash != run.logic_hash and not older.load_error),
+            None,
+        )
+        paired.append((run, compare(run, baseline)))
+    return paired
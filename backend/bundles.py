@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+
+_ARTIFACT_SECTIONS = ("ontology", "interface", "configuration", "logic", "review")
+
+
+def test_version_key(test_id: int) -> str:
+    return f"test:{test_id}"
+
+
+def section_versions(dtl: models.DTL, sections: list[str]) -> dict[str, int | None]:
+    """``row_version`` of every loaded section, as echoed back in ``base_versions`` on save."""
+
+    versions: dict[str, int | None] = {}
+    if "dtl" in sections:
+        versions["dtl"] = dtl.row_version
+    for section in _ARTIFACT_SECTIONS:
+        if section in sections:
+            artifact = getattr(dtl, section)
+            versions[section] = artifact.row_version if artifact else None
+    if "tests" in sections:
+        for test in dtl.tests:
+            versions[test_version_key(test.id)] = test.row_version
+    return versions
+
+
+def _check_versions(dtl: models.DTL, tests: dict[int, models.DTLTest], base_versions: dict[str, int | None]) -> None:
+    current: dict[str, int | None] = {"dtl": dtl.row_version}
+    for section in _ARTIFACT_SECTIONS:
+        artifact = getattr(dtl, section)
+        current[section] = artifact.row_version if artifact else None
+    for test_id, test in tests.items():
+        current[test_version_key(test_id)] = test.row_version
+
+    conflicts = sorted(
+        key for key, seen in base_versions.items() if key in current and current[key] != seen
+    )
+    if conflicts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "bundle was modified concurrently", "sections": conflicts},
+        )
+
+
+def _assign_changed(target: Any, values: dict[str, Any]) -> bool:
+    changed = False
+    for field, value in values.items():
+        if getattr(target, field) != value:
+            setattr(target, field, value)
+            changed = True
+    return changed
+
+
+def apply_bundle_update(db: Session, dtl: models.DTL, payload: schemas.DTLBundleUpdate) -> list[str]:
+    """Apply every section of ``payload`` to ``dtl`` and return the sections that changed.
+
+    All ``base_versions`` are checked before anything is modified, so a conflict
+    leaves the DTL untouched. Sections whose content equals the stored content
+    are skipped entirely and cause no UPDATE. The caller commits once.
+    """
+
+    tests = {test.id: test for test in dtl.tests}
+    referenced = {item.id for item in payload.tests or [] if item.id is not None} | set(payload.deleted_test_ids)
+    missing = sorted(referenced - tests.keys())
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Test not found: {', '.join(map(str, missing))}",
+        )
+    _check_versions(dtl, tests, payload.base_versions)
+
+    applied: list[str] = []
+    if payload.dtl and _assign_changed(dtl, payload.dtl.dict(exclude_unset=True)):
+        applied.append("dtl")
+
+    if payload.ontology:
+        if not dtl.ontology:
+            dtl.ontology = models.DTLOntology(ontology_owl=payload.ontology.ontology_owl)
+            applied.append("ontology")
+        elif _assign_changed(dtl.ontology, {"ontology_owl": payload.ontology.ontology_owl}):
+            applied.append("ontology")
+
+    if payload.interface:
+        values = {
+            "interface_json": payload.interface.dict(exclude={"mcp_spec"}),
+            "mcp_spec": payload.interface.mcp_spec,
+        }
+        if not dtl.interface:
+            dtl.interface = models.DTLInterface(**values)
+            applied.append("interface")
+        elif _assign_changed(dtl.interface, values):
+            applied.append("interface")
+
+    if payload.configuration:
+        values = {"configuration_owl": payload.configuration.configuration_owl}
+        if not dtl.configuration:
+            dtl.configuration = models.DTLConfiguration(**values)
+            applied.append("configuration")
+        elif _assign_changed(dtl.configuration, values):
+            applied.append("configuration")
+
+    if payload.logic:
+        values = {"language": payload.logic.language, "code": payload.logic.code}
+        if not dtl.logic:
+            dtl.logic = models.DTLLogic(**values)
+            applied.append("logic")
+        elif _assign_changed(dtl.logic, values):
+            applied.append("logic")
+
+    tests_changed = False
+    for item in payload.tests or []:
+        values = {
+            "name": item.name,
+            "input_json": item.input,
+            "expected_output_json": item.expected_output,
+            "description": item.description,
+        }
+        if item.id is None:
+            db.add(models.DTLTest(dtl_id=dtl.id, **values))
+            tests_changed = True
+        elif _assign_changed(tests[item.id], values):
+            tests_changed = True
+    for test_id in payload.deleted_test_ids:
+        db.delete(tests[test_id])
+        tests_changed = True
+    if tests_changed:
+        applied.append("tests")
+
+    if applied:
+        db.add(dtl)
+    return applied
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import sys
+import tempfile
+from typing import Any
+
+from . import query_budget
+
+# Path parameters the check can fill in; GET routes needing others are skipped.
+_PARAMETERS = {"dtlib_id", "dtl_id", "test_id"}
+_ONTOLOGY = (
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:owl="http://www.w3.org/2002/07/owl#">'
+    '<owl:Class rdf:about="http://example.org/check#Benefit{number}"/></rdf:RDF>'
+)
+_CONFIGURATION = (
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:owl="http://www.w3.org/2002/07/owl#">'
+    '<owl:NamedIndividual rdf:about="http://example.org/check#amount{number}"/></rdf:RDF>'
+)
+# Shared by every DTL so ``/similar`` finds (and loads the artifacts of) all the others.
+_CONDITIONS = (
+    "für jede anspruchsberechtigte Person mit Hauptwohnsitz im Bundesgebiet, sofern das monatliche Einkommen "
+    "des Haushalts den Richtsatz nicht übersteigt und kein gleichartiger Anspruch nach anderen Vorschriften besteht."
+)
+
+
+def build_library(client: Any, user_id: int, dtl_count: int) -> dict[str, int]:
+    """A library of ``dtl_count`` approved DTLs with every artifact, tests and comments, created through the API.
+
+    Every section a budgeted GET serves exists, so the measured counts are
+    those of a fully worked library.
+    """
+
+    texts = [f"(1) Die Beihilfe beträgt {number} Euro {_CONDITIONS}" for number in range(dtl_count)]
+    full_text = "".join(f"§ {number} Abschnitt\n{text}\n" for number, text in enumerate(texts))
+    dtlib = client.post(
+        "/api/dtlibs",
+        json={
+            "law_name": f"Check {dtl_count}",
+            "law_identifier": f"CHECK-{dtl_count}",
+            "jurisdiction": "AT",
+            "version": "1",
+            "full_text": full_text,
+            "created_by": user_id,
+        },
+    ).json()
+    base = f"/api/dtlibs/{dtlib['id']}/dtls"
+    ids: dict[str, int] = {"dtlib_id": dtlib["id"]}
+    for number, text in enumerate(texts):
+        dtl = client.post(
+            base,
+            json={"title": f"DTL {number}", "version": "1", "legal_reference": f"§ {number}", "legal_text": text},
+        ).json()
+        url = f"{base}/{dtl['id']}"
+        client.put(f"{url}/ontology", json={"ontology_owl": _ONTOLOGY.format(number=number)})
+        client.put(f"{url}/configuration", json={"configuration_owl": _CONFIGURATION.format(number=number)})
+        client.put(f"{url}/interface", json={"function_name": f"f{number}", "inputs": [], "outputs": []})
+        client.put(f"{url}/logic", json={"code": f"def f{number}():\n    return {number}\n"})
+        for index in range(3):
+            test = client.post(
+                f"{url}/tests", json={"name": f"t{index}", "input": {}, "expected_output": {"result": number}}
+            ).json()
+            client.post(f"{url}/comments", json={"author_id": user_id, "role": "Reviewer", "comment": f"c{index}"})
+        client.post(f"{url}/approve")
+        ids.setdefault("dtl_id", dtl["id"])
+        ids.setdefault("test_id", test["id"])
+    return ids
+
+
+def get_routes() -> list[tuple[str, Any]]:
+    from .config import settings
+    from .routers import dtlibs, dtls
+
+    routes = []
+    for router in (dtlibs.router, dtls.router):
+        for route in router.routes:
+            if "GET" not in getattr(route, "methods", ()):
+                continue
+            if set(re.findall(r"{(\w+)}", route.path)) <= _PARAMETERS:
+                routes.append((settings.api_prefix + route.path, route.endpoint))
+    return routes
+
+
+def main(small: int = 2, large: int = 8) -> None:
+    """Query counts of the GET endpoints on a small and a large library, checked against their budgets.
+
+    ``python -m backend.check_queries [small] [large]`` runs the app on a
+    private SQLite database. It exits non-zero when an endpoint exceeds its
+    ``query_budget`` or a budgeted endpoint issues more queries on the large
+    library than on the small one (an N+1 load).
+    """
+
+    if "backend.database" in sys.modules:
+        raise SystemExit("run check_queries in a fresh interpreter: it needs its own database")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/check_queries.db"
+    os.environ["DATABASE_REPLICA_URLS"] = ""
+    from fastapi.testclient import TestClient
+
+    from .app import app
+
+    logging.getLogger(query_budget.__name__).setLevel(logging.ERROR)
+    recorded: list[query_budget.RequestQueries] = []
+    query_budget.observers.append(recorded.append)
+    failures = []
+    with TestClient(app) as client:
+        user = client.post(
+            "/api/users", json={"external_id": "check", "display_name": "Check", "email": "check@example.com"}
+        ).json()
+        libraries = [build_library(client, user["id"], count) for count in (small, large)]
+        print(f"Queries per GET request, libraries of {small} and {large} DTLs")
+        for path, endpoint in get_routes():
+            counts, status_code = [], 0
+            for ids in libraries:
+                recorded.clear()
+                status_code = max(status_code, client.get(path.format(**ids)).status_code)
+                counts.append(recorded[-1].log.count if recorded else 0)
+            budget = getattr(endpoint, "query_budget", None)
+            problems = []
+            if status_code >= 500:
+                problems.append(f"status {status_code}")
+            if budget is not None and counts[1] > budget:
+                problems.append(f"over budget {budget}")
+            if counts[1] > counts[0]:
+                problems.append("grows with the library")
+            failed = bool(problems) and (budget is not None or status_code >= 500)
+            if failed:
+                failures.append(path)
+            note = ", ".join(problems) if problems else "ok"
+            print(f"  {'FAIL' if failed else '    '} {path:<58} {counts[0]:4d} {counts[1]:4d}  budget {budget}  {note}")
+    if failures:
+        raise SystemExit(f"{len(failures)} endpoint(s) over their query budget")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:3]))
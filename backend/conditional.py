@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+@dataclass(frozen=True)
+class Validators:
+    """ETag / Last-Modified pair derived from version columns, never from payloads.
+
+    Versions are ``row_version`` counters (bumped by every ORM update, so two
+    writes within one second still change the ETag), plus row counts and max
+    ids for collections, so a conditional request is answered from one narrow
+    query without reading the large Text columns. The ``updated_at``
+    timestamps among them only set Last-Modified.
+    """
+
+    etag: str
+    last_modified: datetime | None
+
+    @classmethod
+    def build(cls, resource: str, *versions: Any) -> "Validators":
+        digest = hashlib.sha256("|".join([resource, *map(str, versions)]).encode("utf-8")).hexdigest()
+        timestamps = [value for value in versions if isinstance(value, datetime)]
+        return cls(etag=f'"{digest[:32]}"', last_modified=max(timestamps) if timestamps else None)
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.last_modified:
+            headers["Last-Modified"] = format_datetime(
+                self.last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True
+            )
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+        return False
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers)
+
+    def not_modified(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+
+def _one_or_404(db: Session, statement: Any, detail: str) -> Any:
+    row = db.execute(statement).first()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+    return row
+
+
+def _live_dtl(statement: Any, dtlib_id: int, dtl_id: int) -> Any:
+    """Restrict ``statement`` to the DTL, unless it or its library is deleted (then the version is a 404)."""
+
+    return statement.join(models.DTLIB, models.DTLIB.id == models.DTL.dtlib_id).where(
+        models.DTL.id == dtl_id,
+        models.DTL.dtlib_id == dtlib_id,
+        models.DTL.deleted_at.is_(None),
+        models.DTLIB.deleted_at.is_(None),
+    )
+
+
+def dtlib_version(db: Session, dtlib_id: int) -> tuple:
+    return tuple(
+        _one_or_404(
+            db,
+            select(models.DTLIB.updated_at, models.DTLIB.row_version).where(
+                models.DTLIB.id == dtlib_id, models.DTLIB.deleted_at.is_(None)
+            ),
+            "DTLIB not found",
+        )
+    )
+
+
+def dtl_version(db: Session, dtlib_id: int, dtl_id: int) -> tuple:
+    return tuple(
+        _one_or_404(
+            db, _live_dtl(select(models.DTL.updated_at, models.DTL.row_version), dtlib_id, dtl_id), "DTL not found"
+        )
+    )
+
+
+def artifact_version(db: Session, dtlib_id: int, dtl_id: int, model: type) -> tuple | None:
+    """Version of a one-to-one artifact, ``None`` if the DTL has none yet (404 if no DTL)."""
+
+    row = _one_or_404(
+        db,
+        _live_dtl(
+            select(model.updated_at, model.row_version)
+            .select_from(models.DTL)
+            .outerjoin(model, model.dtl_id == models.DTL.id),
+            dtlib_id,
+            dtl_id,
+        ),
+        "DTL not found",
+    )
+    return None if row.row_version is None else tuple(row)
+
+
+def _collection_version(db: Session, model: type, dtl_id: int, *aggregates: Any) -> tuple:
+    return tuple(
+        db.execute(select(func.count(model.id), func.max(model.id), *aggregates).where(model.dtl_id == dtl_id)).one()
+    )
+
+
+def _tests_version(db: Session, dtl_id: int) -> tuple:
+    # Any edit raises the sum of row versions; an insert or delete changes the count or max id.
+    test = models.DTLTest
+    return _collection_version(db, test, dtl_id, func.max(test.updated_at), func.sum(test.row_version))
+
+
+def _comments_version(db: Session, dtl_id: int) -> tuple:
+    # Comments are never edited, only added.
+    return _collection_version(db, models.DTLComment, dtl_id, func.max(models.DTLComment.created_at))
+
+
+def tests_version(db: Session, dtlib_id: int, dtl_id: int) -> tuple:
+    dtl_version(db, dtlib_id, dtl_id)
+    return _tests_version(db, dtl_id)
+
+
+def comments_version(db: Session, dtlib_id: int, dtl_id: int) -> tuple:
+    dtl_version(db, dtlib_id, dtl_id)
+    return _comments_version(db, dtl_id)
+
+
+def bundle_version(db: Session, dtlib_id: int, dtl_id: int) -> tuple:
+    artifacts = (
+        models.DTLOntology,
+        models.DTLInterface,
+        models.DTLConfiguration,
+        models.DTLLogic,
+        models.DTLReview,
+    )
+    statement = select(
+        models.DTL.updated_at,
+        models.DTL.row_version,
+        *(column for artifact in artifacts for column in (artifact.updated_at, artifact.row_version)),
+    ).select_from(models.DTL)
+    for artifact in artifacts:
+        statement = statement.outerjoin(artifact, artifact.dtl_id == models.DTL.id)
+    row = _one_or_404(db, _live_dtl(statement, dtlib_id, dtl_id), "DTL not found")
+    return (
+        *row,
+        *_tests_version(db, dtl_id),
+        *_comments_version(db, dtl_id),
+    )
+
+
+def overview_version(db: Session, dtlib_id: int) -> tuple:
+    dtlib = dtlib_version(db, dtlib_id)
+    dtls = db.execute(
+        select(
+            func.count(models.DTL.id),
+            func.max(models.DTL.id),
+            func.max(models.DTL.updated_at),
+            func.sum(models.DTL.row_version),
+            func.max(models.DTLInterface.updated_at),
+            func.sum(models.DTLInterface.row_version),
+        )
+        .select_from(models.DTL)
+        .outerjoin(models.DTLInterface, models.DTLInterface.dtl_id == models.DTL.id)
+        .where(models.DTL.dtlib_id == dtlib_id, models.DTL.deleted_at.is_(None))
+    ).one()
+    source = models.DTLGraphSource
+    graphs = db.execute(
+        select(func.count(), func.max(source.updated_at), func.sum(source.row_version)).where(
+            source.dtlib_id == dtlib_id
+        )
+    ).one()
+    return (*dtlib, *dtls, *graphs)
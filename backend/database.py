@@ -1,8 +1,13 @@
 from __future__ import annotations
 
+import itertools
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
 DEFAULT_DB_HOST = os.getenv("SQL_DB_HOST", "db")
 DEFAULT_DB_USER = os.getenv("SQL_DB_USER", "dtl")
@@ -28,18 +33,82 @@ def build_database_url() -> str:
 
 
 DATABASE_URL = build_database_url()
+# Optional read replicas (comma-separated URLs); GET requests are served from them while they keep up.
+REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# After a write, the client reads from the primary for this long (read-your-writes).
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+READ_PRIMARY_COOKIE = "dtl_read_primary"
+READ_PRIMARY_HEADER = "X-Read-Primary"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _create_engine(url: str) -> Engine:
+    created = create_engine(
+        url,
+        future=True,
+        pool_pre_ping=True,
+        connect_args={"check_same_thread": False} if url.startswith("sqlite") else {},
+    )
+    if url.startswith("sqlite"):
+
+        @event.listens_for(created, "connect")
+        def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+            # SQLite ignores ON DELETE CASCADE unless foreign keys are switched on per connection.
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+
+    return created
+
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in REPLICA_URLS]
+# Indices into ``replica_engines`` within the lag limit, replaced wholesale by ``replicas.check``.
+# Empty until the first check, so an unverified replica never serves reads.
+healthy_replicas: list[int] = []
+_rotation = itertools.count()
 
-engine = create_engine(
-    DATABASE_URL,
-    future=True,
-    pool_pre_ping=True,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
-)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+ReplicaSession = sessionmaker(autoflush=False, autocommit=False, future=True, info={"replica": True})
 Base = declarative_base()
 
 
-def get_db():
+@event.listens_for(Session, "before_flush")
+def _refuse_replica_writes(session: Session, flush_context: Any, instances: Any) -> None:
+    if session.info.get("replica"):
+        raise RuntimeError("Replica sessions are read-only; handlers that write on GET must use get_primary_db")
+
+
+def reads_primary(request: Request) -> bool:
+    """Writes, and reads shortly after a write by the same client, go to the primary."""
+
+    return (
+        request.method not in READ_METHODS
+        or READ_PRIMARY_COOKIE in request.cookies
+        or READ_PRIMARY_HEADER in request.headers
+    )
+
+
+def replica_session() -> Session | None:
+    """A session on the next healthy replica (round robin), or ``None`` if none is."""
+
+    healthy = healthy_replicas
+    if not healthy:
+        return None
+    return ReplicaSession(bind=replica_engines[healthy[next(_rotation) % len(healthy)]])
+
+
+def get_db(request: Request):
+    db = None if reads_primary(request) else replica_session()
+    if db is None:
+        db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_primary_db():
     db = SessionLocal()
     try:
         yield db
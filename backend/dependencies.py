@@ -3,20 +3,20 @@ from __future__ import annotations
 from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from .database import get_db
+from .database import SessionLocal, get_db
 from . import models
 
 
 def get_dtlib_or_404(db: Session, dtlib_id: int) -> models.DTLIB:
     dtlib = db.get(models.DTLIB, dtlib_id)
-    if not dtlib:
+    if not dtlib or dtlib.deleted_at is not None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DTLIB not found")
     return dtlib
 
 
 def get_dtl_or_404(db: Session, dtlib_id: int, dtl_id: int) -> models.DTL:
     dtl = db.get(models.DTL, dtl_id)
-    if not dtl or dtl.dtlib_id != dtlib_id:
+    if not dtl or dtl.dtlib_id != dtlib_id or dtl.deleted_at is not None or dtl.dtlib.deleted_at is not None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DTL not found")
     return dtl
 
@@ -31,3 +31,17 @@ def resolve_dtl(
     db: Session = Depends(get_db),
 ) -> models.DTL:
     return get_dtl_or_404(db, dtlib_id, dtl_id)
+
+
+def target_exists(dtlib_id: int, dtl_id: int | None = None) -> bool:
+    """Existence check for WebSocket routes, which must not keep a session open while connected."""
+
+    with SessionLocal() as db:
+        try:
+            if dtl_id is None:
+                get_dtlib_or_404(db, dtlib_id)
+            else:
+                get_dtl_or_404(db, dtlib_id, dtl_id)
+        except HTTPException:
+            return False
+    return True
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from itertools import chain
+from typing import Any, AsyncIterator, Callable, Protocol
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, event, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Unset: events reach the WebSockets of this process only. ``redis://...``: fan out across nodes.
+EVENTS_BROKER_URL = os.getenv("EVENTS_BROKER_URL")
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "dtl-events")
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# Entity name of each pushed model, as clients refresh it.
+ENTITIES: dict[type, str] = {
+    models.DTL: "dtl",
+    models.DTLOntology: "ontology",
+    models.DTLInterface: "interface",
+    models.DTLConfiguration: "configuration",
+    models.DTLLogic: "logic",
+    models.DTLTest: "tests",
+    models.DTLReview: "review",
+    models.DTLComment: "comments",
+}
+# Sent instead of the events a slow subscriber missed: refetch everything.
+RESYNC = {"entity": "resync"}
+_DIFF_TYPES = (String, Integer, Boolean, DateTime)
+
+
+def dtl_topic(dtl_id: int) -> str:
+    return f"dtl:{dtl_id}"
+
+
+def dtlib_topic(dtlib_id: int) -> str:
+    return f"dtlib:{dtlib_id}"
+
+
+def _json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, payload: dict[str, Any]) -> None:
+        """Runs on the subscriber's loop; a full queue collapses into one resync."""
+
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> dict[str, Any]:
+        if self.overflowed and self.queue.empty():
+            self.overflowed = False
+            return RESYNC
+        return await self.queue.get()
+
+
+class BrokerBackend(Protocol):
+    """Carries published events to the ``deliver`` callback of every node's broker."""
+
+    def start(self, deliver: Callable[[list[dict[str, Any]]], None]) -> None: ...
+
+    def publish(self, events: list[dict[str, Any]]) -> None: ...
+
+    def stop(self) -> None: ...
+
+
+class LocalBackend:
+    """Single node: publishing delivers straight to this process."""
+
+    def start(self, deliver: Callable[[list[dict[str, Any]]], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, events: list[dict[str, Any]]) -> None:
+        self._deliver(events)
+
+    def stop(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """Several nodes: events go through a Redis pub/sub channel, including back to the publishing node."""
+
+    def __init__(self, url: str, channel: str = EVENTS_CHANNEL) -> None:
+        import redis  # optional dependency, only needed for multi-node deployments
+
+        self._client = redis.Redis.from_url(url)
+        self._channel = channel
+        self._pubsub = None
+        self._thread: threading.Thread | None = None
+
+    def start(self, deliver: Callable[[list[dict[str, Any]]], None]) -> None:
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self._channel: lambda message: deliver(json.loads(message["data"]))})
+        self._thread = self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, events: list[dict[str, Any]]) -> None:
+        self._client.publish(self._channel, json.dumps(events))
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+
+class Broker:
+    """Fans change events out to the WebSocket subscribers of each DTL and library topic."""
+
+    def __init__(self, backend: BrokerBackend | None = None) -> None:
+        self._subscribers: dict[str, set[Subscriber]] = {}
+        self._lock = threading.Lock()
+        self.backend: BrokerBackend = backend or LocalBackend()
+        self.backend.start(self.deliver)
+
+    def use(self, backend: BrokerBackend) -> None:
+        self.backend.stop()
+        self.backend = backend
+        backend.start(self.deliver)
+
+    def publish(self, events: list[dict[str, Any]]) -> None:
+        if not events:
+            return
+        try:
+            self.backend.publish(events)
+        except Exception:
+            # Pushes are a convenience; clients still see the change on their next fetch.
+            logger.exception("Publishing %d change events failed", len(events))
+
+    def deliver(self, events: list[dict[str, Any]]) -> None:
+        """Hand events to local subscribers; safe to call from any thread."""
+
+        with self._lock:
+            targets = [
+                (subscriber, payload)
+                for payload in events
+                for topic in (dtl_topic(payload["dtl_id"]), dtlib_topic(payload["dtlib_id"]))
+                for subscriber in self._subscribers.get(topic, ())
+            ]
+        for subscriber, payload in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, payload)
+            except RuntimeError:  # loop closed; the subscription is being torn down
+                pass
+
+    @asynccontextmanager
+    async def subscription(self, topic: str) -> AsyncIterator[Subscriber]:
+        subscriber = Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(topic, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+
+broker = Broker()
+
+
+def configure() -> None:
+    """Switch to the multi-node backend when ``EVENTS_BROKER_URL`` is set; runs in the lifespan."""
+
+    if EVENTS_BROKER_URL:
+        broker.use(RedisBackend(EVENTS_BROKER_URL))
+
+
+async def stream(websocket: WebSocket, topic: str) -> None:
+    """Push the events of ``topic`` to ``websocket`` as JSON until the client disconnects."""
+
+    await websocket.accept()
+    async with broker.subscription(topic) as subscriber:
+        # Nothing is expected from the client; reading only notices the disconnect.
+        closed = asyncio.create_task(_until_disconnect(websocket))
+        try:
+            while True:
+                next_event = asyncio.create_task(subscriber.get())
+                done, _ = await asyncio.wait({next_event, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if closed in done:
+                    next_event.cancel()
+                    return
+                await websocket.send_json(next_event.result())
+        except WebSocketDisconnect:
+            return
+        finally:
+            closed.cancel()
+
+
+async def _until_disconnect(websocket: WebSocket) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+
+def _loaded(obj: Any, attribute: str) -> Any:
+    value = inspect(obj).attrs[attribute].loaded_value
+    return None if value is NO_VALUE else value
+
+
+def _changes(obj: Any) -> tuple[list[str], dict[str, Any]]:
+    """Changed column names, and the new values of the short scalar ones."""
+
+    state = inspect(obj)
+    fields: list[str] = []
+    diff: dict[str, Any] = {}
+    for column in state.mapper.column_attrs:
+        history = state.attrs[column.key].history
+        if not history.has_changes():
+            continue
+        fields.append(column.key)
+        column_type = column.columns[0].type
+        if isinstance(column_type, _DIFF_TYPES) and not isinstance(column_type, Text):
+            diff[column.key] = _json_value(getattr(obj, column.key))
+    return fields, diff
+
+
+def _event(obj: Any, action: str) -> dict[str, Any]:
+    entity = ENTITIES[type(obj)]
+    dtl_id = obj.id if entity == "dtl" else obj.dtl_id
+    payload: dict[str, Any] = {
+        "entity": entity,
+        "action": action,
+        "dtl_id": dtl_id,
+        "dtlib_id": obj.dtlib_id if entity == "dtl" else None,
+        "id": obj.id if hasattr(obj, "id") else dtl_id,
+        "version": _json_value(getattr(obj, "updated_at", None) or getattr(obj, "created_at", None)),
+    }
+    if action == "updated":
+        payload["fields"], payload["diff"] = _changes(obj)
+        if entity == "dtl" and obj.deleted_at is not None:
+            payload["action"] = "deleted"
+    if payload["dtlib_id"] is None:
+        dtl = _loaded(obj, "dtl")
+        payload["dtlib_id"] = dtl.dtlib_id if dtl is not None else None
+    return payload
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session: Session, flush_context: Any) -> None:
+    pending = []
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if type(obj) not in ENTITIES:
+            continue
+        if obj in session.new:
+            action = "created"
+        elif obj in session.deleted:
+            action = "deleted"
+        elif session.is_modified(obj, include_collections=False):
+            action = "updated"
+        else:
+            continue
+        payload = _event(obj, action)
+        if action == "updated" and not payload["fields"]:
+            continue  # only a relationship changed; the related row has its own event
+        pending.append(payload)
+    if not pending:
+        return
+    missing = {payload["dtl_id"] for payload in pending if payload["dtlib_id"] is None}
+    if missing:
+        owners = dict(
+            session.connection()
+            .execute(select(models.DTL.id, models.DTL.dtlib_id).where(models.DTL.id.in_(missing)))
+            .all()
+        )
+        for payload in pending:
+            if payload["dtlib_id"] is None:
+                payload["dtlib_id"] = owners.get(payload["dtl_id"])
+    session.info.setdefault("pending_events", []).extend(
+        payload for payload in pending if payload["dtlib_id"] is not None
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session: Session) -> None:
+    broker.publish(session.info.pop("pending_events", []))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session: Session) -> None:
+    session.info.pop("pending_events", None)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Literal
+
+from sqlalchemy.orm import Session
+
+from . import models, owl_validation, schemas, similarity
+from .database import SessionLocal
+from .llm import llm_service
+from .prompts import prompt_builder
+
+ReuseMode = Literal["none", "copy", "seed"]
+
+
+def _references(source: models.DTL, score: float) -> dict[str, Any]:
+    """Artifacts of ``source`` shaped like the structured LLM response for each artifact."""
+
+    described = similarity.describe(source, score, with_artifacts=True)
+    references = {
+        name: described[name] for name in ("ontology", "interface", "configuration", "logic") if described[name]
+    }
+    if "logic" in references:
+        code = references["logic"]["code"]
+        if code.startswith("# LLM Hint:"):
+            references["logic"] = {**references["logic"], "code": code.partition("\n")[2]}
+    if described["tests"]:
+        references["tests"] = {
+            "tests": [
+                {key: test[key] for key in ("name", "input", "expected_output", "description")}
+                for test in described["tests"]
+            ]
+        }
+    return references
+
+
+def generate_all(
+    db: Session,
+    dtl: models.DTL,
+    *,
+    mode: ReuseMode = "none",
+    source: tuple[models.DTL, float] | None = None,
+) -> dict[str, Any]:
+    """Generate every artifact of ``dtl`` with the LLM and commit.
+
+    With a ``source`` DTL and ``mode="copy"`` its approved artifacts are taken
+    over without an LLM call; with ``mode="seed"`` they are given to the LLM as
+    a starting point. Artifacts the source lacks are generated as usual.
+    Returns the fields of ``DTLGenerationResponse`` with ``tests`` as rows.
+    """
+
+    references = _references(*source) if source else {}
+
+    def generate(artifact: str, prompt: str) -> tuple[str, Any]:
+        if artifact in references and mode == "copy":
+            return f"Reused from DTL {source[0].id}", references[artifact]
+        if artifact in references:
+            prompt = prompt_builder.seeded(prompt, reference=json.dumps(references[artifact], ensure_ascii=False))
+        return llm_service.generate_structured(prompt)
+
+    ontology_prompt = prompt_builder.ontology(title=dtl.title, legal_text=dtl.legal_text[:2000])
+    ontology_raw, ontology_parsed = generate("ontology", ontology_prompt)
+    ontology_owl = (
+        ontology_parsed.get("ontology_owl")
+        if isinstance(ontology_parsed, dict) and ontology_parsed.get("ontology_owl")
+        else ontology_raw
+    )
+
+    interface_prompt = prompt_builder.interface(title=dtl.title, legal_text=dtl.legal_text[:1500])
+    interface_raw, interface_parsed = generate("interface", interface_prompt)
+    interface_defaults = {
+        "function_name": dtl.title,
+        "inputs": [],
+        "outputs": [],
+        "mcp_spec": {"hint": interface_raw},
+    }
+    interface_data = interface_defaults | (
+        {k: v for k, v in interface_parsed.items() if k in interface_defaults}
+        if isinstance(interface_parsed, dict)
+        else {}
+    )
+    interface_json = {
+        "function_name": interface_data.get("function_name") or dtl.title,
+        "inputs": interface_data.get("inputs") or [{"name": "input", "description": interface_raw[:200]}],
+        "outputs": interface_data.get("outputs") or [{"name": "result", "description": interface_raw[:200]}],
+    }
+    mcp_spec = interface_data.get("mcp_spec")
+
+    configuration_prompt = prompt_builder.configuration(title=dtl.title, legal_text=dtl.legal_text[:1500])
+    configuration_raw, configuration_parsed = generate("configuration", configuration_prompt)
+    configuration_owl = (
+        configuration_parsed.get("configuration_owl")
+        if isinstance(configuration_parsed, dict) and configuration_parsed.get("configuration_owl")
+        else configuration_raw
+    )
+
+    tests_prompt = prompt_builder.tests(title=dtl.title, legal_text=dtl.legal_text[:1500])
+    tests_raw, tests_parsed = generate("tests", tests_prompt)
+
+    for test in list(dtl.tests):
+        db.delete(test)
+
+    generated_tests: list[models.DTLTest] = []
+    if isinstance(tests_parsed, dict) and isinstance(tests_parsed.get("tests"), list):
+        for index, proposed in enumerate(tests_parsed["tests"]):
+            test = models.DTLTest(
+                dtl_id=dtl.id,
+                name=proposed.get("name") or f"LLM Test {index + 1}",
+                input_json=proposed.get("input") or {"hint": tests_raw[:80]},
+                expected_output_json=proposed.get("expected_output") or {"expected": tests_raw[:80]},
+                description=proposed.get("description") or tests_raw[:255],
+            )
+            db.add(test)
+            generated_tests.append(test)
+
+    if not generated_tests:
+        fallback = models.DTLTest(
+            dtl_id=dtl.id,
+            name="LLM Proposed Test",
+            input_json={"prompt": tests_raw[:120]},
+            expected_output_json={"expected": tests_raw[:120]},
+            description=tests_raw[:255],
+        )
+        db.add(fallback)
+        generated_tests.append(fallback)
+
+    logic_prompt = prompt_builder.logic(title=dtl.title, legal_text=dtl.legal_text[:1200])
+    logic_raw, logic_parsed = generate("logic", logic_prompt)
+    logic_language = "Python"
+    logic_code = logic_raw
+    if isinstance(logic_parsed, dict):
+        logic_language = logic_parsed.get("language") or logic_language
+        if logic_parsed.get("code"):
+            logic_code = logic_parsed["code"]
+    logic_payload = schemas.LogicPayload(
+        language=logic_language, code=f"# LLM Hint: {logic_raw[:200]}\n{logic_code}"
+    )
+
+    if dtl.ontology:
+        dtl.ontology.ontology_owl = ontology_owl
+    else:
+        dtl.ontology = models.DTLOntology(
+            ontology_owl=ontology_owl)
+
+    if dtl.interface:
+        dtl.interface.interface_json = interface_json
+        dtl.interface.mcp_spec = mcp_spec
+    else:
+        dtl.interface = models.DTLInterface(interface_json=interface_json, mcp_spec=mcp_spec)
+
+    if dtl.configuration:
+        dtl.configuration.configuration_owl = configuration_owl
+    else:
+        dtl.configuration = models.DTLConfiguration(configuration_owl=configuration_owl)
+
+    if dtl.logic:
+        dtl.logic.language = logic_payload.language
+        dtl.logic.code = logic_payload.code
+    else:
+        dtl.logic = models.DTLLogic(language=logic_payload.language, code=logic_payload.code)
+
+    db.add(dtl)
+    db.commit()
+    for test in generated_tests:
+        db.refresh(test)
+
+    return dict(
+        ontology=schemas.OntologyPayload(
+            ontology_owl=ontology_owl, raw_response=ontology_raw
+        ),
+        ontology_raw=ontology_raw,
+        interface=schemas.InterfacePayload(
+            function_name=interface_json["function_name"],
+            inputs=interface_json.get("inputs", []),
+            outputs=interface_json.get("outputs", []),
+            mcp_spec=mcp_spec,
+        ),
+        interface_raw=interface_raw,
+        configuration=schemas.ConfigurationPayload(configuration_owl=configuration_owl),
+        configuration_raw=configuration_raw,
+        tests=generated_tests,
+        tests_raw=tests_raw,
+        logic=logic_payload,
+        logic_raw=logic_raw,
+        reused_from=schemas.ReuseSource(dtl_id=source[0].id, similarity=source[1], mode=mode) if source else None,
+    )
+
+
+def regenerate(dtl_id: int, source_id: int | None = None) -> None:
+    """Background task: regenerate a DTL seeded from ``source_id`` and validate its OWL."""
+
+    db = SessionLocal()
+    try:
+        dtl = db.get(models.DTL, dtl_id)
+        if dtl is None:
+            return
+        source = db.get(models.DTL, source_id) if source_id is not None else None
+        try:
+            generate_all(db, dtl, mode="seed", source=(source, 1.0) if source else None)
+        except Exception:
+            db.rollback()
+            dtl.status = "Regeneration failed"
+            db.commit()
+            raise
+        if dtl.status == "Regenerating":
+            dtl.status = "Draft"
+            db.commit()
+    finally:
+        db.close()
+    for graph in ("ontology", "configuration"):
+        owl_validation.validate_artifact(dtl_id, graph)
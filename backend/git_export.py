@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import re
+import shutil
+import subprocess
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import models
+from .database import SessionLocal
+from .hashing import hash_text
+
+EXPORT_ROOT = Path(os.getenv("GIT_EXPORT_ROOT", "/tmp/dtl-git-export"))
+GIT_AUTHOR_NAME = os.getenv("GIT_AUTHOR_NAME", "DTL Pipeline")
+GIT_AUTHOR_EMAIL = os.getenv("GIT_AUTHOR_EMAIL", "dtl-pipeline@localhost")
+GIT_TIMEOUT_SECONDS = int(os.getenv("GIT_TIMEOUT_SECONDS", "300"))
+RENDER_BATCH_SIZE = 100
+
+# Bump when the file layout changes so every DTL is re-rendered once.
+LAYOUT_VERSION = "1"
+
+_LOGIC_EXTENSIONS = {"python": "py", "javascript": "js", "typescript": "ts", "java": "java"}
+
+
+class GitExportError(RuntimeError):
+    pass
+
+
+def git_available() -> bool:
+    return shutil.which("git") is not None
+
+
+@contextmanager
+def library_lock(dtlib_id: int) -> Iterator[None]:
+    """Hold an exclusive lock on the library's working tree, shared by every worker process on this host."""
+
+    EXPORT_ROOT.mkdir(parents=True, exist_ok=True)
+    with open(EXPORT_ROOT / f"dtlib-{dtlib_id}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _git(worktree: Path, *args: str, input: str | None = None, check: bool = True) -> str:
+    env = {
+        **os.environ,
+        "GIT_AUTHOR_NAME": GIT_AUTHOR_NAME,
+        "GIT_AUTHOR_EMAIL": GIT_AUTHOR_EMAIL,
+        "GIT_COMMITTER_NAME": GIT_AUTHOR_NAME,
+        "GIT_COMMITTER_EMAIL": GIT_AUTHOR_EMAIL,
+        "GIT_TERMINAL_PROMPT": "0",
+    }
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=worktree,
+            input=input,
+            capture_output=True,
+            text=True,
+            env=env,
+            timeout=GIT_TIMEOUT_SECONDS,
+        )
+    except FileNotFoundError as exc:
+        raise GitExportError("git is not installed on the server") from exc
+    if check and result.returncode != 0:
+        raise GitExportError(f"git {args[0]} failed: {result.stderr.strip() or result.stdout.strip()}")
+    return result.stdout.strip()
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")[:60] or "dtl"
+
+
+def _json(value: Any) -> str:
+    return json.dumps(value, indent=2, ensure_ascii=False, sort_keys=True, default=str) + "\n"
+
+
+def dtl_directory(dtl: models.DTL) -> str:
+    return f"dtls/{dtl.id:05d}-{_slug(dtl.title)}"
+
+
+def render_library(dtlib: models.DTLIB) -> dict[str, str]:
+    metadata = {
+        "id": dtlib.id,
+        "law_name": dtlib.law_name,
+        "law_identifier": dtlib.law_identifier,
+        "jurisdiction": dtlib.jurisdiction,
+        "version": dtlib.version,
+        "effective_date": dtlib.effective_date,
+        "status": dtlib.status,
+        "authoritative_source_url": dtlib.authoritative_source_url,
+    }
+    return {"library.json": _json(metadata), "full_text.txt": dtlib.full_text}
+
+
+def render_dtl(dtl: models.DTL) -> dict[str, str]:
+    """The files of one DTL, keyed by path relative to the repository root."""
+
+    base = dtl_directory(dtl)
+    metadata = {
+        "id": dtl.id,
+        "title": dtl.title,
+        "description": dtl.description,
+        "version": dtl.version,
+        "legal_reference": dtl.legal_reference,
+        "source_url": dtl.source_url,
+        "classification": dtl.classification,
+        "status": dtl.status,
+        "position": dtl.position,
+    }
+    files = {f"{base}/dtl.json": _json(metadata), f"{base}/legal_text.txt": dtl.legal_text}
+    if dtl.ontology:
+        files[f"{base}/ontology.owl"] = dtl.ontology.ontology_owl
+    if dtl.configuration:
+        files[f"{base}/configuration.owl"] = dtl.configuration.configuration_owl
+    if dtl.interface:
+        files[f"{base}/interface.json"] = _json({**dtl.interface.interface_json, "mcp_spec": dtl.interface.mcp_spec})
+    if dtl.logic:
+        extension = _LOGIC_EXTENSIONS.get(dtl.logic.language.lower(), "txt")
+        files[f"{base}/logic.{extension}"] = dtl.logic.code
+    if dtl.tests:
+        tests = [
+            {
+                "name": test.name,
+                "description": test.description,
+                "input": test.input_json,
+                "expected_output": test.expected_output_json,
+            }
+            for test in sorted(dtl.tests, key=lambda test: test.id)
+        ]
+        files[f"{base}/tests.json"] = _json(tests)
+    if dtl.review:
+        review = {
+            "status": dtl.review.status,
+            "approved_version": dtl.review.approved_version,
+            "approved_at": dtl.review.approved_at,
+        }
+        files[f"{base}/review.json"] = _json(review)
+    return files
+
+
+def source_versions(db: Session, dtlib_id: int) -> dict[int, str]:
+    """A digest of every DTL's version columns, from one aggregate query without loading any text."""
+
+    tests = (
+        select(
+            models.DTLTest.dtl_id,
+            func.count(models.DTLTest.id).label("count"),
+            func.max(models.DTLTest.id).label("max_id"),
+            func.max(models.DTLTest.updated_at).label("changed"),
+        )
+        .group_by(models.DTLTest.dtl_id)
+        .subquery()
+    )
+    artifacts = (
+        models.DTLOntology,
+        models.DTLInterface,
+        models.DTLConfiguration,
+        models.DTLLogic,
+        models.DTLReview,
+    )
+    statement = select(
+        models.DTL.id,
+        models.DTL.updated_at,
+        *(artifact.updated_at for artifact in artifacts),
+        tests.c.count,
+        tests.c.max_id,
+        tests.c.changed,
+    ).select_from(models.DTL)
+    for artifact in artifacts:
+        statement = statement.outerjoin(artifact, artifact.dtl_id == models.DTL.id)
+    statement = statement.outerjoin(tests, tests.c.dtl_id == models.DTL.id).where(models.DTL.dtlib_id == dtlib_id)
+    return {row[0]: hash_text("|".join([LAYOUT_VERSION, *map(str, row[1:])])) for row in db.execute(statement)}
+
+
+def _prepare_worktree(worktree: Path, repository_url: str, branch: str) -> str | None:
+    """Bring the persistent working tree to the remote branch head; return that commit (or ``None``)."""
+
+    worktree.mkdir(parents=True, exist_ok=True)
+    if not (worktree / ".git").exists():
+        _git(worktree, "init", "-q")
+        _git(worktree, "remote", "add", "origin", repository_url)
+    else:
+        _git(worktree, "remote", "set-url", "origin", repository_url)
+
+    if _git(worktree, "ls-remote", "--heads", "origin", branch):
+        _git(worktree, "fetch", "-q", "origin", f"+refs/heads/{branch}:refs/remotes/origin/{branch}")
+        _git(worktree, "checkout", "-q", "-B", branch, f"origin/{branch}")
+        _git(worktree, "reset", "-q", "--hard", f"origin/{branch}")
+        _git(worktree, "clean", "-qfd")  # leftovers of a failed run
+        return _git(worktree, "rev-parse", "HEAD")
+
+    if _git(worktree, "rev-parse", "--verify", "-q", "HEAD", check=False):
+        # The remote branch is gone; start over from an empty history.
+        _git(worktree, "checkout", "-q", "--orphan", f"dtl-export-{os.getpid()}")
+        _git(worktree, "rm", "-rq", "--cached", "--ignore-unmatch", ".")
+        _git(worktree, "clean", "-qfdx")
+        _git(worktree, "branch", "-q", "-D", branch, check=False)
+    _git(worktree, "symbolic-ref", "HEAD", f"refs/heads/{branch}")
+    return None
+
+
+def _write(worktree: Path, path: str, content: str) -> None:
+    target = worktree / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(content, encoding="utf-8")
+
+
+def _remove(worktree: Path, path: str) -> None:
+    target = worktree / path
+    target.unlink(missing_ok=True)
+    parent = target.parent
+    while parent != worktree and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def _batched(values: list[int], size: int) -> Iterable[list[int]]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def export_library(db: Session, event: models.GithubSyncEvent) -> None:
+    """Write changed DTLs into the working tree, commit and push; record the result on ``event``.
+
+    Only DTLs whose version digest moved since the last sync are loaded and
+    rendered, and only files whose content hash differs from the stored hash
+    are rewritten, so the cost of a sync follows the size of the edit, not of
+    the library. If the remote head is not the commit of the last sync (first
+    run, lost working tree, external push) the stored hashes are discarded and
+    everything is re-rendered once; git itself still ignores identical files.
+    """
+
+    dtlib = db.get(models.DTLIB, event.dtlib_id)
+    worktree = EXPORT_ROOT / f"dtlib-{dtlib.id}"
+    remote_head = _prepare_worktree(worktree, event.repository_url, event.branch)
+
+    last_commit = db.execute(
+        select(models.GithubSyncEvent.commit_id)
+        .where(
+            models.GithubSyncEvent.dtlib_id == dtlib.id,
+            models.GithubSyncEvent.status == "Completed",
+            models.GithubSyncEvent.branch == event.branch,
+            models.GithubSyncEvent.id != event.id,
+        )
+        .order_by(models.GithubSyncEvent.id.desc())
+        .limit(1)
+    ).scalar()
+    if remote_head is None or remote_head != last_commit:
+        db.execute(delete(models.DTLIBExportFile).where(models.DTLIBExportFile.dtlib_id == dtlib.id))
+        db.execute(delete(models.DTLExportState).where(models.DTLExportState.dtlib_id == dtlib.id))
+
+    stored_files: dict[str, models.DTLIBExportFile] = {
+        row.path: row
+        for row in db.scalars(select(models.DTLIBExportFile).where(models.DTLIBExportFile.dtlib_id == dtlib.id))
+    }
+    stored_states: dict[int, models.DTLExportState] = {
+        row.dtl_id: row
+        for row in db.scalars(select(models.DTLExportState).where(models.DTLExportState.dtlib_id == dtlib.id))
+    }
+    files_by_dtl: dict[int | None, set[str]] = defaultdict(set)
+    for path, row in stored_files.items():
+        files_by_dtl[row.dtl_id].add(path)
+
+    touched: list[str] = []
+
+    def sync_files(dtl_id: int | None, rendered: dict[str, str]) -> None:
+        for path, content in rendered.items():
+            content_hash = hash_text(content)
+            row = stored_files.get(path)
+            if row is not None and row.content_hash == content_hash and row.dtl_id == dtl_id:
+                continue
+            _write(worktree, path, content)
+            touched.append(path)
+            if row is None:
+                row = models.DTLIBExportFile(dtlib_id=dtlib.id, path=path)
+                db.add(row)
+                stored_files[path] = row
+            row.dtl_id = dtl_id
+            row.content_hash = content_hash
+        for path in files_by_dtl.get(dtl_id, set()) - rendered.keys():
+            _remove(worktree, path)
+            touched.append(path)
+            db.delete(stored_files.pop(path))
+
+    sync_files(None, render_library(dtlib))
+
+    versions = source_versions(db, dtlib.id)
+    changed = sorted(
+        dtl_id for dtl_id, version in versions.items()
+        if dtl_id not in stored_states or stored_states[dtl_id].source_version != version
+    )
+    for batch in _batched(changed, RENDER_BATCH_SIZE):
+        dtls = db.scalars(
+            select(models.DTL)
+            .options(
+                joinedload(models.DTL.ontology),
+                joinedload(models.DTL.interface),
+                joinedload(models.DTL.configuration),
+                joinedload(models.DTL.logic),
+                joinedload(models.DTL.review),
+                selectinload(models.DTL.tests),
+            )
+            .where(models.DTL.id.in_(batch))
+        ).unique()
+        for dtl in dtls:
+            sync_files(dtl.id, render_dtl(dtl))
+            state = stored_states.get(dtl.id)
+            if state is None:
+                state = models.DTLExportState(dtl_id=dtl.id, dtlib_id=dtlib.id)
+                db.add(state)
+            state.source_version = versions[dtl.id]
+            db.expunge(dtl)
+
+    removed = sorted(stored_states.keys() - versions.keys())
+    for dtl_id in removed:
+        sync_files(dtl_id, {})
+        db.delete(stored_states[dtl_id])
+
+    if touched:
+        _git(worktree, "add", "-A", "--pathspec-from-file=-", input="\n".join(sorted(set(touched))) + "\n")
+    if not _git(worktree, "diff", "--cached", "--name-only"):
+        event.commit_id = remote_head
+        event.message = "No changes"
+    else:
+        message = f"Sync {dtlib.law_identifier}: {len(changed)} DTLs updated, {len(removed)} removed"
+        _git(worktree, "commit", "-q", "-m", message)
+        _git(worktree, "push", "-q", "origin", f"HEAD:refs/heads/{event.branch}")
+        event.commit_id = _git(worktree, "rev-parse", "HEAD")
+        event.message = message
+    event.status = "Completed"
+    event.completed_at = datetime.utcnow()
+
+
+def run_sync(event_id: int) -> None:
+    """Background task: run one sync event to completion in a fresh session."""
+
+    db = SessionLocal()
+    try:
+        event = db.get(models.GithubSyncEvent, event_id)
+        with library_lock(event.dtlib_id):
+            event.status = "Running"
+            db.commit()
+            try:
+                export_library(db, event)
+                db.commit()
+            except Exception as exc:
+                db.rollback()
+                event = db.get(models.GithubSyncEvent, event_id)
+                event.status = "Failed"
+                event.message = str(exc)[:2000]
+                event.completed_at = datetime.utcnow()
+                db.commit()
+    finally:
+        db.close()
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+
+def hash_text(value: str | None) -> str:
+    """Return the hex SHA-256 digest of a text value (``None`` hashes as empty)."""
+
+    return hashlib.sha256((value or "").encode("utf-8")).hexdigest()
+
+
+def hash_json(value: Any) -> str:
+    """Return a digest of a JSON value that is stable across key ordering."""
+
+    canonical = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hash_text(canonical)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy.orm.base import NO_VALUE
+
+from . import models
+from .alignment import locate
+
+SPAN_MODELS = (models.DTL, models.SegmentationSuggestion)
+
+
+def set_span(span: models.LegalTextSpan, start: int, end: int) -> None:
+    span.legal_text_start, span.legal_text_end = start, end
+    span.legal_text_stored = None
+
+
+def assign(span: models.LegalTextSpan, full_text: str) -> bool:
+    """Replace the stored excerpt of ``span`` with offsets if it occurs in ``full_text``."""
+
+    located = locate(full_text, span.legal_text_stored)
+    if located is None:
+        return False
+    set_span(span, *located)
+    return True
+
+
+def _common_affixes(old: str, new: str) -> tuple[int, int]:
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+
+def rebase(session: Session, dtlib_id: int, old: str, new: str) -> None:
+    """Move every span of the library from ``old`` to ``new`` full text.
+
+    Spans before the edited region keep their offsets, spans after it shift by
+    the length delta, and only spans overlapping the edit are searched for;
+    those whose excerpt no longer occurs fall back to stored text.
+    """
+
+    prefix, suffix = _common_affixes(old, new)
+    old_tail = len(old) - suffix
+    delta = len(new) - len(old)
+    for model in SPAN_MODELS:
+        spans = session.scalars(
+            select(model)
+            .options(load_only(model.legal_text_start, model.legal_text_end, model.legal_text_stored))
+            .where(model.dtlib_id == dtlib_id, model.legal_text_start.is_not(None))
+        )
+        for span in spans:
+            start, end = span.legal_text_start, span.legal_text_end
+            if start is None or end <= prefix:  # converted to stored text in this session
+                continue
+            if start >= old_tail:
+                span.legal_text_start, span.legal_text_end = start + delta, end + delta
+                continue
+            excerpt = old[start:end]
+            located = locate(new, excerpt, hint=start)
+            if located is None:
+                span.legal_text = excerpt
+            else:
+                span.legal_text_start, span.legal_text_end = located
+
+
+def _previous_full_text(session: Session, dtlib: models.DTLIB) -> str:
+    history = inspect(dtlib).attrs.full_text.history
+    if history.deleted:
+        return history.deleted[0]
+    return session.execute(select(models.DTLIB.full_text).where(models.DTLIB.id == dtlib.id)).scalar_one()
+
+
+def _full_text(session: Session, span: models.LegalTextSpan, cache: dict[int, str]) -> str | None:
+    dtlib = inspect(span).attrs.dtlib.loaded_value
+    if dtlib is not NO_VALUE and dtlib is not None:
+        return dtlib.full_text
+    if span.dtlib_id is None:
+        return None
+    if span.dtlib_id not in cache:
+        cache[span.dtlib_id] = session.get(models.DTLIB, span.dtlib_id).full_text
+    return cache[span.dtlib_id]
+
+
+@event.listens_for(Session, "before_flush")
+def _maintain_spans(session: Session, flush_context: Any, instances: Any) -> None:
+    for obj in list(session.dirty):
+        if isinstance(obj, models.DTLIB) and inspect(obj).attrs.full_text.history.has_changes():
+            rebase(session, obj.id, _previous_full_text(session, obj), obj.full_text)
+
+    cache: dict[int, str] = {}
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, SPAN_MODELS) and obj.legal_text_stored is not None:
+            full_text = _full_text(session, obj, cache)
+            if full_text is not None:
+                assign(obj, full_text)
+
+
+def covering(db: Session, model: type, dtlib_id: int, start: int, end: int) -> list[Any]:
+    """Rows of ``model`` whose span intersects ``[start, end)``; an empty range matches the point ``start``.
+
+    Deleted rows awaiting purge are skipped.
+    """
+
+    query = db.query(model).filter(
+        model.dtlib_id == dtlib_id,
+        model.legal_text_start < max(end, start + 1),
+        model.legal_text_end > start,
+    )
+    if hasattr(model, "deleted_at"):
+        query = query.filter(model.deleted_at.is_(None))
+    return query.order_by(model.legal_text_start, model.id).all()
@@ -2,12 +2,20 @@ import json
 import logging
 import os
 import re
-from typing import Any, Optional, Tuple
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Optional, Tuple
 
-from openai import AzureOpenAI
+if TYPE_CHECKING:
+    from openai import AzureOpenAI
+
+from . import llm_logging, tracing
+from .hashing import hash_text
 
 logger = logging.getLogger(__name__)
 
+_UNSET = object()
+
 
 class LLMService:
     def __init__(self) -> None:
@@ -15,30 +23,54 @@ class LLMService:
         self.api_key = os.getenv("AZURE_OPENAI_API_KEY")
         self.deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
         self.temperature = self._get_temperature()
-        self.debug_mode = os.getenv("LLM_DEBUG_MODE", "true").lower() in {"1", "true", "yes", "on"}
-        self.client: Optional[AzureOpenAI] = None
-        if self.endpoint and self.api_key:
-            try:
-                self.client = AzureOpenAI(
-                    azure_endpoint=self.endpoint,
-                    api_key=self.api_key,
-                    api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
-                )
-            except Exception as exc:
-                logger.warning("Failed to initialize AzureOpenAI client: %s", exc)
-                self.client = None
+        self._client: Any = _UNSET
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self) -> Optional["AzureOpenAI"]:
+        """The Azure client, built on first use; ``openai`` is slow to import and not needed to start the app."""
+
+        if self._client is _UNSET:
+            with self._client_lock:
+                if self._client is _UNSET:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> Optional["AzureOpenAI"]:
+        if not (self.endpoint and self.api_key):
+            return None
+        try:
+            from openai import AzureOpenAI
+
+            return AzureOpenAI(
+                azure_endpoint=self.endpoint,
+                api_key=self.api_key,
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview"),
+            )
+        except Exception as exc:
+            logger.warning("Failed to initialize AzureOpenAI client: %s", exc)
+            return None
 
     def generate_text(self, prompt: str) -> str:
-        if self.debug_mode:
-            logger.error("LLM prompt (debug): %s", prompt)
+        started = time.perf_counter()
+        with tracing.span("llm.generate", tracing.CLIENT, **{"llm.deployment": self.deployment or ""}) as llm_span:
+            outcome, response = self._complete(prompt)
+        if llm_span is not None:
+            llm_span.attributes.update(
+                {"llm.outcome": outcome, "llm.prompt_chars": len(prompt), "llm.response_chars": len(response)}
+            )
+        llm_logging.record_call(
+            prompt, response, outcome=outcome, deployment=self.deployment, seconds=time.perf_counter() - started
+        )
+        return response
+
+    def _complete(self, prompt: str) -> Tuple[str, str]:
+        """The response text and how it came about: ``ok``, ``empty``, ``stubbed`` or ``error``."""
 
         if not self.client or not self.deployment:
             reason = "missing AzureOpenAI client" if not self.client else "missing deployment name"
             logger.warning("No LLM response available: %s.", reason)
-            stubbed = f"[stubbed LLM response for prompt: {prompt[:120]}...]"
-            if self.debug_mode:
-                logger.error("LLM response (debug): %s", stubbed)
-            return stubbed
+            return "stubbed", f"[stubbed LLM response for prompt: {prompt[:120]}...]"
         try:
 
             completion_params = {
@@ -53,25 +85,20 @@ class LLMService:
 
             if not response:
                 logger.warning("No LLM response available: empty response content.")
-
-            if self.debug_mode:
-                logger.error("LLM response (debug): %s", response)
-
-            return response
+                return "empty", response
+            return "ok", response
         except Exception as exc:
             logger.warning(
-                "LLM generation failed for deployment '%s' at '%s'. Prompt preview: %r. "
+                "LLM generation failed for deployment '%s' at '%s' (prompt sha256 %s, %d chars). "
                 "Returning stubbed response. Error: %s",
                 self.deployment,
                 self.endpoint,
-                prompt[:120],
+                hash_text(prompt)[: llm_logging.HASH_CHARS],
+                len(prompt),
                 exc,
                 exc_info=True,
             )
-            stubbed_error = f"[No LLM-Response] {prompt[:120]}..."
-            if self.debug_mode:
-                logger.error("LLM response (debug): %s", stubbed_error)
-            return stubbed_error
+            return "error", f"[No LLM-Response] {prompt[:120]}..."
 
     def generate_structured(self, prompt: str) -> Tuple[str, Any]:
         """Return the raw text and a best-effort JSON-decoded object."""
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import uuid
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
+
+from .hashing import hash_text
+
+# Fraction of calls whose full prompt and response go to the capture file; LLM_DEBUG_MODE captures all.
+CAPTURE_SAMPLE_RATE = (
+    1.0
+    if os.getenv("LLM_DEBUG_MODE", "false").lower() in {"1", "true", "yes", "on"}
+    else float(os.getenv("LLM_CAPTURE_SAMPLE_RATE", "0"))
+)
+CAPTURE_PATH = os.getenv("LLM_CAPTURE_PATH", "llm_capture.jsonl")
+CAPTURE_MAX_BYTES = int(os.getenv("LLM_CAPTURE_MAX_MB", "50")) * 1024 * 1024
+CAPTURE_BACKUPS = int(os.getenv("LLM_CAPTURE_BACKUPS", "5"))
+QUEUE_SIZE = 10000
+HASH_CHARS = 16
+
+# Callers only enqueue; hashing, formatting and file I/O happen on the listener thread.
+_calls = logging.getLogger("backend.llm.calls")
+_calls.propagate = False
+_summaries = logging.getLogger("backend.llm")
+_listener: QueueListener | None = None
+_lock = threading.Lock()
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records untouched (the listener formats them) and drops them when the queue is full."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _CallHandler(logging.Handler):
+    """Turns a call record into a one-line summary for the main log and, if sampled, a capture file entry."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._capture: RotatingFileHandler | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        call = record.llm_call
+        prompt, response = call.pop("prompt"), call.pop("response")
+        summary = {
+            **call,
+            "prompt_chars": len(prompt),
+            "prompt_sha256": hash_text(prompt)[:HASH_CHARS],
+            "response_chars": len(response),
+            "response_sha256": hash_text(response)[:HASH_CHARS],
+        }
+        _summaries.info("llm_call %s", json.dumps(summary), extra={"llm_call": summary})
+        if call["captured"]:
+            entry = json.dumps({**summary, "prompt": prompt, "response": response}, ensure_ascii=False)
+            self._capture_handler().emit(logging.makeLogRecord({"msg": entry}))
+
+    def _capture_handler(self) -> RotatingFileHandler:
+        if self._capture is None:
+            directory = os.path.dirname(CAPTURE_PATH)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._capture = RotatingFileHandler(
+                CAPTURE_PATH, maxBytes=CAPTURE_MAX_BYTES, backupCount=CAPTURE_BACKUPS, encoding="utf-8", delay=True
+            )
+        return self._capture
+
+    def close(self) -> None:
+        if self._capture is not None:
+            self._capture.close()
+        super().close()
+
+
+def _start() -> None:
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+        records: queue.Queue[logging.LogRecord] = queue.Queue(QUEUE_SIZE)
+        handler = _CallHandler()
+        _calls.addHandler(_NonBlockingQueueHandler(records))
+        _calls.setLevel(logging.INFO)
+        _listener = QueueListener(records, handler)
+        _listener.start()
+        atexit.register(stop)
+
+
+def stop() -> None:
+    """Drain the queue and close the capture file."""
+
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        for handler in list(_calls.handlers):
+            _calls.removeHandler(handler)
+        _listener = None
+
+
+def record_call(
+    prompt: str, response: str, *, outcome: str, deployment: str | None, seconds: float
+) -> dict[str, Any]:
+    """Log one LLM call without blocking: hashes, sizes and timing always, full bodies when sampled."""
+
+    if _listener is None:
+        _start()
+    call = {
+        "call_id": uuid.uuid4().hex[:12],
+        "deployment": deployment,
+        "outcome": outcome,
+        "duration_ms": round(seconds * 1000, 1),
+        "captured": CAPTURE_SAMPLE_RATE > 0 and random.random() < CAPTURE_SAMPLE_RATE,
+    }
+    _calls.info("llm_call", extra={"llm_call": {**call, "prompt": prompt, "response": response}})
+    return call
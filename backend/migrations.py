@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, inspect, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import AddConstraint, CreateColumn, CreateTable
+
+from .alignment import locate
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+# ``create_all`` creates missing tables but never alters existing ones. Each
+# migration brings a table created by an earlier release up to the models. The
+# steps inspect before they alter, so on a fresh database (already complete
+# after ``create_all``) they only get recorded as applied.
+MIGRATIONS: list[tuple[int, str, Callable[[Engine], None]]] = []
+_LOCK_NAME = "dtl_schema_migrations"
+_LOCK_TIMEOUT_SECONDS = 600
+
+_applied = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def migration(version: int, description: str) -> Callable[[Callable[[Engine], None]], Callable[[Engine], None]]:
+    def register(step: Callable[[Engine], None]) -> Callable[[Engine], None]:
+        MIGRATIONS.append((version, description, step))
+        return step
+
+    return register
+
+
+def _quote(bind: Engine, name: str) -> str:
+    return bind.dialect.identifier_preparer.quote(name)
+
+
+def add_columns(bind: Engine, table_name: str, *names: str) -> None:
+    """Add the model's columns ``names`` to ``table_name`` where they are missing."""
+
+    table = Base.metadata.tables[table_name]
+    existing = {column["name"] for column in inspect(bind).get_columns(table_name)}
+    missing = [table.c[name] for name in names if name not in existing]
+    if not missing:
+        return
+    with bind.begin() as connection:
+        for column in missing:
+            definition = CreateColumn(column).compile(dialect=bind.dialect)
+            connection.exec_driver_sql(f"ALTER TABLE {_quote(bind, table_name)} ADD COLUMN {definition}")
+            if bind.dialect.name == "sqlite":
+                continue  # SQLite cannot add constraints to an existing table
+            for constraint in table.foreign_key_constraints:
+                if constraint.column_keys == [column.key]:
+                    connection.execute(AddConstraint(constraint))
+
+
+def add_indexes(bind: Engine, table_name: str) -> None:
+    """Create the model's indexes on ``table_name`` that are missing."""
+
+    existing = {index["name"] for index in inspect(bind).get_indexes(table_name)}
+    with bind.begin() as connection:
+        for index in Base.metadata.tables[table_name].indexes:
+            if index.name not in existing:
+                index.create(connection)
+
+
+def drop_not_null(bind: Engine, table_name: str, column_name: str) -> None:
+    columns = {column["name"]: column for column in inspect(bind).get_columns(table_name)}
+    if columns[column_name]["nullable"]:
+        return
+    if bind.dialect.name == "sqlite":
+        rebuild_sqlite_table(bind, table_name)
+        return
+    column = Base.metadata.tables[table_name].c[column_name]
+    table, name = _quote(bind, table_name), _quote(bind, column_name)
+    if bind.dialect.name in ("mysql", "mariadb"):
+        statement = f"ALTER TABLE {table} MODIFY {name} {column.type.compile(dialect=bind.dialect)} NULL"
+    else:
+        statement = f"ALTER TABLE {table} ALTER COLUMN {name} DROP NOT NULL"
+    with bind.begin() as connection:
+        connection.exec_driver_sql(statement)
+
+
+def rebuild_sqlite_table(bind: Engine, table_name: str) -> None:
+    """Recreate ``table_name`` from its model and copy the rows over; SQLite cannot alter a column."""
+
+    table = Base.metadata.tables[table_name]
+    staging = _quote(bind, f"_migrating_{table_name}")
+    target = _quote(bind, table_name)
+    create = str(CreateTable(table).compile(dialect=bind.dialect)).strip()
+    create = create.replace(f"CREATE TABLE {target} ", f"CREATE TABLE {staging} ", 1)
+    existing = {column["name"] for column in inspect(bind).get_columns(table_name)}
+    copied = ", ".join(_quote(bind, column.name) for column in table.columns if column.name in existing)
+    with bind.connect() as connection:
+        # Only takes effect outside a transaction; otherwise dropping the table would cascade.
+        connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        connection.commit()
+        try:
+            with connection.begin():
+                connection.exec_driver_sql(create)
+                connection.exec_driver_sql(f"INSERT INTO {staging} ({copied}) SELECT {copied} FROM {target}")
+                connection.exec_driver_sql(f"DROP TABLE {target}")
+                connection.exec_driver_sql(f"ALTER TABLE {staging} RENAME TO {target}")
+                for index in table.indexes:
+                    index.create(connection)
+        finally:
+            connection.exec_driver_sql("PRAGMA foreign_keys=ON")
+            connection.commit()
+
+
+@migration(1, "dtl_test_runs: hashes of the logic and test case each run used")
+def _test_run_hashes(bind: Engine) -> None:
+    add_columns(bind, "dtl_test_runs", "logic_hash", "input_hash", "expected_output_hash")
+
+
+@migration(2, "dtl_test_runs: indexes for rollups and retention")
+def _test_run_indexes(bind: Engine) -> None:
+    add_indexes(bind, "dtl_test_runs")
+
+
+@migration(3, "dtl_ontology, dtl_configuration: OWL validation state")
+def _validation_state(bind: Engine) -> None:
+    for table_name in ("dtl_ontology", "dtl_configuration"):
+        add_columns(bind, table_name, "is_valid", "diagnostics", "validated_hash", "validated_at")
+
+
+@migration(4, "dtls, dtl_segmentation_suggestions: legal text span offsets")
+def _legal_text_spans(bind: Engine) -> None:
+    for table_name in ("dtls", "dtl_segmentation_suggestions"):
+        add_columns(bind, table_name, "legal_text_start", "legal_text_end")
+        add_indexes(bind, table_name)
+
+
+@migration(5, "dtl_segmentation_suggestions: excerpt alignment")
+def _alignment(bind: Engine) -> None:
+    add_columns(bind, "dtl_segmentation_suggestions", "alignment_method", "alignment_confidence")
+
+
+@migration(6, "dtls: amendment successor link")
+def _supersedes(bind: Engine) -> None:
+    add_columns(bind, "dtls", "supersedes_id")
+
+
+@migration(7, "dtlibs, dtls: deletion tombstones")
+def _tombstones(bind: Engine) -> None:
+    add_columns(bind, "dtlibs", "deleted_at")
+    add_columns(bind, "dtls", "deleted_at")
+
+
+@migration(8, "dtls, dtl_segmentation_suggestions: legal_text may be null once offsets are set")
+def _nullable_legal_text(bind: Engine) -> None:
+    for table_name in ("dtls", "dtl_segmentation_suggestions"):
+        drop_not_null(bind, table_name, "legal_text")
+
+
+@migration(9, "dtls, dtl_segmentation_suggestions: offsets for excerpts stored before spans existed")
+def _backfill_legal_text_spans(bind: Engine) -> None:
+    # Core statements on the span columns only: the models may have columns later migrations add.
+    dtlibs = Base.metadata.tables["dtlibs"]
+    for table_name in ("dtls", "dtl_segmentation_suggestions"):
+        table = Base.metadata.tables[table_name]
+        pending = table.c.legal_text_start.is_(None) & table.c.legal_text.is_not(None)
+        with bind.connect() as connection:
+            dtlib_ids = connection.execute(select(table.c.dtlib_id).where(pending).distinct()).scalars().all()
+        for dtlib_id in dtlib_ids:
+            with bind.begin() as connection:
+                full_text = connection.execute(
+                    select(dtlibs.c.full_text).where(dtlibs.c.id == dtlib_id)
+                ).scalar_one()
+                rows = connection.execute(
+                    select(table.c.id, table.c.legal_text).where(pending, table.c.dtlib_id == dtlib_id)
+                )
+                spans = [
+                    {"row_id": row_id, "start": located[0], "end": located[1]}
+                    for row_id, legal_text in rows
+                    if (located := locate(full_text, legal_text)) is not None
+                ]
+                if spans:
+                    connection.execute(
+                        update(table)
+                        .where(table.c.id == bindparam("row_id"))
+                        .values(legal_text=None, legal_text_start=bindparam("start"), legal_text_end=bindparam("end")),
+                        spans,
+                    )
+
+
+@migration(10, "dtls, artifacts, dtl_tests: row_version counters for optimistic concurrency")
+def _row_versions(bind: Engine) -> None:
+    for table_name in (
+        "dtls",
+        "dtl_ontology",
+        "dtl_interface",
+        "dtl_configuration",
+        "dtl_logic",
+        "dtl_reviews",
+        "dtl_tests",
+    ):
+        add_columns(bind, table_name, "row_version")
+
+
+@migration(11, "dtlibs, dtl_graph_sources: row_version counters for validators")
+def _more_row_versions(bind: Engine) -> None:
+    add_columns(bind, "dtlibs", "row_version")
+    add_columns(bind, "dtl_graph_sources", "row_version")
+
+
+@contextmanager
+def _exclusive(bind: Engine) -> Iterator[None]:
+    """Keep concurrently starting workers from migrating at the same time."""
+
+    if bind.dialect.name not in ("mysql", "mariadb"):
+        yield
+        return
+    with bind.connect() as connection:
+        connection.exec_driver_sql(f"SELECT GET_LOCK('{_LOCK_NAME}', {_LOCK_TIMEOUT_SECONDS})")
+        try:
+            yield
+        finally:
+            connection.exec_driver_sql(f"SELECT RELEASE_LOCK('{_LOCK_NAME}')")
+
+
+def upgrade(bind: Engine) -> list[int]:
+    """Apply the migrations not yet recorded in ``schema_migrations``; returns their versions."""
+
+    with _exclusive(bind):
+        _applied.create(bind, checkfirst=True)
+        with bind.connect() as connection:
+            done = set(connection.execute(select(_applied.c.version)).scalars())
+        applied = []
+        for version, description, step in sorted(MIGRATIONS, key=lambda entry: entry[0]):
+            if version in done:
+                continue
+            logger.info("Applying schema migration %d: %s", version, description)
+            step(bind)
+            with bind.begin() as connection:
+                connection.execute(
+                    insert(_applied).values(version=version, description=description, applied_at=datetime.utcnow())
+                )
+            applied.append(version)
+        return applied
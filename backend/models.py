@@ -1,12 +1,29 @@
 from __future__ import annotations
 
 from datetime import datetime, date
-from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, Float, String, Text, Date, DateTime, ForeignKey, JSON, Index
+from sqlalchemy import BigInteger, LargeBinary
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import declared_attr, relationship
 
 from .database import Base
 
 
+class RowVersion:
+    """Optimistic-concurrency counter for bundle saves and validators.
+
+    Every ORM UPDATE increments ``row_version`` and is conditional on the
+    value the session loaded, unlike second-precision ``updated_at``.
+    """
+
+    row_version = Column(Integer, nullable=False, server_default="1")
+
+    @declared_attr.directive
+    def __mapper_args__(cls) -> dict:
+        return {"version_id_col": cls.row_version}
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -18,7 +35,7 @@ class User(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-class DTLIB(Base):
+class DTLIB(RowVersion, Base):
     __tablename__ = "dtlibs"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -35,69 +52,172 @@ class DTLIB(Base):
     created_by = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set when deletion was requested; the rows are purged in the background (see ``purge``).
+    deleted_at = Column(DateTime, nullable=True)
+
+    dtls = relationship("DTL", back_populates="dtlib", cascade="all, delete-orphan", passive_deletes=True)
+    segmentation_suggestions = relationship(
+        "SegmentationSuggestion", back_populates="dtlib", cascade="all, delete-orphan", passive_deletes=True
+    )
+    overview_snapshot = relationship(
+        "DTLIBOverviewSnapshot", uselist=False, cascade="all, delete-orphan", passive_deletes=True
+    )
+    sync_events = relationship("GithubSyncEvent", cascade="all, delete-orphan", passive_deletes=True)
+    export_files = relationship("DTLIBExportFile", cascade="all, delete-orphan", passive_deletes=True)
+    export_states = relationship("DTLExportState", cascade="all, delete-orphan", passive_deletes=True)
+    amendments = relationship(
+        "DTLIBAmendment", cascade="all, delete-orphan", passive_deletes=True, order_by="DTLIBAmendment.id"
+    )
+
+
+class DTLIBAmendment(Base):
+    """A new version of a library's law text and how its DTLs were carried over (see ``amendments``)."""
 
-    dtls = relationship("DTL", back_populates="dtlib", cascade="all, delete-orphan")
+    __tablename__ = "dtlib_amendments"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False, index=True)
+    from_version = Column(String(64), nullable=False)
+    to_version = Column(String(64), nullable=False)
+    previous_full_text = Column(Text, nullable=False)
+    report = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class DTLIBOverviewSnapshot(Base):
+    __tablename__ = "dtlib_overview_snapshots"
+
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), primary_key=True)
+    entries = Column(JSON, nullable=False)
+    dtls_status = Column(JSON, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
-class DTL(Base):
+class LegalTextSpan:
+    """``legal_text`` stored as ``[legal_text_start, legal_text_end)`` into ``DTLIB.full_text``.
+
+    Assigning ``legal_text`` stores the text in ``legal_text_stored``; on flush
+    ``legal_spans`` replaces it with offsets when the text occurs verbatim in
+    the library's full text. Text that does not occur stays stored as is.
+    """
+
+    legal_text_stored = Column("legal_text", Text, nullable=True)
+    legal_text_start = Column(Integer, nullable=True)
+    legal_text_end = Column(Integer, nullable=True)
+
+    @hybrid_property
+    def legal_text(self) -> str:
+        if self.legal_text_start is None:
+            return self.legal_text_stored
+        return self.dtlib.full_text[self.legal_text_start : self.legal_text_end]
+
+    @legal_text.inplace.setter
+    def _legal_text_setter(self, value: str) -> None:
+        self.legal_text_stored = value
+        self.legal_text_start = None
+        self.legal_text_end = None
+
+    @legal_text.inplace.expression
+    @classmethod
+    def _legal_text_expression(cls):
+        full_text = select(DTLIB.full_text).where(DTLIB.id == cls.dtlib_id).scalar_subquery()
+        return case(
+            (
+                cls.legal_text_start.is_not(None),
+                func.substr(full_text, cls.legal_text_start + 1, cls.legal_text_end - cls.legal_text_start),
+            ),
+            else_=cls.legal_text_stored,
+        )
+
+
+class DTL(RowVersion, LegalTextSpan, Base):
     __tablename__ = "dtls"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dtlib_id = Column(Integer, ForeignKey("dtlibs.id"), nullable=False)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     version = Column(String(64), nullable=False)
-    legal_text = Column(Text, nullable=False)
     legal_reference = Column(Text, nullable=False)
     source_url = Column(Text, nullable=True)
     classification = Column(JSON, nullable=True)
     status = Column(String(32), default="Draft", nullable=False)
     position = Column(Integer, default=0, nullable=False)
+    supersedes_id = Column(Integer, ForeignKey("dtls.id", ondelete="SET NULL"), nullable=True)
+    deleted_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     dtlib = relationship("DTLIB", back_populates="dtls")
-    ontology = relationship("DTLOntology", uselist=False, back_populates="dtl", cascade="all, delete-orphan")
-    interface = relationship("DTLInterface", uselist=False, back_populates="dtl", cascade="all, delete-orphan")
-    configuration = relationship("DTLConfiguration", uselist=False, back_populates="dtl", cascade="all, delete-orphan")
-    logic = relationship("DTLLogic", uselist=False, back_populates="dtl", cascade="all, delete-orphan")
-    review = relationship("DTLReview", uselist=False, back_populates="dtl", cascade="all, delete-orphan")
-    tests = relationship("DTLTest", back_populates="dtl", cascade="all, delete-orphan")
-    comments = relationship("DTLComment", back_populates="dtl", cascade="all, delete-orphan")
-
-
-class SegmentationSuggestion(Base):
+    ontology = relationship(
+        "DTLOntology", uselist=False, back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True
+    )
+    interface = relationship(
+        "DTLInterface", uselist=False, back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True
+    )
+    configuration = relationship(
+        "DTLConfiguration", uselist=False, back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True
+    )
+    logic = relationship(
+        "DTLLogic", uselist=False, back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True
+    )
+    review = relationship(
+        "DTLReview", uselist=False, back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True
+    )
+    tests = relationship("DTLTest", back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True)
+    comments = relationship("DTLComment", back_populates="dtl", cascade="all, delete-orphan", passive_deletes=True)
+    run_rollups = relationship("DTLRunRollup", cascade="all, delete-orphan", passive_deletes=True)
+    benchmark_runs = relationship("DTLBenchmarkRun", cascade="all, delete-orphan", passive_deletes=True)
+    graph_sources = relationship("DTLGraphSource", cascade="all, delete-orphan", passive_deletes=True)
+    graph_triples = relationship("DTLGraphTriple", cascade="all, delete-orphan", passive_deletes=True)
+    terms = relationship("DTLTerm", cascade="all, delete-orphan", passive_deletes=True)
+    signature = relationship("DTLSignature", uselist=False, cascade="all, delete-orphan", passive_deletes=True)
+    signature_bands = relationship("DTLSignatureBand", cascade="all, delete-orphan", passive_deletes=True)
+
+    __table_args__ = (Index("ix_dtls_span", "dtlib_id", "legal_text_start"),)
+
+
+class SegmentationSuggestion(LegalTextSpan, Base):
     __tablename__ = "dtl_segmentation_suggestions"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dtlib_id = Column(Integer, ForeignKey("dtlibs.id"), nullable=False)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
     suggestion_title = Column(String(255), nullable=False)
     suggestion_description = Column(Text, nullable=True)
-    legal_text = Column(Text, nullable=False)
     legal_reference = Column(Text, nullable=False)
     created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     status = Column(String(32), default="Proposed", nullable=False)
+    alignment_method = Column(String(16), nullable=True)
+    alignment_confidence = Column(Float, nullable=True)
+
+    dtlib = relationship("DTLIB", back_populates="segmentation_suggestions")
+
+    __table_args__ = (Index("ix_dtl_segmentation_suggestions_span", "dtlib_id", "legal_text_start"),)
 
 
-class DTLOntology(Base):
+class DTLOntology(RowVersion, Base):
     __tablename__ = "dtl_ontology"
 
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
     ontology_owl = Column(Text, nullable=False)
     raw_response = Column(Text, nullable=True)
     generated_by = Column(String(191), nullable=True)
+    is_valid = Column(Boolean, nullable=True)
+    diagnostics = Column(JSON, nullable=True)
+    validated_hash = Column(String(64), nullable=True)
+    validated_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     dtl = relationship("DTL", back_populates="ontology")
 
 
-class DTLInterface(Base):
+class DTLInterface(RowVersion, Base):
     __tablename__ = "dtl_interface"
 
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
     interface_json = Column(JSON, nullable=False)
     mcp_spec = Column(JSON, nullable=True)
     generated_by = Column(String(191), nullable=True)
@@ -107,22 +227,98 @@ class DTLInterface(Base):
     dtl = relationship("DTL", back_populates="interface")
 
 
-class DTLConfiguration(Base):
+class DTLConfiguration(RowVersion, Base):
     __tablename__ = "dtl_configuration"
 
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
     configuration_owl = Column(Text, nullable=False)
     generated_by = Column(String(191), nullable=True)
+    is_valid = Column(Boolean, nullable=True)
+    diagnostics = Column(JSON, nullable=True)
+    validated_hash = Column(String(64), nullable=True)
+    validated_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     dtl = relationship("DTL", back_populates="configuration")
 
 
-class DTLLogic(Base):
+class DTLGraphSource(RowVersion, Base):
+    __tablename__ = "dtl_graph_sources"
+
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
+    graph = Column(String(32), primary_key=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False, index=True)
+    content_hash = Column(String(64), nullable=False)
+    triple_count = Column(Integer, default=0, nullable=False)
+    parse_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DTLGraphTriple(Base):
+    __tablename__ = "dtl_graph_triples"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False)
+    graph = Column(String(32), nullable=False)
+    subject = Column(String(512), nullable=False)
+    predicate = Column(String(512), nullable=False)
+    object = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_dtl_graph_triples_dtl", "dtl_id", "graph"),
+        Index("ix_dtl_graph_triples_library_subject", "dtlib_id", "graph", "subject"),
+    )
+
+
+class DTLTerm(Base):
+    __tablename__ = "dtl_terms"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False)
+    graph = Column(String(32), nullable=False)
+    iri = Column(String(512), nullable=False)
+    name = Column(String(191), nullable=False)
+    name_key = Column(String(191), nullable=False)
+    kind = Column(String(32), nullable=False)
+    label = Column(String(255), nullable=True)
+
+    __table_args__ = (
+        Index("ix_dtl_terms_dtl", "dtl_id", "graph"),
+        Index("ix_dtl_terms_library_name", "dtlib_id", "name_key"),
+    )
+
+
+class DTLSignature(Base):
+    """MinHash signature of a DTL's legal text (see ``similarity``)."""
+
+    __tablename__ = "dtl_signatures"
+
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
+    text_hash = Column(String(64), nullable=False)
+    minhash = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DTLSignatureBand(Base):
+    """One LSH bucket of a signature; DTLs sharing any bucket are similarity candidates."""
+
+    __tablename__ = "dtl_signature_bands"
+
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, nullable=False)
+
+    __table_args__ = (Index("ix_dtl_signature_bands_bucket", "bucket"),)
+
+
+class DTLLogic(RowVersion, Base):
     __tablename__ = "dtl_logic"
 
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
     language = Column(String(64), default="Python", nullable=False)
     code = Column(Text, nullable=False)
     generated_by = Column(String(191), nullable=True)
@@ -132,10 +328,10 @@ class DTLLogic(Base):
     dtl = relationship("DTL", back_populates="logic")
 
 
-class DTLReview(Base):
+class DTLReview(RowVersion, Base):
     __tablename__ = "dtl_reviews"
 
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
     status = Column(String(32), default="Pending", nullable=False)
     approved_version = Column(String(64), nullable=True)
     approved_at = Column(DateTime, nullable=True)
@@ -146,11 +342,11 @@ class DTLReview(Base):
     dtl = relationship("DTL", back_populates="review")
 
 
-class DTLTest(Base):
+class DTLTest(RowVersion, Base):
     __tablename__ = "dtl_tests"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), nullable=False)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(255), nullable=False)
     input_json = Column(JSON, nullable=False)
     expected_output_json = Column(JSON, nullable=False)
@@ -161,27 +357,78 @@ class DTLTest(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     dtl = relationship("DTL", back_populates="tests")
-    runs = relationship("DTLTestRun", back_populates="test", cascade="all, delete-orphan")
+    runs = relationship("DTLTestRun", back_populates="test", cascade="all, delete-orphan", passive_deletes=True)
+    rollups = relationship("DTLTestRollup", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class DTLTestRun(Base):
     __tablename__ = "dtl_test_runs"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    test_id = Column(Integer, ForeignKey("dtl_tests.id"), nullable=False)
+    test_id = Column(Integer, ForeignKey("dtl_tests.id", ondelete="CASCADE"), nullable=False)
     executed_at = Column(DateTime, default=datetime.utcnow)
     result = Column(String(16), nullable=False)
     actual_output_json = Column(JSON, nullable=True)
     notes = Column(Text, nullable=True)
+    logic_hash = Column(String(64), nullable=True)
+    input_hash = Column(String(64), nullable=True)
+    expected_output_hash = Column(String(64), nullable=True)
 
     test = relationship("DTLTest", back_populates="runs")
 
+    __table_args__ = (
+        Index("ix_dtl_test_runs_test_executed", "test_id", "executed_at"),
+        Index("ix_dtl_test_runs_executed", "executed_at"),
+    )
+
+
+class DTLTestRollup(Base):
+    __tablename__ = "dtl_test_rollups"
+
+    test_id = Column(Integer, ForeignKey("dtl_tests.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False, index=True)
+    passed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    errored = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+
+
+class DTLRunRollup(Base):
+    __tablename__ = "dtl_run_rollups"
+
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    passed = Column(Integer, default=0, nullable=False)
+    failed = Column(Integer, default=0, nullable=False)
+    errored = Column(Integer, default=0, nullable=False)
+    skipped = Column(Integer, default=0, nullable=False)
+
+
+class DTLBenchmarkRun(Base):
+    __tablename__ = "dtl_benchmark_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False, index=True)
+    logic_hash = Column(String(64), nullable=False)
+    seed = Column(Integer, nullable=False)
+    samples = Column(Integer, nullable=False)
+    p50_ms = Column(Float, nullable=True)
+    p99_ms = Column(Float, nullable=True)
+    max_ms = Column(Float, nullable=True)
+    throughput_per_s = Column(Float, nullable=True)
+    exceptions = Column(Integer, default=0, nullable=False)
+    exception_summary = Column(JSON, nullable=True)
+    memory_peak_kb = Column(Float, nullable=True)
+    load_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 class DTLComment(Base):
     __tablename__ = "dtl_comments"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dtl_id = Column(Integer, ForeignKey("dtls.id"), nullable=False)
+    dtl_id = Column(Integer, ForeignKey("dtls.id", ondelete="CASCADE"), nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     role = Column(String(32), nullable=False)
     comment = Column(Text, nullable=False)
@@ -195,7 +442,7 @@ class GithubSyncEvent(Base):
     __tablename__ = "github_sync_events"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    dtlib_id = Column(Integer, ForeignKey("dtlibs.id"), nullable=False)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False)
     repository_url = Column(Text, nullable=False)
     branch = Column(String(191), nullable=False)
     commit_id = Column(String(191), nullable=True)
@@ -203,3 +450,29 @@ class GithubSyncEvent(Base):
     status = Column(String(32), default="Started", nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
+
+
+class DTLIBExportFile(Base):
+    __tablename__ = "dtlib_export_files"
+
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), primary_key=True)
+    path = Column(String(512), primary_key=True)
+    dtl_id = Column(Integer, nullable=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+
+
+class DTLExportState(Base):
+    __tablename__ = "dtl_export_states"
+
+    dtl_id = Column(Integer, primary_key=True)
+    dtlib_id = Column(Integer, ForeignKey("dtlibs.id", ondelete="CASCADE"), nullable=False, index=True)
+    source_version = Column(String(64), nullable=False)
+
+
+class ReplicaHeartbeat(Base):
+    """Written on the primary every few seconds; its age on a replica is that replica's lag."""
+
+    __tablename__ = "replica_heartbeats"
+
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
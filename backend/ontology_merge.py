@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Iterable, Literal
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from . import models, owl
+
+GraphKind = Literal["ontology", "configuration"]
+INSERT_BATCH_SIZE = 500
+
+_RDF = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+_RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+_OWL = "http://www.w3.org/2002/07/owl#"
+
+# Predicates whose values define what an IRI *is*. Two DTLs stating different
+# values for one of these (or different literal values for any non-annotation
+# predicate, e.g. a threshold) disagree about the term.
+DEFINING_PREDICATES = {
+    f"<{_RDF}type>",
+    f"<{_RDFS}domain>",
+    f"<{_RDFS}range>",
+    f"<{_RDFS}subClassOf>",
+    f"<{_RDFS}subPropertyOf>",
+    f"<{_OWL}equivalentClass>",
+    f"<{_OWL}equivalentProperty>",
+    f"<{_OWL}hasValue>",
+}
+ANNOTATION_PREDICATES = {
+    f"<{_RDFS}label>",
+    f"<{_RDFS}comment>",
+    f"<{_RDFS}seeAlso>",
+    f"<{_RDFS}isDefinedBy>",
+    "<http://www.w3.org/2004/02/skos/core#definition>",
+    "<http://www.w3.org/2004/02/skos/core#prefLabel>",
+}
+
+
+def artifact_text(dtl: models.DTL, graph: GraphKind) -> str | None:
+    if graph == "ontology":
+        return dtl.ontology.ontology_owl if dtl.ontology else None
+    return dtl.configuration.configuration_owl if dtl.configuration else None
+
+
+def store_dtl_graph(
+    db: Session,
+    dtl_id: int,
+    dtlib_id: int,
+    graph: GraphKind,
+    content_hash: str,
+    triples: Iterable[owl.Triple],
+    parse_error: str | None,
+) -> bool:
+    """Replace the stored triple set of one DTL artifact with the triples parsed from version ``content_hash``.
+
+    Returns ``True`` when the stored triples were replaced. The library-wide
+    merge is the union of the per-DTL sets, so replacing one DTL's rows is all
+    the incremental work a change requires; no other document is re-parsed.
+    The triples come from the validation worker's parse. The caller commits.
+    """
+
+    source = db.get(models.DTLGraphSource, (dtl_id, graph))
+    if source is not None and source.content_hash == content_hash:
+        return False
+
+    db.execute(
+        delete(models.DTLGraphTriple).where(
+            models.DTLGraphTriple.dtl_id == dtl_id, models.DTLGraphTriple.graph == graph
+        )
+    )
+    rows = [
+        {"dtlib_id": dtlib_id, "dtl_id": dtl_id, "graph": graph, "subject": s, "predicate": p, "object": o}
+        for s, p, o in sorted(set(triples))
+    ]
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        db.execute(insert(models.DTLGraphTriple), rows[start : start + INSERT_BATCH_SIZE])
+
+    if source is None:
+        source = models.DTLGraphSource(dtl_id=dtl_id, graph=graph, dtlib_id=dtlib_id)
+        db.add(source)
+    source.content_hash = content_hash
+    source.triple_count = len(rows)
+    source.parse_error = parse_error
+    return True
+
+
+def aggregated_graph(db: Session, dtlib_id: int, graph: GraphKind) -> str | None:
+    """The library-wide merge as N-Triples, or ``None`` if no DTL contributed triples."""
+
+    triple = models.DTLGraphTriple
+    rows = db.execute(
+        select(triple.subject, triple.predicate, triple.object)
+        .where(triple.dtlib_id == dtlib_id, triple.graph == graph)
+        .distinct()
+        .order_by(triple.subject, triple.predicate, triple.object)
+    ).all()
+    return owl.serialize_ntriples(rows) if rows else None
+
+
+def graph_conflicts(db: Session, dtlib_id: int, graph: GraphKind) -> list[dict[str, Any]]:
+    """IRIs that two or more DTLs define differently.
+
+    Candidates are narrowed in SQL to (subject, predicate) pairs stated by more
+    than one DTL with more than one distinct value; only those rows are loaded
+    to compare the per-DTL value sets.
+    """
+
+    triple = models.DTLGraphTriple
+    scope = (triple.dtlib_id == dtlib_id, triple.graph == graph, triple.subject.like("<%"))
+    candidates = (
+        select(triple.subject, triple.predicate)
+        .where(*scope)
+        .group_by(triple.subject, triple.predicate)
+        .having(func.count(func.distinct(triple.dtl_id)) > 1, func.count(func.distinct(triple.object)) > 1)
+    )
+    rows = db.execute(
+        select(triple.subject, triple.predicate, triple.dtl_id, triple.object).where(
+            *scope, tuple_(triple.subject, triple.predicate).in_(candidates)
+        )
+    ).all()
+
+    statements: dict[tuple[str, str], dict[int, set[str]]] = defaultdict(lambda: defaultdict(set))
+    for subject, predicate, dtl_id, obj in rows:
+        if predicate in ANNOTATION_PREDICATES:
+            continue
+        if predicate in DEFINING_PREDICATES or obj.startswith('"'):
+            statements[(subject, predicate)][dtl_id].add(obj)
+
+    conflicts = []
+    for (subject, predicate), by_dtl in sorted(statements.items()):
+        if len({frozenset(values) for values in by_dtl.values()}) > 1:
+            conflicts.append(
+                {
+                    "iri": subject.strip("<>"),
+                    "predicate": predicate.strip("<>"),
+                    "definitions": [
+                        {"dtl_id": dtl_id, "values": sorted(values)} for dtl_id, values in sorted(by_dtl.items())
+                    ],
+                }
+            )
+    return conflicts
+
+
+def parse_errors(db: Session, dtlib_id: int, graph: GraphKind) -> list[dict[str, Any]]:
+    rows = db.execute(
+        select(models.DTLGraphSource.dtl_id, models.DTLGraphSource.parse_error).where(
+            models.DTLGraphSource.dtlib_id == dtlib_id,
+            models.DTLGraphSource.graph == graph,
+            models.DTLGraphSource.parse_error.is_not(None),
+        )
+    ).all()
+    return [{"dtl_id": dtl_id, "error": error} for dtl_id, error in rows]
@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+from datetime import datetime
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.base import NO_VALUE
+
+from . import models, ontology_merge, responses
+
+# The snapshot keeps one entry per DTL, keyed by the DTL id as a string (JSON
+# object keys), holding exactly what the overview derives from that DTL.
+_REMOVED = object()
+_TRACKED_DTL_FIELDS = ("status", "legal_reference")
+
+
+def _count(counts: dict[str, int], status: str | None, delta: int) -> None:
+    if status is None:
+        return
+    remaining = counts.get(status, 0) + delta
+    if remaining > 0:
+        counts[status] = remaining
+    else:
+        counts.pop(status, None)
+
+
+def build_snapshot(db: Session, dtlib_id: int) -> models.DTLIBOverviewSnapshot:
+    """Materialize the overview snapshot of a library from scratch (one query)."""
+
+    rows = db.execute(
+        select(models.DTL.id, models.DTL.status, models.DTL.legal_reference, models.DTLInterface.interface_json)
+        .outerjoin(models.DTLInterface, models.DTLInterface.dtl_id == models.DTL.id)
+        .where(models.DTL.dtlib_id == dtlib_id, models.DTL.deleted_at.is_(None))
+        .order_by(models.DTL.id)
+    )
+    entries: dict[str, dict[str, Any]] = {}
+    counts: dict[str, int] = {}
+    for dtl_id, dtl_status, legal_reference, interface_json in rows:
+        entries[str(dtl_id)] = {"status": dtl_status, "legal_reference": legal_reference, "interface": interface_json}
+        _count(counts, dtl_status, 1)
+    return models.DTLIBOverviewSnapshot(dtlib_id=dtlib_id, entries=entries, dtls_status=counts)
+
+
+def get_snapshot(db: Session, dtlib_id: int) -> models.DTLIBOverviewSnapshot:
+    """Return the stored snapshot, building and persisting it on first use (on a replica, only building it)."""
+
+    snapshot = db.get(models.DTLIBOverviewSnapshot, dtlib_id)
+    if snapshot is not None:
+        return snapshot
+    snapshot = build_snapshot(db, dtlib_id)
+    if db.info.get("replica"):
+        return snapshot
+    try:
+        with db.begin_nested():
+            db.add(snapshot)
+        db.commit()
+    except IntegrityError:
+        # A concurrent request persisted it first; its copy is just as current.
+        db.rollback()
+        snapshot = db.get(models.DTLIBOverviewSnapshot, dtlib_id)
+    return snapshot
+
+
+def render(snapshot: models.DTLIBOverviewSnapshot) -> dict[str, Any]:
+    """The snapshot-backed fields of ``schemas.OverviewSnapshot``, in DTL id order."""
+
+    ordered = [(int(dtl_id), entry) for dtl_id, entry in snapshot.entries.items()]
+    ordered.sort(key=lambda item: item[0])
+    return {
+        "dtls_status": dict(snapshot.dtls_status),
+        "interface_surface": [entry["interface"] for _, entry in ordered if entry["interface"] is not None],
+        "traceability": [{"dtl_id": dtl_id, "legal_reference": entry["legal_reference"]} for dtl_id, entry in ordered],
+    }
+
+
+def content(db: Session, dtlib: models.DTLIB) -> dict[str, Any]:
+    """The ``schemas.OverviewSnapshot`` response as plain data, in its field order, without building models."""
+
+    rows = db.execute(responses.select_dtls(models.DTL.dtlib_id == dtlib.id).order_by(models.DTL.id))
+    rendered = render(get_snapshot(db, dtlib.id))
+    return {
+        "dtlib": responses.dtlib_row(dtlib),
+        "dtls": responses.dtl_rows(rows, dtlib.full_text),
+        "dtls_status": rendered["dtls_status"],
+        "aggregated_ontology": ontology_merge.aggregated_graph(db, dtlib.id, "ontology"),
+        "aggregated_configuration": ontology_merge.aggregated_graph(db, dtlib.id, "configuration"),
+        "interface_surface": rendered["interface_surface"],
+        "traceability": rendered["traceability"],
+    }
+
+
+def _loaded(obj: Any, attribute: str) -> Any:
+    value = inspect(obj).attrs[attribute].loaded_value
+    return None if value is NO_VALUE else value
+
+
+def _dtlib_of_interface(session: Session, interface: models.DTLInterface) -> int | None:
+    dtl = _loaded(interface, "dtl")
+    if dtl is not None:
+        return dtl.dtlib_id
+    return session.connection().execute(
+        select(models.DTL.dtlib_id).where(models.DTL.id == interface.dtl_id)
+    ).scalar()
+
+
+def _collect_changes(session: Session) -> dict[int, dict[str, Any]]:
+    changes: dict[int, dict[str, Any]] = {}
+
+    def stage(dtlib_id: int | None, dtl_id: int, change: Any) -> None:
+        if dtlib_id is None:
+            return
+        pending = changes.setdefault(dtlib_id, {})
+        key = str(dtl_id)
+        if pending.get(key) is _REMOVED:
+            return
+        if change is _REMOVED:
+            pending[key] = _REMOVED
+        else:
+            pending[key] = {**pending.get(key, {}), **change}
+
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, models.DTL):
+            state = inspect(obj)
+            if obj.deleted_at is not None:
+                # Tombstoned: gone from the overview now, the rows follow in the background purge.
+                stage(obj.dtlib_id, obj.id, _REMOVED)
+            elif obj in session.new:
+                interface = _loaded(obj, "interface")
+                stage(
+                    obj.dtlib_id,
+                    obj.id,
+                    {
+                        "status": obj.status,
+                        "legal_reference": obj.legal_reference,
+                        "interface": interface.interface_json if interface else None,
+                    },
+                )
+            elif any(state.attrs[field].history.has_changes() for field in _TRACKED_DTL_FIELDS):
+                stage(obj.dtlib_id, obj.id, {field: getattr(obj, field) for field in _TRACKED_DTL_FIELDS})
+        elif isinstance(obj, models.DTLInterface):
+            if obj in session.new or inspect(obj).attrs.interface_json.history.has_changes():
+                stage(_dtlib_of_interface(session, obj), obj.dtl_id, {"interface": obj.interface_json})
+
+    for obj in session.deleted:
+        if isinstance(obj, models.DTL):
+            stage(obj.dtlib_id, obj.id, _REMOVED)
+        elif isinstance(obj, models.DTLInterface):
+            stage(_dtlib_of_interface(session, obj), obj.dtl_id, {"interface": None})
+    return changes
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_snapshots(session: Session, flush_context: Any) -> None:
+    """Fold DTL and interface writes into the snapshots of the affected libraries.
+
+    Only the entries of the written DTLs are touched and status counts are
+    adjusted by delta, so maintenance costs one locked read and one write per
+    library regardless of its size. Libraries without a snapshot are skipped;
+    it is built on the next overview read.
+    """
+
+    changes = _collect_changes(session)
+    if not changes:
+        return
+    table = models.DTLIBOverviewSnapshot.__table__
+    connection = session.connection()
+    for dtlib_id, pending in changes.items():
+        row = connection.execute(
+            select(table.c.entries, table.c.dtls_status).where(table.c.dtlib_id == dtlib_id).with_for_update()
+        ).first()
+        if row is None:
+            continue
+        entries = dict(row.entries)
+        counts = dict(row.dtls_status)
+        for key, change in pending.items():
+            previous = entries.get(key)
+            if change is _REMOVED:
+                if previous is not None:
+                    _count(counts, previous["status"], -1)
+                    del entries[key]
+                continue
+            current = {**(previous or {"status": None, "legal_reference": None, "interface": None}), **change}
+            if previous is None or previous["status"] != current["status"]:
+                _count(counts, previous["status"] if previous else None, -1)
+                _count(counts, current["status"], 1)
+            entries[key] = current
+        connection.execute(
+            update(table)
+            .where(table.c.dtlib_id == dtlib_id)
+            .values(entries=entries, dtls_status=counts, updated_at=datetime.utcnow())
+        )
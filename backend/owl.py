@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import to_canonical_graph
+from rdflib.namespace import OWL, RDF, RDFS, XSD
+
+from .hashing import hash_text
+
+Triple = tuple[str, str, str]
+
+# rdf:type objects that declare a term, mapped to the kind stored in the term index.
+TERM_KINDS = {
+    OWL.Class: "class",
+    RDFS.Class: "class",
+    OWL.ObjectProperty: "object_property",
+    OWL.DatatypeProperty: "datatype_property",
+    OWL.AnnotationProperty: "annotation_property",
+    RDF.Property: "property",
+    RDFS.Datatype: "datatype",
+    OWL.NamedIndividual: "individual",
+}
+_BUILTIN_NAMESPACES = tuple(str(ns) for ns in (RDF, RDFS, OWL, XSD))
+
+_CODE_FENCE = re.compile(r"^\s*```[\w+-]*\s*\n(.*?)\n\s*```\s*$", re.DOTALL)
+
+
+class OWLParseError(ValueError):
+    """Raised when an artifact cannot be read as RDF in any supported syntax."""
+
+
+def strip_code_fence(text: str) -> str:
+    match = _CODE_FENCE.match(text)
+    return match.group(1) if match else text
+
+
+def _candidate_formats(text: str) -> list[str]:
+    head = text.lstrip()[:1]
+    if head == "<":
+        return ["xml", "turtle"]
+    if head in "{[":
+        return ["json-ld", "turtle"]
+    return ["turtle", "xml"]
+
+
+def parse_graph(text: str) -> Graph:
+    """Parse RDF/XML, Turtle or JSON-LD, sniffing the syntax from the first character."""
+
+    source = strip_code_fence(text or "")
+    if not source.strip():
+        raise OWLParseError("empty document")
+    errors = []
+    for fmt in _candidate_formats(source):
+        graph = Graph()
+        try:
+            return graph.parse(data=source, format=fmt)
+        except Exception as exc:  # rdflib raises parser-specific exception types
+            errors.append(f"{fmt}: {exc}")
+    raise OWLParseError("; ".join(errors))
+
+
+def normalized_triples(graph: Graph) -> set[Triple]:
+    """N-Triples encoded triples with deterministic, document-scoped blank node labels.
+
+    Blank nodes are canonicalized and then prefixed with a hash of the
+    canonical graph, so re-parsing the same document yields the same set while
+    blank nodes of different documents never collide when sets are merged.
+    """
+
+    canonical = to_canonical_graph(graph)
+    scope = hash_text("\n".join(sorted(" ".join(term.n3() for term in triple) for triple in canonical)))[:12]
+
+    def encode(term) -> str:
+        if isinstance(term, BNode):
+            return f"_:b{scope}{term}"
+        return term.n3()
+
+    return {(encode(s), encode(p), encode(o)) for s, p, o in canonical}
+
+
+def parse_triples(text: str) -> set[Triple]:
+    return normalized_triples(parse_graph(text))
+
+
+def serialize_ntriples(triples: Iterable[Triple]) -> str:
+    return "".join(f"{s} {p} {o} .\n" for s, p, o in triples)
+
+
+def local_name(iri: str) -> str:
+    return re.split(r"[#/:]", iri.rstrip("#/"))[-1]
+
+
+def name_key(name: str) -> str:
+    """Lookup key shared by ``income_threshold``, ``incomeThreshold`` and ``Income Threshold``."""
+
+    return re.sub(r"[^0-9a-z]", "", name.lower())
+
+
+def _diagnostic(severity: str, message: str, term: Any = None) -> dict[str, Any]:
+    return {"severity": severity, "message": message, "term": str(term) if term is not None else None}
+
+
+def _builtin(term: Any) -> bool:
+    return isinstance(term, URIRef) and str(term).startswith(_BUILTIN_NAMESPACES)
+
+
+def inspect_document(text: str) -> dict[str, Any]:
+    """Parse and check one OWL document; runs in the validation worker pool.
+
+    Returns ``{"valid", "diagnostics", "terms", "triples", "parse_error"}``;
+    the normalized triples feed the library merge, so the document is parsed
+    once per change. Errors make the document
+    invalid (unparseable, empty, a term declared as both class and property,
+    ranges contradicting the property kind); warnings flag things a reviewer
+    should look at but that still load (missing ontology header, properties
+    used without a declaration).
+    """
+
+    try:
+        graph = parse_graph(text)
+    except OWLParseError as exc:
+        return {
+            "valid": False,
+            "diagnostics": [_diagnostic("error", f"not parseable as RDF: {exc}")],
+            "terms": [],
+            "triples": [],
+            "parse_error": str(exc),
+        }
+
+    diagnostics: list[dict[str, Any]] = []
+    if len(graph) == 0:
+        diagnostics.append(_diagnostic("error", "document contains no statements"))
+    if (None, RDF.type, OWL.Ontology) not in graph:
+        diagnostics.append(_diagnostic("warning", "no owl:Ontology header"))
+
+    declared: dict[URIRef, set[str]] = {}
+    for subject, kind_iri in graph.subject_objects(RDF.type):
+        kind = TERM_KINDS.get(kind_iri)
+        if kind and isinstance(subject, URIRef):
+            declared.setdefault(subject, set()).add(kind)
+
+    property_kinds = {"object_property", "datatype_property", "annotation_property", "property"}
+    for term, kinds in declared.items():
+        if "class" in kinds and kinds & property_kinds:
+            diagnostics.append(_diagnostic("error", "declared as both a class and a property", term))
+        if {"object_property", "datatype_property"} <= kinds:
+            diagnostics.append(_diagnostic("error", "declared as both an object and a datatype property", term))
+
+    for prop, range_ in graph.subject_objects(RDFS.range):
+        kinds = declared.get(prop, set())
+        is_datatype_range = isinstance(range_, URIRef) and (
+            str(range_).startswith(str(XSD)) or "datatype" in declared.get(range_, set())
+        )
+        if "object_property" in kinds and is_datatype_range:
+            diagnostics.append(_diagnostic("error", f"object property has datatype range {range_.n3()}", prop))
+        if "datatype_property" in kinds and "class" in declared.get(range_, set()):
+            diagnostics.append(_diagnostic("error", f"datatype property has class range {range_.n3()}", prop))
+
+    undeclared = {
+        predicate
+        for predicate in graph.predicates()
+        if isinstance(predicate, URIRef) and not _builtin(predicate) and predicate not in declared
+    }
+    for predicate in sorted(undeclared):
+        diagnostics.append(_diagnostic("warning", "property used without a declaration", predicate))
+
+    terms = []
+    for term, kinds in sorted(declared.items()):
+        label = next((str(value) for value in graph.objects(term, RDFS.label) if isinstance(value, Literal)), None)
+        for kind in sorted(kinds):
+            terms.append({"iri": str(term), "name": local_name(str(term)), "kind": kind, "label": label})
+
+    return {
+        "valid": not any(item["severity"] == "error" for item in diagnostics),
+        "diagnostics": diagnostics,
+        "terms": terms,
+        "triples": sorted(normalized_triples(graph)),
+        "parse_error": None,
+    }
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any
+
+from fastapi import BackgroundTasks
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models, owl
+from .database import SessionLocal
+from .hashing import hash_text
+from .ontology_merge import GraphKind, artifact_text, store_dtl_graph
+
+VALIDATION_WORKERS = int(os.getenv("OWL_VALIDATION_WORKERS", "2"))
+VALIDATION_TIMEOUT_SECONDS = float(os.getenv("OWL_VALIDATION_TIMEOUT_SECONDS", "60"))
+
+_ARTIFACT_MODELS = {"ontology": models.DTLOntology, "configuration": models.DTLConfiguration}
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _executor() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the API process holds DB connections and threads.
+            _pool = ProcessPoolExecutor(
+                max_workers=VALIDATION_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def inspect_text(text: str) -> dict[str, Any]:
+    """Run ``owl.inspect_document`` in the worker pool so parsing never blocks the API process."""
+
+    global _pool
+    try:
+        return _executor().submit(owl.inspect_document, text).result(timeout=VALIDATION_TIMEOUT_SECONDS)
+    except TimeoutError:
+        message = f"validation did not finish within {VALIDATION_TIMEOUT_SECONDS:g}s"
+    except BrokenProcessPool:
+        with _pool_lock:
+            _pool = None
+        message = "validation worker crashed"
+    return {
+        "valid": False,
+        "diagnostics": [{"severity": "error", "message": message, "term": None}],
+        "terms": [],
+        "triples": [],
+        "parse_error": message,
+    }
+
+
+def store_result(db: Session, dtl_id: int, graph: GraphKind, content_hash: str, result: dict[str, Any]) -> bool:
+    """Persist validity, diagnostics, declared terms and merge triples for one artifact version.
+
+    Results for text that changed while the worker ran are dropped; the newer
+    version has its own validation queued. ``updated_at`` is left untouched so
+    validation never invalidates ETags or bundle ``base_versions``. The caller
+    commits.
+    """
+
+    model = _ARTIFACT_MODELS[graph]
+    artifact = db.get(model, dtl_id, with_for_update=True)
+    if artifact is None:
+        return False
+    text = artifact.ontology_owl if graph == "ontology" else artifact.configuration_owl
+    if hash_text(text) != content_hash:
+        return False
+
+    db.execute(
+        update(model)
+        .where(model.dtl_id == dtl_id)
+        .values(
+            is_valid=result["valid"],
+            diagnostics=result["diagnostics"],
+            validated_hash=content_hash,
+            validated_at=datetime.utcnow(),
+            updated_at=model.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(delete(models.DTLTerm).where(models.DTLTerm.dtl_id == dtl_id, models.DTLTerm.graph == graph))
+    dtlib_id = db.execute(select(models.DTL.dtlib_id).where(models.DTL.id == dtl_id)).scalar_one()
+    rows = [
+        {
+            "dtlib_id": dtlib_id,
+            "dtl_id": dtl_id,
+            "graph": graph,
+            "iri": term["iri"][:512],
+            "name": term["name"][:191],
+            "name_key": owl.name_key(term["name"])[:191],
+            "kind": term["kind"],
+            "label": term["label"][:255] if term["label"] else None,
+        }
+        for term in result["terms"]
+    ]
+    if rows:
+        db.execute(insert(models.DTLTerm), rows)
+    store_dtl_graph(db, dtl_id, dtlib_id, graph, content_hash, result["triples"], result["parse_error"])
+    db.expire(artifact)
+    return True
+
+
+def validate_artifact(dtl_id: int, graph: GraphKind) -> None:
+    """Background task: validate the current text of one artifact in a fresh session."""
+
+    db = SessionLocal()
+    try:
+        artifact = db.get(_ARTIFACT_MODELS[graph], dtl_id)
+        if artifact is None:
+            return
+        text = artifact.ontology_owl if graph == "ontology" else artifact.configuration_owl
+        content_hash = hash_text(text)
+        if artifact.validated_hash == content_hash:
+            return
+        db.rollback()  # do not hold a transaction open while the worker parses
+        result = inspect_text(text)
+        if store_result(db, dtl_id, graph, content_hash, result):
+            db.commit()
+        else:
+            db.rollback()
+    finally:
+        db.close()
+
+
+def schedule(background_tasks: BackgroundTasks, dtl: models.DTL) -> None:
+    """Queue validation of every artifact of ``dtl`` whose text has not been validated yet."""
+
+    for graph in ("ontology", "configuration"):
+        text = artifact_text(dtl, graph)
+        artifact = getattr(dtl, graph)
+        if text is not None and artifact.validated_hash != hash_text(text):
+            background_tasks.add_task(validate_artifact, dtl.id, graph)
+
+
+def validate_now(db: Session, dtl: models.DTL) -> None:
+    """Validate both artifacts synchronously (still in the pool) and commit."""
+
+    for graph in ("ontology", "configuration"):
+        text = artifact_text(dtl, graph)
+        if text is not None:
+            store_result(db, dtl.id, graph, hash_text(text), inspect_text(text))
+    db.commit()
+
+
+def validation_report(db: Session, dtl: models.DTL) -> list[dict[str, Any]]:
+    counts = dict(
+        db.execute(
+            select(models.DTLTerm.graph, func.count())
+            .where(models.DTLTerm.dtl_id == dtl.id)
+            .group_by(models.DTLTerm.graph)
+        ).all()
+    )
+    report = []
+    for graph in ("ontology", "configuration"):
+        artifact = getattr(dtl, graph)
+        text = artifact_text(dtl, graph)
+        if text is None:
+            continue
+        report.append(
+            {
+                "graph": graph,
+                "is_valid": artifact.is_valid,
+                "diagnostics": artifact.diagnostics or [],
+                "validated_at": artifact.validated_at,
+                "pending": artifact.validated_hash != hash_text(text),
+                "term_count": counts.get(graph, 0),
+            }
+        )
+    return report
+
+
+def find_terms(
+    db: Session, dtlib_id: int, name: str, kind: str | None = None, limit: int = 100
+) -> list[dict[str, Any]]:
+    """DTLs of a library that declare ``name`` (any spelling of the local name, or a full IRI)."""
+
+    term = models.DTLTerm
+    statement = (
+        select(term.dtl_id, models.DTL.title.label("dtl_title"), term.graph, term.iri, term.name, term.kind, term.label)
+        .join(models.DTL, models.DTL.id == term.dtl_id)
+        .where(term.dtlib_id == dtlib_id, models.DTL.deleted_at.is_(None))
+    )
+    if "://" in name:
+        statement = statement.where(term.iri == name)
+    else:
+        statement = statement.where(term.name_key == owl.name_key(name))
+    if kind:
+        statement = statement.where(term.kind == kind)
+    rows = db.execute(statement.order_by(term.dtl_id, term.graph, term.iri).limit(limit)).all()
+    return [row._asdict() for row in rows]
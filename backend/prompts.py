@@ -36,6 +36,9 @@ class PromptBuilder:
     def logic(self, *, title: str, legal_text: str) -> str:
         return LOGIC_PROMPT.format(title=title, legal_text=legal_text)
 
+    def seeded(self, prompt: str, *, reference: str) -> str:
+        return prompt + "\n" + SEED_PROMPT.format(reference=reference)
+
     def segmentation(self, *, law_name: str, law_identifier: str, full_text: str) -> str:
         return SEGMENTATION_PROMPT.format(
             law_name=law_name,
@@ -127,4 +130,14 @@ SEGMENTATION_PROMPT = PromptTemplate(
 )
 
 
+SEED_PROMPT = PromptTemplate(
+    description="Start from the artifact of an approved near-identical DTL",
+    template=(
+        "\nAn approved Digital Twin Law for a near-identical legal text produced the result below.\n"
+        "Start from it, keep its identifiers stable and change only what the differences in the legal text require.\n"
+        "Approved result:\n{reference}"
+    ),
+)
+
+
 prompt_builder = PromptBuilder()
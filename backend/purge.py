@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+from functools import lru_cache
+
+from sqlalchemy import Column, Table, delete, select, update
+from sqlalchemy.engine import Connection
+
+from . import models
+from .database import Base, engine
+
+PURGE_DTL_BATCH_SIZE = int(os.getenv("PURGE_DTL_BATCH_SIZE", "200"))
+PURGE_ROW_CHUNK = int(os.getenv("PURGE_ROW_CHUNK", "5000"))
+
+
+@lru_cache(maxsize=None)
+def _children(table: Table) -> tuple[tuple[Table, Column], ...]:
+    """Tables (and their referencing column) with a foreign key to ``table``, from the model metadata."""
+
+    return tuple(
+        (child, fk.parent)
+        for child in Base.metadata.sorted_tables
+        for fk in child.foreign_keys
+        if fk.column.table is table
+    )
+
+
+def _single_pk(table: Table) -> Column | None:
+    columns = list(table.primary_key.columns)
+    return columns[0] if len(columns) == 1 else None
+
+
+def _purge_rows(connection: Connection, table: Table, ids: list[int]) -> None:
+    """Delete rows ``ids`` of ``table`` and, first, everything referencing them.
+
+    Children are deleted set-based in chunks of ``PURGE_ROW_CHUNK`` keys with
+    a commit after each, so no transaction or result set grows with the size
+    of the tree (tens of thousands of test runs are just a few chunks).
+    Self-references are cleared rather than followed. Works whether or not the
+    schema already has ``ON DELETE CASCADE``.
+    """
+
+    pk = _single_pk(table)
+    for child, column in _children(table):
+        if child is table:
+            connection.execute(update(table).where(column.in_(ids)).values({column.key: None}))
+            continue
+        child_pk = _single_pk(child)
+        if child_pk is None:
+            connection.execute(delete(child).where(column.in_(ids)))
+            continue
+        while True:
+            child_ids = connection.execute(
+                select(child_pk).where(column.in_(ids)).limit(PURGE_ROW_CHUNK)
+            ).scalars().all()
+            if not child_ids:
+                break
+            _purge_rows(connection, child, child_ids)
+            connection.commit()
+    connection.execute(delete(table).where(pk.in_(ids)))
+
+
+def purge_dtl(dtl_id: int) -> None:
+    """Background task: remove a tombstoned DTL and everything below it."""
+
+    with engine.connect() as connection:
+        _purge_rows(connection, models.DTL.__table__, [dtl_id])
+        connection.commit()
+
+
+def purge_dtlib(dtlib_id: int) -> None:
+    """Background task: remove a tombstoned library, ``PURGE_DTL_BATCH_SIZE`` DTLs at a time."""
+
+    dtls = models.DTL.__table__
+    with engine.connect() as connection:
+        while True:
+            dtl_ids = connection.execute(
+                select(dtls.c.id).where(dtls.c.dtlib_id == dtlib_id).limit(PURGE_DTL_BATCH_SIZE)
+            ).scalars().all()
+            if not dtl_ids:
+                break
+            _purge_rows(connection, dtls, dtl_ids)
+            connection.commit()
+        _purge_rows(connection, models.DTLIB.__table__, [dtlib_id])
+        connection.commit()
+
+
+def resume() -> None:
+    """Finish purges interrupted by a restart; runs once in the background at startup."""
+
+    with engine.connect() as connection:
+        dtlib_ids = connection.execute(
+            select(models.DTLIB.id).where(models.DTLIB.deleted_at.is_not(None))
+        ).scalars().all()
+        dtl_ids = connection.execute(
+            select(models.DTL.id).where(models.DTL.deleted_at.is_not(None))
+        ).scalars().all()
+    for dtlib_id in dtlib_ids:
+        purge_dtlib(dtlib_id)
+    for dtl_id in dtl_ids:
+        purge_dtl(dtl_id)
@@ -0,0 +1,33 @@
+"""Pytest fixtures for query budgets; enable with ``pytest_plugins = ["backend.pytest_plugin"]`` in a conftest."""
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+
+from . import query_budget
+
+
+@pytest.fixture
+def query_budgets(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[query_budget.RequestQueries]]:
+    """Fail every request of the test that exceeds its endpoint's budget or repeats a SELECT shape.
+
+    Yields the ``RequestQueries`` of each request made through the app, for
+    assertions on ``log.count`` or ``log.shapes()``.
+    """
+
+    monkeypatch.setattr(query_budget, "QUERY_BUDGET_MODE", "raise")
+    recorded: list[query_budget.RequestQueries] = []
+    query_budget.observers.append(recorded.append)
+    try:
+        yield recorded
+    finally:
+        query_budget.observers.remove(recorded.append)
+
+
+@pytest.fixture
+def count_queries():
+    """``with count_queries() as log:`` records the statements of code the test calls directly."""
+
+    return query_budget.count_queries
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, TypeVar
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# ``warn`` logs requests over their budget or with repeated SELECTs, ``raise`` fails them (tests), ``off``.
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "warn").lower()
+# A SELECT shape issued this often in one request is reported as a likely N+1 load.
+REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER_LISTS = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))*\s*\)")
+
+F = TypeVar("F", bound=Callable)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def shape(statement: str) -> str:
+    """``statement`` with literals and parameter lists collapsed, so repeats of one query compare equal."""
+
+    return _PARAMETER_LISTS.sub("(...)", _LITERALS.sub("?", " ".join(statement.split())))
+
+
+@dataclass
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter[str]:
+        return Counter(shape(statement) for statement in self.statements)
+
+    def repeated(self, threshold: int | None = None) -> dict[str, int]:
+        """SELECT shapes issued at least ``threshold`` times, most frequent first."""
+
+        threshold = REPEAT_THRESHOLD if threshold is None else threshold
+        return {
+            statement: count
+            for statement, count in self.shapes().most_common()
+            if count >= threshold and statement.upper().startswith("SELECT")
+        }
+
+    def report(self) -> str:
+        return "\n".join(f"  {count:4d} x {statement[:200]}" for statement, count in self.shapes().most_common())
+
+
+@dataclass
+class RequestQueries:
+    method: str
+    route: str
+    budget: int | None
+    log: QueryLog
+
+    def problems(self) -> list[str]:
+        found = []
+        if self.budget is not None and self.log.count > self.budget:
+            found.append(f"{self.log.count} queries, budget {self.budget}")
+        for statement, count in self.log.repeated().items():
+            found.append(f"{count} x {statement[:200]}")
+        return found
+
+
+_active: ContextVar[tuple[QueryLog, ...]] = ContextVar("query_logs", default=())
+# Called with the ``RequestQueries`` of every checked request, e.g. by the pytest fixture.
+observers: list[Callable[[RequestQueries], None]] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+    for log in _active.get():
+        log.statements.append(statement)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Record the SQL statements issued inside the block (and in threadpool calls made from it)."""
+
+    log = QueryLog()
+    token = _active.set((*_active.get(), log))
+    try:
+        yield log
+    finally:
+        _active.reset(token)
+
+
+def query_budget(queries: int) -> Callable[[F], F]:
+    """Declare how many SQL statements one request to the decorated endpoint may issue.
+
+    Place it below the route decorator. The number is checked by
+    ``check_request`` on every request, and fails ``python -m
+    backend.check_queries`` (and tests using the ``query_budgets`` fixture)
+    when a change makes the endpoint issue more.
+    """
+
+    def declare(endpoint: F) -> F:
+        endpoint.query_budget = queries
+        return endpoint
+
+    return declare
+
+
+async def check_request(request: Request, call_next):
+    """HTTP middleware body: count the request's statements and report budget overruns and N+1 loads."""
+
+    if QUERY_BUDGET_MODE == "off":
+        return await call_next(request)
+    with count_queries() as log:
+        response = await call_next(request)
+    route = request.scope.get("route")
+    checked = RequestQueries(
+        method=request.method,
+        route=getattr(route, "path", request.url.path),
+        budget=getattr(getattr(route, "endpoint", None), "query_budget", None),
+        log=log,
+    )
+    for observer in observers:
+        observer(checked)
+    problems = checked.problems()
+    if problems:
+        message = f"{checked.method} {checked.route}: {'; '.join(problems)}\n{log.report()}"
+        if QUERY_BUDGET_MODE == "raise":
+            raise QueryBudgetExceeded(message)
+        logger.warning("Query budget: %s", message)
+    return response
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+
+from . import database, models
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = float(os.getenv("REPLICA_HEARTBEAT_SECONDS", "2"))
+# Replicas whose heartbeat is older than this stop serving reads until they catch up.
+MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+HEARTBEAT_ID = 1
+
+
+def beat() -> None:
+    table = models.ReplicaHeartbeat.__table__
+    now = datetime.utcnow()
+    with database.engine.begin() as connection:
+        updated = connection.execute(update(table).where(table.c.id == HEARTBEAT_ID).values(beat_at=now))
+        if updated.rowcount == 0:
+            connection.execute(insert(table).values(id=HEARTBEAT_ID, beat_at=now))
+
+
+def lag(replica: Engine) -> float | None:
+    """Seconds since the newest heartbeat visible on ``replica``; ``None`` if it has none or is unreachable."""
+
+    table = models.ReplicaHeartbeat.__table__
+    try:
+        with replica.connect() as connection:
+            beat_at = connection.execute(select(table.c.beat_at).where(table.c.id == HEARTBEAT_ID)).scalar()
+    except Exception as exc:
+        logger.warning("Replica %s unreachable: %s", replica.url.render_as_string(), exc)
+        return None
+    return (datetime.utcnow() - beat_at).total_seconds() if beat_at is not None else None
+
+
+def check() -> list[int]:
+    """Write a heartbeat and put exactly the replicas within ``MAX_LAG_SECONDS`` in rotation."""
+
+    beat()
+    healthy = []
+    for index, replica in enumerate(database.replica_engines):
+        seconds = lag(replica)
+        if seconds is not None and seconds <= MAX_LAG_SECONDS:
+            healthy.append(index)
+        elif index in database.healthy_replicas:
+            logger.warning("Replica %s dropped from rotation (lag %s s)", replica.url.render_as_string(), seconds)
+    for index in set(healthy) - set(database.healthy_replicas):
+        logger.info("Replica %s in rotation", database.replica_engines[index].url.render_as_string())
+    database.healthy_replicas = healthy
+    return healthy
+
+
+def monitor() -> None:
+    """Heartbeat and lag check loop; runs in a background thread when replicas are configured."""
+
+    while True:
+        try:
+            check()
+        except Exception:
+            logger.exception("Replica check failed")
+        time.sleep(HEARTBEAT_SECONDS)
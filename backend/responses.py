@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Iterable, Sequence
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import Select, select
+
+from . import models, schemas
+
+try:
+    import orjson
+except ImportError:  # optional: the stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: orjson when installed.
+
+    Routes with a ``response_model`` keep FastAPI's own Pydantic-to-bytes path;
+    this class serves everything returned as plain data.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# Row serializers for the largest list responses: plain column tuples straight
+# to JSON bytes, skipping ORM instances and Pydantic validation. Field order
+# and values match ``schemas.DTLRead`` / ``schemas.DTLIBRead``.
+DTL_FIELDS: tuple[str, ...] = tuple(schemas.DTLRead.model_fields)
+DTLIB_FIELDS: tuple[str, ...] = tuple(schemas.DTLIBRead.model_fields)
+_DTL_COLUMNS = [
+    models.DTL.legal_text_stored if name == "legal_text" else getattr(models.DTL, name) for name in DTL_FIELDS
+]
+
+
+def select_dtls(*criteria: Any) -> Select:
+    """``DTLRead`` columns of the non-deleted DTLs matching ``criteria``; add ``order_by`` as needed."""
+
+    return select(*_DTL_COLUMNS).where(models.DTL.deleted_at.is_(None), *criteria)
+
+
+def dtl_rows(rows: Iterable[Sequence[Any]], full_text: str) -> list[dict[str, Any]]:
+    """``DTLRead`` dicts from ``select_dtls`` rows of one library, resolving spans against ``full_text``."""
+
+    items = []
+    for row in rows:
+        item = dict(zip(DTL_FIELDS, row))
+        if item["legal_text_start"] is not None:
+            item["legal_text"] = full_text[item["legal_text_start"] : item["legal_text_end"]]
+        items.append(item)
+    return items
+
+
+def dtlib_row(dtlib: models.DTLIB) -> dict[str, Any]:
+    return {name: getattr(dtlib, name) for name in DTLIB_FIELDS}
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+TEST_RUN_RETENTION_DAYS = int(os.getenv("TEST_RUN_RETENTION_DAYS", "90"))
+PRUNE_BATCH_SIZE = 1000
+
+_RESULT_COLUMNS = {"Passed": "passed", "Failed": "failed", "Error": "errored"}
+_COUNTERS = ("passed", "failed", "errored", "skipped")
+
+
+def _counter_for(result: str) -> str:
+    return _RESULT_COLUMNS.get(result, "skipped")
+
+
+def _increment(db: Session, model: type, keys: dict[str, Any], counts: Counter) -> None:
+    criteria = [getattr(model, name) == value for name, value in keys.items()]
+    increments = {name: getattr(model, name) + amount for name, amount in counts.items()}
+    if db.execute(update(model).where(*criteria).values(**increments)).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(model).values(**keys, **{name: counts.get(name, 0) for name in _COUNTERS}))
+    except IntegrityError:
+        # Another writer created the row first; fall back to incrementing it.
+        db.execute(update(model).where(*criteria).values(**increments))
+
+
+def record_runs(db: Session, dtl_id: int, runs: Iterable[models.DTLTestRun]) -> None:
+    """Fold freshly inserted runs into the daily per-test and per-DTL counters."""
+
+    per_test: dict[tuple[int, date], Counter] = {}
+    per_dtl: dict[date, Counter] = {}
+    for run in runs:
+        day = (run.executed_at or datetime.utcnow()).date()
+        column = _counter_for(run.result)
+        per_test.setdefault((run.test_id, day), Counter())[column] += 1
+        per_dtl.setdefault(day, Counter())[column] += 1
+
+    for (test_id, day), counts in per_test.items():
+        _increment(db, models.DTLTestRollup, {"test_id": test_id, "day": day, "dtl_id": dtl_id}, counts)
+    for day, counts in per_dtl.items():
+        _increment(db, models.DTLRunRollup, {"dtl_id": dtl_id, "day": day}, counts)
+
+
+def _trend_rows(rows: Iterable[Any]) -> list[dict[str, Any]]:
+    trend = []
+    for row in rows:
+        executed = row.passed + row.failed + row.errored
+        trend.append(
+            {
+                "day": row.day,
+                "passed": row.passed,
+                "failed": row.failed,
+                "errored": row.errored,
+                "skipped": row.skipped,
+                "pass_rate": row.passed / executed if executed else None,
+            }
+        )
+    return trend
+
+
+def _window_start(days: int) -> date:
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def dtl_trend(db: Session, dtl_ids: list[int], days: int) -> list[dict[str, Any]]:
+    """Daily pass/fail/error counts summed over ``dtl_ids`` for the last ``days`` days."""
+
+    rollup = models.DTLRunRollup
+    rows = db.execute(
+        select(
+            rollup.day,
+            func.sum(rollup.passed).label("passed"),
+            func.sum(rollup.failed).label("failed"),
+            func.sum(rollup.errored).label("errored"),
+            func.sum(rollup.skipped).label("skipped"),
+        )
+        .where(rollup.dtl_id.in_(dtl_ids), rollup.day >= _window_start(days))
+        .group_by(rollup.day)
+        .order_by(rollup.day)
+    )
+    return _trend_rows(rows)
+
+
+def flaky_tests(db: Session, dtl_ids: list[int], days: int, limit: int = 50) -> list[dict[str, Any]]:
+    """Tests that both passed and failed (or errored) within the window, flakiest first.
+
+    Flakiness is the share of the minority outcome, so a test that passes and
+    fails equally often scores 0.5 and a stable test scores 0.
+    """
+
+    rollup = models.DTLTestRollup
+    rows = db.execute(
+        select(
+            rollup.test_id,
+            rollup.dtl_id,
+            models.DTLTest.name,
+            func.sum(rollup.passed).label("passed"),
+            func.sum(rollup.failed + rollup.errored).label("failing"),
+        )
+        .join(models.DTLTest, models.DTLTest.id == rollup.test_id)
+        .where(rollup.dtl_id.in_(dtl_ids), rollup.day >= _window_start(days))
+        .group_by(rollup.test_id, rollup.dtl_id, models.DTLTest.name)
+    )
+    report = []
+    for row in rows:
+        if not row.passed or not row.failing:
+            continue
+        report.append(
+            {
+                "test_id": row.test_id,
+                "dtl_id": row.dtl_id,
+                "name": row.name,
+                "passed": row.passed,
+                "failing": row.failing,
+                "flakiness": min(row.passed, row.failing) / (row.passed + row.failing),
+            }
+        )
+    report.sort(key=lambda item: item["flakiness"], reverse=True)
+    return report[:limit]
+
+
+def prune_test_runs(db: Session, horizon_days: int | None = None) -> int:
+    """Delete raw runs older than the retention horizon in batches and return the count.
+
+    The latest run of every test is kept so change-aware runs can still reuse it;
+    the daily rollups are not touched.
+    """
+
+    cutoff = datetime.utcnow() - timedelta(days=horizon_days or TEST_RUN_RETENTION_DAYS)
+    run = models.DTLTestRun
+    latest_ids = select(func.max(run.id)).group_by(run.test_id)
+    removed = 0
+    while True:
+        ids = db.scalars(
+            select(run.id)
+            .where(run.executed_at < cutoff, run.id.not_in(latest_ids))
+            .limit(PRUNE_BATCH_SIZE)
+        ).all()
+        if not ids:
+            break
+        db.execute(delete(run).where(run.id.in_(ids)))
+        db.commit()
+        removed += len(ids)
+    return removed
+
+
+if __name__ == "__main__":
+    from .database import SessionLocal
+
+    logging.basicConfig(level=logging.INFO)
+    session = SessionLocal()
+    try:
+        logger.info("Pruned %d test runs older than %d days.", prune_test_runs(session), TEST_RUN_RETENTION_DAYS)
+    finally:
+        session.close()
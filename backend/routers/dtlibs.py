@@ -1,23 +1,38 @@
 from __future__ import annotations
 
+import os
+import re
+import tempfile
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from .. import models, schemas
+from .. import alignment, amendments, archive, conditional, git_export, legal_spans, models, ontology_merge, owl_validation
+from .. import events, generation, purge, responses, rollups, schemas, segmenter, similarity
+from .. import overview as overview_snapshots
+from ..conditional import Validators
 from ..database import get_db
-from ..dependencies import resolve_dtlib
+from ..dependencies import get_dtlib_or_404, resolve_dtlib, target_exists
 from ..llm import llm_service
 from ..prompts import prompt_builder
+from ..query_budget import query_budget
+from ..test_runner import RunMode, run_dtlib_tests
+
+IMPORT_SPOOL_MEMORY_BYTES = int(os.getenv("ARCHIVE_SPOOL_MEMORY_MB", "8")) * 1024 * 1024
+# Upper bound on suggestions taken from one segmentation call (one chunk of the law).
+MAX_SEGMENTS_PER_CALL = 5
 
 router = APIRouter(prefix="/dtlibs", tags=["dtlibs"])
 
 
 @router.get("", response_model=List[schemas.DTLIBRead])
+@query_budget(1)
 def list_dtlibs(db: Session = Depends(get_db), search: str | None = None):
-    query = db.query(models.DTLIB)
+    query = db.query(models.DTLIB).filter(models.DTLIB.deleted_at.is_(None))
     if search:
         like = f"%{search}%"
         query = query.filter(models.DTLIB.law_name.ilike(like))
@@ -36,9 +51,53 @@ def create_dtlib(payload: schemas.DTLIBCreate, db: Session = Depends(get_db)):
     return dtlib
 
 
+@router.post("/import", response_model=schemas.DTLIBRead, status_code=status.HTTP_201_CREATED)
+async def import_dtlib(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    created_by: int,
+    db: Session = Depends(get_db),
+):
+    """Create a library from an archive produced by ``GET /dtlibs/{id}/export`` (raw tar body)."""
+
+    if not await run_in_threadpool(db.get, models.User, created_by):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="creator missing")
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES) as upload:
+        async for chunk in request.stream():
+            await run_in_threadpool(upload.write, chunk)
+        upload.seek(0)
+        try:
+            dtlib_id, dtl_ids = await run_in_threadpool(archive.import_archive, db, upload, created_by)
+        except archive.ArchiveError as exc:
+            await run_in_threadpool(db.rollback)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    for dtl_id in dtl_ids:
+        for graph in ("ontology", "configuration"):
+            background_tasks.add_task(owl_validation.validate_artifact, dtl_id, graph)
+    return await run_in_threadpool(db.get, models.DTLIB, dtlib_id)
+
+
+@router.post("/similar", response_model=List[schemas.SimilarDTLRead])
+def find_similar_dtls(payload: schemas.SimilarityQuery, db: Session = Depends(get_db)):
+    """Existing DTLs of any library whose legal text is near-identical to ``text``, with approved artifacts."""
+
+    matches = similarity.similar(
+        db,
+        payload.text,
+        limit=payload.limit,
+        min_similarity=similarity.MIN_SIMILARITY if payload.min_similarity is None else payload.min_similarity,
+    )
+    return [similarity.describe(dtl, score) for dtl, score in matches]
+
+
 @router.get("/{dtlib_id}", response_model=schemas.DTLIBRead)
-def get_dtlib(dtlib: models.DTLIB = Depends(resolve_dtlib)):
-    return dtlib
+@query_budget(2)
+def get_dtlib(dtlib_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = Validators.build("dtlib", dtlib_id, *conditional.dtlib_version(db, dtlib_id))
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    return get_dtlib_or_404(db, dtlib_id)
 
 
 @router.put("/{dtlib_id}", response_model=schemas.DTLIBRead)
@@ -56,33 +115,136 @@ def update_dtlib(
 
 
 @router.delete("/{dtlib_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_dtlib(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
-    db.delete(dtlib)
+def delete_dtlib(
+    background_tasks: BackgroundTasks, db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)
+):
+    """Hide the library at once and purge its rows in the background."""
+
+    dtlib.deleted_at = datetime.utcnow()
     db.commit()
+    background_tasks.add_task(purge.purge_dtlib, dtlib.id)
     return None
 
 
+@router.get("/{dtlib_id}/export")
+def export_dtlib(compression: archive.Compression = "gz", dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    """Stream the library, its DTLs, artifacts, tests and comments as a tar archive."""
+
+    suffix = "tar.gz" if compression == "gz" else "tar"
+    filename = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{dtlib.law_identifier}-{dtlib.version}") + f".{suffix}"
+    return StreamingResponse(
+        archive.stream_export(dtlib.id, compression),
+        media_type="application/gzip" if compression == "gz" else "application/x-tar",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.post("/{dtlib_id}/amendments/preview")
+def preview_amendment(
+    payload: schemas.AmendmentCreate, db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)
+):
+    """Section diff against ``full_text`` and the fate of each DTL, without changing anything."""
+
+    return amendments.report(*amendments.plan(db, dtlib, payload.full_text))
+
+
+@router.post("/{dtlib_id}/amendments", response_model=schemas.AmendmentRead, status_code=status.HTTP_201_CREATED)
+def amend_dtlib(
+    payload: schemas.AmendmentCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    """Move the library to a new version of its law; only DTLs over changed sections are regenerated."""
+
+    if payload.full_text == dtlib.full_text and payload.version == dtlib.version:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="version and full_text are unchanged")
+    amendment, successors = amendments.apply(
+        db, dtlib, version=payload.version, full_text=payload.full_text, effective_date=payload.effective_date
+    )
+    if payload.regenerate:
+        for successor_id, predecessor_id in successors:
+            background_tasks.add_task(generation.regenerate, successor_id, predecessor_id)
+    return amendment
+
+
+@router.get("/{dtlib_id}/amendments", response_model=List[schemas.AmendmentRead])
+def list_amendments(dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    return dtlib.amendments
+
+
+@router.get("/{dtlib_id}/structure", response_model=List[schemas.SectionRead])
+@query_budget(1)
+def get_structure(dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    """Section tree (divisions, §/articles, paragraphs, items, letters) parsed from ``full_text``."""
+
+    return segmenter.parse(dtlib.full_text or "")
+
+
+@router.post(
+    "/{dtlib_id}/segment/structural",
+    response_model=List[schemas.SegmentationSuggestionRead],
+    status_code=status.HTTP_201_CREATED,
+)
+def segment_dtlib_structurally(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    """Instant suggestions, one per § or article, without calling the LLM."""
+
+    if not dtlib.full_text:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="full_text required")
+    suggestions = []
+    for unit in segmenter.candidates(dtlib.full_text):
+        label = unit.label or "Full text"
+        suggestion = models.SegmentationSuggestion(
+            dtlib_id=dtlib.id,
+            suggestion_title=f"{label} {unit.title}" if unit.title else label,
+            suggestion_description=f"Structural {unit.kind}",
+            legal_reference=label,
+            alignment_method="structural",
+            alignment_confidence=1.0,
+        )
+        legal_spans.set_span(suggestion, unit.start, unit.end)
+        db.add(suggestion)
+        suggestions.append(suggestion)
+    db.commit()
+    for suggestion in suggestions:
+        db.refresh(suggestion)
+    return suggestions
+
+
 @router.post("/{dtlib_id}/segment", response_model=List[schemas.SegmentationSuggestionRead])
 def segment_dtlib(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    """LLM segmentation, one call per structural chunk of at most ``SEGMENTATION_CHUNK_CHARS``."""
+
     if not dtlib.full_text:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="full_text required")
-    prompt = prompt_builder.segmentation(
-        law_name=dtlib.law_name,
-        law_identifier=dtlib.law_identifier,
-        full_text=dtlib.full_text,
-    )
-    raw, parsed = llm_service.generate_structured(prompt)
 
+    text_index = alignment.index_for(dtlib.full_text)
     suggestions: list[models.SegmentationSuggestion] = []
-    if isinstance(parsed, dict) and isinstance(parsed.get("segments"), list):
-        for index, segment in enumerate(parsed["segments"][:5]):
+    for chunk_start, chunk_end in segmenter.chunks(dtlib.full_text):
+        prompt = prompt_builder.segmentation(
+            law_name=dtlib.law_name,
+            law_identifier=dtlib.law_identifier,
+            full_text=dtlib.full_text[chunk_start:chunk_end],
+        )
+        raw, parsed = llm_service.generate_structured(prompt)
+        if not (isinstance(parsed, dict) and isinstance(parsed.get("segments"), list)):
+            continue
+        hint = chunk_start
+        for segment in parsed["segments"][:MAX_SEGMENTS_PER_CALL]:
             suggestion = models.SegmentationSuggestion(
                 dtlib_id=dtlib.id,
-                suggestion_title=segment.get("title") or f"No AI static Segment {index + 1}",
+                suggestion_title=segment.get("title") or f"No AI static Segment {len(suggestions) + 1}",
                 suggestion_description=segment.get("description") or "Couldn't get suggestion from AI Agent",
                 legal_text=segment.get("legal_text") or "Couldn't get suggestion from AI Agent",
                 legal_reference=segment.get("legal_reference") or "Auto",
             )
+            # Segments usually come in document order, so prefer the occurrence after the previous one.
+            aligned = text_index.align(segment.get("legal_text") or "", hint)
+            if aligned is not None:
+                legal_spans.set_span(suggestion, aligned.start, aligned.end)
+                suggestion.alignment_method = aligned.method
+                suggestion.alignment_confidence = aligned.confidence
+                hint = aligned.end
             db.add(suggestion)
             suggestions.append(suggestion)
 
@@ -103,40 +265,145 @@ def segment_dtlib(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(r
     return suggestions
 
 
+@router.post("/{dtlib_id}/align", response_model=List[schemas.AlignmentRead | None])
+def align_excerpts(payload: schemas.AlignmentRequest, dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    """Locate excerpts in the library text (exact, normalized, then fuzzy); ``null`` where none matches."""
+
+    text_index = alignment.index_for(dtlib.full_text)
+    results = []
+    for excerpt in payload.excerpts:
+        aligned = text_index.align(excerpt)
+        results.append(
+            schemas.AlignmentRead(
+                start=aligned.start,
+                end=aligned.end,
+                confidence=aligned.confidence,
+                method=aligned.method,
+                text=dtlib.full_text[aligned.start : aligned.end],
+            )
+            if aligned
+            else None
+        )
+    return results
+
+
+@router.post("/{dtlib_id}/tests/run")
+def run_tests(
+    mode: RunMode = "all",
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    results = run_dtlib_tests(db, dtlib, mode)
+    db.commit()
+    return {"dtls": results}
+
+
+@router.get("/{dtlib_id}/tests/trends", response_model=List[schemas.TestTrendPoint])
+def test_trends(
+    days: int = Query(30, ge=1, le=rollups.TEST_RUN_RETENTION_DAYS),
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    dtl_ids = [dtl_id for (dtl_id,) in db.query(models.DTL.id).filter_by(dtlib_id=dtlib.id, deleted_at=None)]
+    return rollups.dtl_trend(db, dtl_ids, days)
+
+
+@router.get("/{dtlib_id}/tests/flaky", response_model=List[schemas.FlakyTestRead])
+def flaky_tests(
+    days: int = Query(30, ge=1, le=rollups.TEST_RUN_RETENTION_DAYS),
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    dtl_ids = [dtl_id for (dtl_id,) in db.query(models.DTL.id).filter_by(dtlib_id=dtlib.id, deleted_at=None)]
+    return rollups.flaky_tests(db, dtl_ids, days)
+
+
 @router.get("/{dtlib_id}/overview", response_model=schemas.OverviewSnapshot)
-def overview(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
-    dtls = db.query(models.DTL).filter_by(dtlib_id=dtlib.id).all()
-    status_map: dict[str, int] = {}
-    for dtl in dtls:
-        status_map[dtl.status] = status_map.get(dtl.status, 0) + 1
-    return schemas.OverviewSnapshot(
-        dtlib=dtlib,
-        dtls=dtls,
-        dtls_status=status_map,
-        aggregated_ontology=None,
-        aggregated_configuration=None,
-        interface_surface=[dtl.interface.interface_json for dtl in dtls if dtl.interface],
-        traceability=[{"dtl_id": dtl.id, "legal_reference": dtl.legal_reference} for dtl in dtls],
+@query_budget(14)
+def overview(dtlib_id: int, request: Request, db: Session = Depends(get_db)):
+    validators = Validators.build("overview", dtlib_id, *conditional.overview_version(db, dtlib_id))
+    if validators.matches(request):
+        return validators.not_modified()
+    dtlib = get_dtlib_or_404(db, dtlib_id)
+    return responses.FastJSONResponse(overview_snapshots.content(db, dtlib), headers=validators.headers)
+
+
+@router.get("/{dtlib_id}/ontology/conflicts", response_model=schemas.GraphConflictReport)
+def ontology_conflicts(
+    graph: ontology_merge.GraphKind = "ontology",
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    return schemas.GraphConflictReport(
+        graph=graph,
+        conflicts=ontology_merge.graph_conflicts(db, dtlib.id, graph),
+        parse_errors=ontology_merge.parse_errors(db, dtlib.id, graph),
     )
 
 
-@router.post("/{dtlib_id}/sync")
-def sync(db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
+@router.get("/{dtlib_id}/terms", response_model=List[schemas.DTLTermRead])
+def find_terms(
+    name: str,
+    kind: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    """DTLs declaring a class, property or datatype named ``name`` (or with IRI ``name``)."""
+
+    return owl_validation.find_terms(db, dtlib.id, name, kind, limit)
+
+
+@router.post("/{dtlib_id}/sync", response_model=schemas.SyncEventRead, status_code=status.HTTP_202_ACCEPTED)
+def sync(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    """Start an incremental export of the library to its git repository."""
+
     if not dtlib.repository_url or not dtlib.repository_branch:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="repository not configured")
+    if not git_export.git_available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="git is not installed on the server"
+        )
     event = models.GithubSyncEvent(
         dtlib_id=dtlib.id,
         repository_url=dtlib.repository_url,
         branch=dtlib.repository_branch,
-        commit_id="stub",
-        message="Sync placeholder",
-        status="Completed",
-        completed_at=datetime.utcnow(),
+        status="Started",
     )
     db.add(event)
     db.commit()
-    return {
-        "repository_url": dtlib.repository_url,
-        "branch": dtlib.repository_branch,
-        "commit_id": event.commit_id,
-    }
+    background_tasks.add_task(git_export.run_sync, event.id)
+    return event
+
+
+@router.get("/{dtlib_id}/sync", response_model=List[schemas.SyncEventRead])
+def list_sync_events(limit: int = 20, db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    return (
+        db.query(models.GithubSyncEvent)
+        .filter(models.GithubSyncEvent.dtlib_id == dtlib.id)
+        .order_by(models.GithubSyncEvent.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+@router.get("/{dtlib_id}/sync/{event_id}", response_model=schemas.SyncEventRead)
+def get_sync_event(event_id: int, db: Session = Depends(get_db), dtlib: models.DTLIB = Depends(resolve_dtlib)):
+    event = db.get(models.GithubSyncEvent, event_id)
+    if not event or event.dtlib_id != dtlib.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sync event not found")
+    return event
+
+
+@router.websocket("/{dtlib_id}/events")
+async def dtlib_events(websocket: WebSocket, dtlib_id: int):
+    """The change events of every DTL in the library (see the DTL ``/events`` socket)."""
+
+    if not await run_in_threadpool(target_exists, dtlib_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await events.stream(websocket, events.dtlib_topic(dtlib_id))
@@ -3,14 +3,20 @@ from __future__ import annotations
 from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-
-from .. import models, schemas
-from ..database import get_db
-from ..dependencies import get_dtlib_or_404, resolve_dtlib, resolve_dtl
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+
+from .. import benchmark, bundles, conditional, legal_spans, models, owl_validation, rollups, schemas
+from .. import amendments, events, generation, purge, responses, similarity
+from ..conditional import Validators
+from ..database import get_db, get_primary_db
+from ..dependencies import get_dtl_or_404, get_dtlib_or_404, resolve_dtlib, resolve_dtl, target_exists
 from ..llm import llm_service
 from ..prompts import prompt_builder
+from ..query_budget import query_budget
+from ..test_runner import RunMode, run_dtl_tests
 
 router = APIRouter(prefix="/dtlibs/{dtlib_id}/dtls", tags=["dtls"])
 
@@ -40,18 +46,68 @@ def _serialize_comment(comment: models.DTLComment) -> schemas.CommentRead:
     )
 
 
+def _serialize_interface(dtl: models.DTL) -> schemas.InterfacePayload:
+    data = dtl.interface.interface_json
+    return schemas.InterfacePayload(
+        function_name=data.get("function_name", dtl.title),
+        inputs=data.get("inputs", []),
+        outputs=data.get("outputs", []),
+        mcp_spec=dtl.interface.mcp_spec,
+    )
+
+
+def _serialize_review(review: models.DTLReview) -> schemas.ReviewRead:
+    return schemas.ReviewRead(
+        status=review.status,
+        approved_version=review.approved_version,
+        approved_at=review.approved_at,
+        last_comment=review.last_comment,
+    )
+
+
+BUNDLE_SECTIONS = ("dtl", "ontology", "interface", "configuration", "tests", "logic", "review", "comments")
+
+_BUNDLE_LOADERS = {
+    "ontology": joinedload(models.DTL.ontology),
+    "interface": joinedload(models.DTL.interface),
+    "configuration": joinedload(models.DTL.configuration),
+    "logic": joinedload(models.DTL.logic),
+    "review": joinedload(models.DTL.review),
+    "tests": selectinload(models.DTL.tests),
+    "comments": selectinload(models.DTL.comments),
+}
+
+
+def _parse_bundle_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(BUNDLE_SECTIONS)
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(BUNDLE_SECTIONS))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"unknown bundle fields: {', '.join(unknown)}",
+        )
+    return requested
+
+
 @router.get("", response_model=List[schemas.DTLRead])
+@query_budget(2)
 def list_dtls(
     dtlib_id: int,
     db: Session = Depends(get_db),
     search: str | None = None,
+    include_retired: bool = False,
 ):
-    get_dtlib_or_404(db, dtlib_id)
-    query = db.query(models.DTL).filter_by(dtlib_id=dtlib_id)
+    dtlib = get_dtlib_or_404(db, dtlib_id)
+    statement = responses.select_dtls(models.DTL.dtlib_id == dtlib_id)
+    if not include_retired:
+        statement = statement.where(models.DTL.status.notin_(amendments.RETIRED_STATUSES))
     if search:
         like = f"%{search}%"
-        query = query.filter(models.DTL.title.ilike(like))
-    return query.order_by(models.DTL.position).all()
+        statement = statement.where(models.DTL.title.ilike(like))
+    rows = db.execute(statement.order_by(models.DTL.position))
+    return responses.FastJSONResponse(responses.dtl_rows(rows, dtlib.full_text))
 
 
 @router.post("", response_model=schemas.DTLRead, status_code=status.HTTP_201_CREATED)
@@ -67,9 +123,34 @@ def create_dtl(
     return dtl
 
 
+@router.get("/covering", response_model=List[schemas.DTLRead])
+def covering_dtls(
+    start: int | None = Query(None, ge=0),
+    end: int | None = Query(None, ge=0),
+    text: str | None = None,
+    db: Session = Depends(get_db),
+    dtlib: models.DTLIB = Depends(resolve_dtlib),
+):
+    """DTLs whose legal text span overlaps ``[start, end)`` of the library text, or the passage ``text``."""
+
+    if text is not None:
+        located = legal_spans.locate(dtlib.full_text, text)
+        if located is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="text not found in library")
+        start, end = located
+    if start is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start or text required")
+    return legal_spans.covering(db, models.DTL, dtlib.id, start, end if end is not None else start)
+
+
 @router.get("/{dtl_id}", response_model=schemas.DTLRead)
-def get_dtl(dtl: models.DTL = Depends(resolve_dtl)):
-    return dtl
+@query_budget(3)
+def get_dtl(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = Validators.build("dtl", dtl_id, *conditional.dtl_version(db, dtlib_id, dtl_id))
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    return get_dtl_or_404(db, dtlib_id, dtl_id)
 
 
 @router.put("/{dtl_id}", response_model=schemas.DTLRead)
@@ -87,22 +168,160 @@ def update_dtl(
 
 
 @router.delete("/{dtl_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_dtl(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
-    db.delete(dtl)
+def delete_dtl(
+    background_tasks: BackgroundTasks, db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)
+):
+    """Hide the DTL at once and purge it with its tests, runs and artifacts in the background."""
+
+    dtl.deleted_at = datetime.utcnow()
     db.commit()
+    background_tasks.add_task(purge.purge_dtl, dtl.id)
     return None
 
 
-@router.get("/{dtl_id}/ontology", response_model=schemas.OntologyPayload | None)
-def get_ontology(dtl: models.DTL = Depends(resolve_dtl)):
-    if not dtl.ontology:
+@router.get("/{dtl_id}/bundle", response_model=schemas.DTLBundle, response_model_exclude_unset=True)
+@query_budget(7)
+def get_bundle(
+    dtlib_id: int,
+    dtl_id: int,
+    request: Request,
+    response: Response,
+    fields: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """Everything the workflow UI shows for one DTL, loaded in a fixed number of queries.
+
+    One-to-one artifacts are joined onto the DTL row; tests and comments are
+    fetched with one ``SELECT ... IN`` each. ``fields`` is a comma separated
+    subset of the sections to return; omitted sections are neither loaded nor
+    present in the response.
+    """
+
+    sections = _parse_bundle_fields(fields)
+    validators = Validators.build(
+        f"bundle:{','.join(sections)}", dtl_id, *conditional.bundle_version(db, dtlib_id, dtl_id)
+    )
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+
+    dtl = (
+        db.query(models.DTL)
+        .options(*(_BUNDLE_LOADERS[section] for section in sections if section in _BUNDLE_LOADERS))
+        .filter(models.DTL.id == dtl_id, models.DTL.dtlib_id == dtlib_id, models.DTL.deleted_at.is_(None))
+        .one_or_none()
+    )
+    if not dtl:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DTL not found")
+
+    bundle: dict = {}
+    if "dtl" in sections:
+        bundle["dtl"] = schemas.DTLRead.model_validate(dtl)
+    if "ontology" in sections:
+        bundle["ontology"] = (
+            schemas.OntologyPayload(ontology_owl=dtl.ontology.ontology_owl) if dtl.ontology else None
+        )
+    if "interface" in sections:
+        bundle["interface"] = _serialize_interface(dtl) if dtl.interface else None
+    if "configuration" in sections:
+        bundle["configuration"] = (
+            schemas.ConfigurationPayload(configuration_owl=dtl.configuration.configuration_owl)
+            if dtl.configuration
+            else None
+        )
+    if "tests" in sections:
+        bundle["tests"] = [_serialize_test(test) for test in dtl.tests]
+    if "logic" in sections:
+        bundle["logic"] = (
+            schemas.LogicPayload(language=dtl.logic.language, code=dtl.logic.code) if dtl.logic else None
+        )
+    if "review" in sections:
+        bundle["review"] = (
+            _serialize_review(dtl.review)
+            if dtl.review
+            else schemas.ReviewRead(status="Pending", approved_version=None, approved_at=None, last_comment=None)
+        )
+    if "comments" in sections:
+        bundle["comments"] = [
+            _serialize_comment(comment) for comment in sorted(dtl.comments, key=lambda c: c.created_at)
+        ]
+    bundle["versions"] = bundles.section_versions(dtl, sections)
+    return schemas.DTLBundle(**bundle)
+
+
+@router.patch("/{dtl_id}/bundle", response_model=schemas.DTLBundleSaveResult)
+def save_bundle(
+    dtlib_id: int,
+    dtl_id: int,
+    payload: schemas.DTLBundleUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
+    """Save any subset of the workflow sections in one transaction.
+
+    The DTL row is locked for the duration so concurrent saves serialize on the
+    ``base_versions`` check instead of overwriting each other.
+    """
+
+    dtl = (
+        db.query(models.DTL)
+        .options(*_BUNDLE_LOADERS.values())
+        .filter(models.DTL.id == dtl_id, models.DTL.dtlib_id == dtlib_id, models.DTL.deleted_at.is_(None))
+        .with_for_update(of=models.DTL)
+        .one_or_none()
+    )
+    if not dtl:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="DTL not found")
+
+    applied = bundles.apply_bundle_update(db, dtl, payload)
+    if {"ontology", "configuration"} & set(applied):
+        owl_validation.schedule(background_tasks, dtl)
+    if applied:
+        try:
+            db.commit()
+        except StaleDataError as exc:
+            # A test row changed between the ``base_versions`` check and the UPDATE.
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={"message": "bundle was modified concurrently", "sections": ["tests"]},
+            ) from exc
+        db.refresh(dtl)
+    else:
+        db.rollback()
+    return schemas.DTLBundleSaveResult(
+        applied=applied,
+        versions=bundles.section_versions(dtl, list(BUNDLE_SECTIONS)),
+    )
+
+
+def _artifact_validators(
+    db: Session, request: Request, response: Response, dtlib_id: int, dtl_id: int, model: type
+) -> Validators | Response | None:
+    version = conditional.artifact_version(db, dtlib_id, dtl_id, model)
+    if version is None:
         return None
-    return schemas.OntologyPayload(ontology_owl=dtl.ontology.ontology_owl)
+    validators = Validators.build(model.__tablename__, dtl_id, *version)
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    return validators
+
+
+@router.get("/{dtl_id}/ontology", response_model=schemas.OntologyPayload | None)
+@query_budget(2)
+def get_ontology(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = _artifact_validators(db, request, response, dtlib_id, dtl_id, models.DTLOntology)
+    if not isinstance(validators, Validators):
+        return validators
+    ontology = db.get(models.DTLOntology, dtl_id)
+    return schemas.OntologyPayload(ontology_owl=ontology.ontology_owl)
 
 
 @router.put("/{dtl_id}/ontology", response_model=schemas.OntologyPayload)
 def save_ontology(
     payload: schemas.OntologyPayload,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     dtl: models.DTL = Depends(resolve_dtl),
 ):
@@ -112,12 +331,17 @@ def save_ontology(
         dtl.ontology = models.DTLOntology(
             ontology_owl=payload.ontology_owl)
     db.add(dtl)
+    owl_validation.schedule(background_tasks, dtl)
     db.commit()
     return payload
 
 
 @router.post("/{dtl_id}/ontology/generate", response_model=schemas.OntologyPayload)
-def generate_ontology(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+def generate_ontology(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
     prompt = prompt_builder.ontology(
         title=dtl.title,
         legal_text=dtl.legal_text[:2000],
@@ -133,21 +357,18 @@ def generate_ontology(db: Session = Depends(get_db), dtl: models.DTL = Depends(r
         dtl.ontology = models.DTLOntology(ontology_owl=ontology_owl)
 
     db.add(dtl)
+    owl_validation.schedule(background_tasks, dtl)
     db.commit()
     return schemas.OntologyPayload(ontology_owl=dtl.ontology.ontology_owl)
 
 
 @router.get("/{dtl_id}/interface", response_model=schemas.InterfacePayload | None)
-def get_interface(dtl: models.DTL = Depends(resolve_dtl)):
-    if not dtl.interface:
-        return None
-    data = dtl.interface.interface_json
-    return schemas.InterfacePayload(
-        function_name=data.get("function_name", dtl.title),
-        inputs=data.get("inputs", []),
-        outputs=data.get("outputs", []),
-        mcp_spec=dtl.interface.mcp_spec,
-    )
+@query_budget(4)
+def get_interface(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = _artifact_validators(db, request, response, dtlib_id, dtl_id, models.DTLInterface)
+    if not isinstance(validators, Validators):
+        return validators
+    return _serialize_interface(get_dtl_or_404(db, dtlib_id, dtl_id))
 
 
 @router.put("/{dtl_id}/interface", response_model=schemas.InterfacePayload)
@@ -212,15 +433,21 @@ def generate_interface(db: Session = Depends(get_db), dtl: models.DTL = Depends(
 
 
 @router.get("/{dtl_id}/configuration", response_model=schemas.ConfigurationPayload | None)
-def get_configuration(dtl: models.DTL = Depends(resolve_dtl)):
-    if not dtl.configuration:
-        return None
-    return schemas.ConfigurationPayload(configuration_owl=dtl.configuration.configuration_owl)
+@query_budget(2)
+def get_configuration(
+    dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)
+):
+    validators = _artifact_validators(db, request, response, dtlib_id, dtl_id, models.DTLConfiguration)
+    if not isinstance(validators, Validators):
+        return validators
+    configuration = db.get(models.DTLConfiguration, dtl_id)
+    return schemas.ConfigurationPayload(configuration_owl=configuration.configuration_owl)
 
 
 @router.put("/{dtl_id}/configuration", response_model=schemas.ConfigurationPayload)
 def save_configuration(
     payload: schemas.ConfigurationPayload,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     dtl: models.DTL = Depends(resolve_dtl),
 ):
@@ -229,12 +456,17 @@ def save_configuration(
     else:
         dtl.configuration = models.DTLConfiguration(configuration_owl=payload.configuration_owl)
     db.add(dtl)
+    owl_validation.schedule(background_tasks, dtl)
     db.commit()
     return payload
 
 
 @router.post("/{dtl_id}/configuration/generate", response_model=schemas.ConfigurationPayload)
-def generate_configuration(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+def generate_configuration(
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
     prompt = prompt_builder.configuration(title=dtl.title, legal_text=dtl.legal_text[:1500])
     raw, parsed = llm_service.generate_structured(prompt)
     configuration_owl = raw
@@ -247,13 +479,31 @@ def generate_configuration(db: Session = Depends(get_db), dtl: models.DTL = Depe
         dtl.configuration = models.DTLConfiguration(configuration_owl=configuration_owl)
 
     db.add(dtl)
+    owl_validation.schedule(background_tasks, dtl)
     db.commit()
     return schemas.ConfigurationPayload(configuration_owl=configuration_owl)
 
 
+@router.get("/{dtl_id}/validation", response_model=List[schemas.OWLValidationRead])
+def get_validation(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+    return owl_validation.validation_report(db, dtl)
+
+
+@router.post("/{dtl_id}/validation", response_model=List[schemas.OWLValidationRead])
+def run_validation(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+    owl_validation.validate_now(db, dtl)
+    return owl_validation.validation_report(db, dtl)
+
+
 @router.get("/{dtl_id}/tests", response_model=List[schemas.TestCaseRead])
-def list_tests(dtl: models.DTL = Depends(resolve_dtl)):
-    return [_serialize_test(test) for test in dtl.tests]
+@query_budget(3)
+def list_tests(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = Validators.build("tests", dtl_id, *conditional.tests_version(db, dtlib_id, dtl_id))
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    tests = db.query(models.DTLTest).filter_by(dtl_id=dtl_id).all()
+    return [_serialize_test(test) for test in tests]
 
 
 @router.post("/{dtl_id}/tests", response_model=schemas.TestCaseRead, status_code=status.HTTP_201_CREATED)
@@ -275,7 +525,26 @@ def create_test(
     return _serialize_test(test)
 
 
+@router.get("/{dtl_id}/tests/trends", response_model=List[schemas.TestTrendPoint])
+def test_trends(
+    days: int = Query(30, ge=1, le=rollups.TEST_RUN_RETENTION_DAYS),
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    return rollups.dtl_trend(db, [dtl.id], days)
+
+
+@router.get("/{dtl_id}/tests/flaky", response_model=List[schemas.FlakyTestRead])
+def flaky_tests(
+    days: int = Query(30, ge=1, le=rollups.TEST_RUN_RETENTION_DAYS),
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    return rollups.flaky_tests(db, [dtl.id], days)
+
+
 @router.get("/{dtl_id}/tests/{test_id}", response_model=schemas.TestCaseRead)
+@query_budget(3)
 def get_test(
     test_id: int,
     db: Session = Depends(get_db),
@@ -325,14 +594,12 @@ def delete_test(
 
 
 @router.post("/{dtl_id}/tests/run")
-def run_tests(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
-    tests = db.query(models.DTLTest).filter_by(dtl_id=dtl.id).all()
-    results = []
-    for test in tests:
-        test.last_run_at = datetime.utcnow()
-        test.last_result = "Not Run"
-        db.add(test)
-        results.append({"test_id": test.id, "result": test.last_result})
+def run_tests(
+    mode: RunMode = "all",
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    results = run_dtl_tests(db, dtl, mode)
     db.commit()
     return {"results": results}
 
@@ -373,10 +640,13 @@ def generate_tests(db: Session = Depends(get_db), dtl: models.DTL = Depends(reso
 
 
 @router.get("/{dtl_id}/logic", response_model=schemas.LogicPayload | None)
-def get_logic(dtl: models.DTL = Depends(resolve_dtl)):
-    if not dtl.logic:
-        return None
-    return schemas.LogicPayload(language=dtl.logic.language, code=dtl.logic.code)
+@query_budget(2)
+def get_logic(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = _artifact_validators(db, request, response, dtlib_id, dtl_id, models.DTLLogic)
+    if not isinstance(validators, Validators):
+        return validators
+    logic = db.get(models.DTLLogic, dtl_id)
+    return schemas.LogicPayload(language=logic.language, code=logic.code)
 
 
 @router.put("/{dtl_id}/logic", response_model=schemas.LogicPayload)
@@ -395,6 +665,30 @@ def save_logic(
     return payload
 
 
+@router.post("/{dtl_id}/logic/benchmark", response_model=schemas.BenchmarkRead)
+def benchmark_logic(
+    samples: int = Query(500, ge=1, le=100_000),
+    seed: int = 0,
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    if not dtl.logic:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="logic required")
+    run = benchmark.run_benchmark(db, dtl, samples=samples, seed=seed)
+    db.commit()
+    db.refresh(run)
+    comparison = benchmark.compare(run, benchmark.baseline_for(db, run))
+    return schemas.BenchmarkRead.model_validate(run).model_copy(update=comparison)
+
+
+@router.get("/{dtl_id}/logic/benchmarks", response_model=List[schemas.BenchmarkRead])
+def list_benchmarks(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+    return [
+        schemas.BenchmarkRead.model_validate(run).model_copy(update=comparison)
+        for run, comparison in benchmark.history(db, dtl.id)
+    ]
+
+
 @router.post("/{dtl_id}/logic/generate", response_model=schemas.LogicPayload)
 def generate_logic(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
     prompt = prompt_builder.logic(title=dtl.title, legal_text=dtl.legal_text[:1200])
@@ -421,148 +715,60 @@ def generate_logic(db: Session = Depends(get_db), dtl: models.DTL = Depends(reso
     return schemas.LogicPayload(language=language, code=annotated_code)
 
 
-@router.post("/{dtl_id}/generate-all", response_model=schemas.DTLGenerationResponse)
-def generate_all_artifacts(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
-    ontology_prompt = prompt_builder.ontology(title=dtl.title, legal_text=dtl.legal_text[:2000])
-    ontology_raw, ontology_parsed = llm_service.generate_structured(ontology_prompt)
-    ontology_owl = (
-        ontology_parsed.get("ontology_owl")
-        if isinstance(ontology_parsed, dict) and ontology_parsed.get("ontology_owl")
-        else ontology_raw
-    )
-
-    interface_prompt = prompt_builder.interface(title=dtl.title, legal_text=dtl.legal_text[:1500])
-    interface_raw, interface_parsed = llm_service.generate_structured(interface_prompt)
-    interface_defaults = {
-        "function_name": dtl.title,
-        "inputs": [],
-        "outputs": [],
-        "mcp_spec": {"hint": interface_raw},
-    }
-    interface_data = interface_defaults | (
-        {k: v for k, v in interface_parsed.items() if k in interface_defaults}
-        if isinstance(interface_parsed, dict)
-        else {}
-    )
-    interface_json = {
-        "function_name": interface_data.get("function_name") or dtl.title,
-        "inputs": interface_data.get("inputs") or [{"name": "input", "description": interface_raw[:200]}],
-        "outputs": interface_data.get("outputs") or [{"name": "result", "description": interface_raw[:200]}],
-    }
-    mcp_spec = interface_data.get("mcp_spec")
-
-    configuration_prompt = prompt_builder.configuration(title=dtl.title, legal_text=dtl.legal_text[:1500])
-    configuration_raw, configuration_parsed = llm_service.generate_structured(configuration_prompt)
-    configuration_owl = (
-        configuration_parsed.get("configuration_owl")
-        if isinstance(configuration_parsed, dict) and configuration_parsed.get("configuration_owl")
-        else configuration_raw
-    )
-
-    tests_prompt = prompt_builder.tests(title=dtl.title, legal_text=dtl.legal_text[:1500])
-    tests_raw, tests_parsed = llm_service.generate_structured(tests_prompt)
-
-    for test in list(dtl.tests):
-        db.delete(test)
-
-    generated_tests: list[models.DTLTest] = []
-    if isinstance(tests_parsed, dict) and isinstance(tests_parsed.get("tests"), list):
-        for index, proposed in enumerate(tests_parsed["tests"]):
-            test = models.DTLTest(
-                dtl_id=dtl.id,
-                name=proposed.get("name") or f"LLM Test {index + 1}",
-                input_json=proposed.get("input") or {"hint": tests_raw[:80]},
-                expected_output_json=proposed.get("expected_output") or {"expected": tests_raw[:80]},
-                description=proposed.get("description") or tests_raw[:255],
-            )
-            db.add(test)
-            generated_tests.append(test)
-
-    if not generated_tests:
-        fallback = models.DTLTest(
-            dtl_id=dtl.id,
-            name="LLM Proposed Test",
-            input_json={"prompt": tests_raw[:120]},
-            expected_output_json={"expected": tests_raw[:120]},
-            description=tests_raw[:255],
-        )
-        db.add(fallback)
-        generated_tests.append(fallback)
-
-    logic_prompt = prompt_builder.logic(title=dtl.title, legal_text=dtl.legal_text[:1200])
-    logic_raw, logic_parsed = llm_service.generate_structured(logic_prompt)
-    logic_language = "Python"
-    logic_code = logic_raw
-    if isinstance(logic_parsed, dict):
-        logic_language = logic_parsed.get("language") or logic_language
-        if logic_parsed.get("code"):
-            logic_code = logic_parsed["code"]
-    logic_payload = schemas.LogicPayload(
-        language=logic_language, code=f"# LLM Hint: {logic_raw[:200]}\n{logic_code}"
+@router.get("/{dtl_id}/similar", response_model=List[schemas.SimilarDTLRead])
+@query_budget(11)
+def similar_dtls(
+    limit: int = Query(10, ge=1, le=100),
+    min_similarity: float | None = Query(None, ge=0, le=1),
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    matches = similarity.similar(
+        db,
+        dtl.legal_text or "",
+        limit=limit,
+        min_similarity=similarity.MIN_SIMILARITY if min_similarity is None else min_similarity,
+        exclude_dtl_id=dtl.id,
     )
+    return [similarity.describe(match, score) for match, score in matches]
 
-    if dtl.ontology:
-        dtl.ontology.ontology_owl = ontology_owl
-    else:
-        dtl.ontology = models.DTLOntology(
-            ontology_owl=ontology_owl)
 
-    if dtl.interface:
-        dtl.interface.interface_json = interface_json
-        dtl.interface.mcp_spec = mcp_spec
-    else:
-        dtl.interface = models.DTLInterface(interface_json=interface_json, mcp_spec=mcp_spec)
-
-    if dtl.configuration:
-        dtl.configuration.configuration_owl = configuration_owl
-    else:
-        dtl.configuration = models.DTLConfiguration(configuration_owl=configuration_owl)
-
-    if dtl.logic:
-        dtl.logic.language = logic_payload.language
-        dtl.logic.code = logic_payload.code
-    else:
-        dtl.logic = models.DTLLogic(language=logic_payload.language, code=logic_payload.code)
-
-    db.add(dtl)
-    db.commit()
-    for test in generated_tests:
-        db.refresh(test)
+@router.post("/{dtl_id}/generate-all", response_model=schemas.DTLGenerationResponse)
+def generate_all_artifacts(
+    background_tasks: BackgroundTasks,
+    reuse: generation.ReuseMode = "none",
+    db: Session = Depends(get_db),
+    dtl: models.DTL = Depends(resolve_dtl),
+):
+    """Generate every artifact with the LLM.
 
-    return schemas.DTLGenerationResponse(
-        ontology=schemas.OntologyPayload(
-            ontology_owl=ontology_owl, raw_response=ontology_raw
-        ),
-        ontology_raw=ontology_raw,
-        interface=schemas.InterfacePayload(
-            function_name=interface_json["function_name"],
-            inputs=interface_json.get("inputs", []),
-            outputs=interface_json.get("outputs", []),
-            mcp_spec=mcp_spec,
-        ),
-        interface_raw=interface_raw,
-        configuration=schemas.ConfigurationPayload(configuration_owl=configuration_owl),
-        configuration_raw=configuration_raw,
-        tests=[_serialize_test(test) for test in generated_tests],
-        tests_raw=tests_raw,
-        logic=logic_payload,
-        logic_raw=logic_raw,
-    )
+    ``reuse=copy`` takes over the artifacts of the most similar approved DTL
+    (at least ``SIMILARITY_REUSE_MIN`` similar) instead; ``reuse=seed`` gives
+    them to the LLM as a starting point.
+    """
 
+    source = similarity.best_approved_source(db, dtl) if reuse != "none" else None
+    result = generation.generate_all(db, dtl, mode=reuse, source=source)
+    owl_validation.schedule(background_tasks, dtl)
+    return schemas.DTLGenerationResponse(**{**result, "tests": [_serialize_test(test) for test in result["tests"]]})
 
 @router.get("/{dtl_id}/review", response_model=schemas.ReviewRead)
-def review_summary(db: Session = Depends(get_db), dtl: models.DTL = Depends(resolve_dtl)):
+@query_budget(7)
+def review_summary(
+    dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_primary_db)
+):
+    """Creates the pending review on first read, so it always runs on the primary."""
+
+    validators = _artifact_validators(db, request, response, dtlib_id, dtl_id, models.DTLReview)
+    if isinstance(validators, Response):
+        return validators
+    dtl = get_dtl_or_404(db, dtlib_id, dtl_id)
     if not dtl.review:
         dtl.review = models.DTLReview(status="Pending")
         db.add(dtl)
         db.commit()
         db.refresh(dtl)
-    return schemas.ReviewRead(
-        status=dtl.review.status,
-        approved_version=dtl.review.approved_version,
-        approved_at=dtl.review.approved_at,
-        last_comment=dtl.review.last_comment,
-    )
+    return _serialize_review(dtl.review)
 
 
 @router.post("/{dtl_id}/approve", response_model=schemas.ReviewRead)
@@ -579,12 +785,7 @@ def approve_dtl(
     dtl.review.last_comment = payload.comment if payload else None
     db.add(dtl)
     db.commit()
-    return schemas.ReviewRead(
-        status=dtl.review.status,
-        approved_version=dtl.review.approved_version,
-        approved_at=dtl.review.approved_at,
-        last_comment=dtl.review.last_comment,
-    )
+    return _serialize_review(dtl.review)
 
 
 @router.post("/{dtl_id}/request-revision", response_model=schemas.ReviewRead)
@@ -599,17 +800,17 @@ def request_revision(
     dtl.review.last_comment = payload.comment if payload else None
     db.add(dtl)
     db.commit()
-    return schemas.ReviewRead(
-        status=dtl.review.status,
-        approved_version=dtl.review.approved_version,
-        approved_at=dtl.review.approved_at,
-        last_comment=dtl.review.last_comment,
-    )
+    return _serialize_review(dtl.review)
 
 
 @router.get("/{dtl_id}/comments", response_model=List[schemas.CommentRead])
-def list_comments(dtl: models.DTL = Depends(resolve_dtl)):
-    comments = sorted(dtl.comments, key=lambda c: c.created_at)
+@query_budget(3)
+def list_comments(dtlib_id: int, dtl_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    validators = Validators.build("comments", dtl_id, *conditional.comments_version(db, dtlib_id, dtl_id))
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    comments = db.query(models.DTLComment).filter_by(dtl_id=dtl_id).order_by(models.DTLComment.created_at).all()
     return [_serialize_comment(comment) for comment in comments]
 
 
@@ -632,3 +833,13 @@ def add_comment(
     db.commit()
     db.refresh(comment)
     return _serialize_comment(comment)
+
+
+@router.websocket("/{dtl_id}/events")
+async def dtl_events(websocket: WebSocket, dtlib_id: int, dtl_id: int):
+    """Push a small JSON event after every commit that touches the DTL or its artifacts, tests, review or comments."""
+
+    if not await run_in_threadpool(target_exists, dtlib_id, dtl_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await events.stream(websocket, events.dtl_topic(dtl_id))
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+SANDBOX_TIMEOUT_SECONDS = float(os.getenv("SANDBOX_TIMEOUT_SECONDS", "10"))
+SANDBOX_MEMORY_LIMIT_MB = int(os.getenv("SANDBOX_MEMORY_LIMIT_MB", "512"))
+# The runner only writes to its stdout pipe; this caps any file the logic tries to write.
+SANDBOX_FILE_LIMIT_BYTES = 1024 * 1024
+# The child's whole environment: no database URL, API keys or other settings of the backend.
+_ENVIRONMENT = {"PATH": os.defpath}
+
+# Executed with ``python -I -c`` and a bare environment so the generated code never
+# shares an interpreter, sys.path or the API's environment variables with the backend.
+_RUNNER = r"""
+import io, json, sys, time, tracemalloc
+
+request = json.load(sys.stdin)
+result_stream, sys.stdout = sys.stdout, io.StringIO()
+namespace = {"__name__": "dtl_logic"}
+response = {"calls": [], "load_error": None, "memory_peak_kb": None}
+
+def _resolve(name):
+    candidate = namespace.get(name) if name else None
+    if callable(candidate):
+        return candidate
+    functions = [
+        value for value in namespace.values()
+        if callable(value) and getattr(value, "__module__", None) == "dtl_logic"
+        and hasattr(value, "__code__")
+    ]
+    return functions[-1] if functions else None
+
+try:
+    exec(compile(request["code"], "<dtl_logic>", "exec"), namespace)
+    function = _resolve(request.get("function_name"))
+    if function is None:
+        raise LookupError("no callable entry point found in logic code")
+except BaseException as exc:
+    response["load_error"] = f"{type(exc).__name__}: {exc}"
+else:
+    if request.get("trace_memory"):
+        tracemalloc.start()
+    for payload in request["inputs"]:
+        started = time.perf_counter()
+        try:
+            output = function(**payload) if isinstance(payload, dict) else function(payload)
+            error = None
+        except BaseException as exc:
+            output = None
+            error = f"{type(exc).__name__}: {exc}"
+        duration_ms = (time.perf_counter() - started) * 1000
+        response["calls"].append({"output": output, "error": error, "duration_ms": duration_ms})
+    if request.get("trace_memory"):
+        response["memory_peak_kb"] = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+result_stream.write(json.dumps(response, default=repr))
+"""
+
+
+@dataclass
+class CallResult:
+    output: Any = None
+    error: Optional[str] = None
+    duration_ms: float = 0.0
+
+
+@dataclass
+class SandboxResult:
+    calls: List[CallResult] = field(default_factory=list)
+    load_error: Optional[str] = None
+    memory_peak_kb: Optional[float] = None
+
+
+def supports(language: Optional[str]) -> bool:
+    """Whether logic written in ``language`` can be executed here; only Python can."""
+
+    return (language or "").strip().lower() == "python"
+
+
+def _limit_resources(timeout: float) -> None:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - non-POSIX platforms
+        return
+    limit = SANDBOX_MEMORY_LIMIT_MB * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    # CPU time backs up the wall-clock timeout should the parent fail to kill the child.
+    cpu_seconds = math.ceil(timeout) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (SANDBOX_FILE_LIMIT_BYTES, SANDBOX_FILE_LIMIT_BYTES))
+
+
+def execute(
+    code: str,
+    function_name: str | None,
+    inputs: Sequence[Any],
+    *,
+    trace_memory: bool = False,
+    timeout: float | None = None,
+) -> SandboxResult:
+    """Run ``code`` in an isolated interpreter and call its entry point once per input.
+
+    Dict inputs are passed as keyword arguments, anything else positionally. A
+    failure to load the code or a timeout is reported on ``load_error`` instead of
+    raising, so callers can record it against every affected test.
+    """
+
+    request = json.dumps(
+        {
+            "code": code,
+            "function_name": function_name,
+            "inputs": list(inputs),
+            "trace_memory": trace_memory,
+        },
+        default=str,
+    )
+    timeout = timeout or SANDBOX_TIMEOUT_SECONDS
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-I", "-c", _RUNNER],
+            input=request,
+            capture_output=True,
+            text=True,
+            env=_ENVIRONMENT,
+            timeout=timeout,
+            preexec_fn=functools.partial(_limit_resources, timeout) if os.name == "posix" else None,
+        )
+    except subprocess.TimeoutExpired:
+        return SandboxResult(load_error=f"Timeout: exceeded {timeout}s")
+
+    try:
+        response = json.loads(completed.stdout)
+    except ValueError:
+        logger.warning("Sandbox produced no result (exit code %s): %s", completed.returncode, completed.stderr[-500:])
+        return SandboxResult(load_error=f"Sandbox exited with code {completed.returncode}")
+
+    return SandboxResult(
+        calls=[CallResult(**call) for call in response["calls"]],
+        load_error=response["load_error"],
+        memory_peak_kb=response["memory_peak_kb"],
+    )
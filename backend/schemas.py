@@ -89,6 +89,9 @@ class DTLUpdate(BaseModel):
 class DTLRead(DTLBase):
     id: int
     dtlib_id: int
+    supersedes_id: Optional[int] = None
+    legal_text_start: Optional[int] = None
+    legal_text_end: Optional[int] = None
     created_at: datetime
     updated_at: datetime
 
@@ -106,12 +109,57 @@ class SegmentationSuggestionCreate(BaseModel):
 class SegmentationSuggestionRead(SegmentationSuggestionCreate):
     id: int
     dtlib_id: int
+    legal_text_start: Optional[int] = None
+    legal_text_end: Optional[int] = None
+    alignment_method: Optional[str] = None
+    alignment_confidence: Optional[float] = None
     status: str
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class SectionRead(BaseModel):
+    kind: str
+    label: str
+    title: Optional[str] = None
+    start: int
+    end: int
+    children: List["SectionRead"] = []
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AmendmentCreate(BaseModel):
+    version: str
+    full_text: str
+    effective_date: Optional[date] = None
+    regenerate: bool = True
+
+
+class AmendmentRead(BaseModel):
+    id: int
+    dtlib_id: int
+    from_version: str
+    to_version: str
+    report: dict
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AlignmentRequest(BaseModel):
+    excerpts: List[str]
+
+
+class AlignmentRead(BaseModel):
+    start: int
+    end: int
+    confidence: float
+    method: str
+    text: str
+
+
 class OntologyPayload(BaseModel):
     ontology_owl: str
     raw_response: str | None = None
@@ -155,11 +203,78 @@ class TestCaseRead(TestCaseBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TestTrendPoint(BaseModel):
+    day: date
+    passed: int
+    failed: int
+    errored: int
+    skipped: int
+    pass_rate: Optional[float] = None
+
+
+class FlakyTestRead(BaseModel):
+    test_id: int
+    dtl_id: int
+    name: str
+    passed: int
+    failing: int
+    flakiness: float
+
+
+class BenchmarkRead(BaseModel):
+    id: int
+    dtl_id: int
+    logic_hash: str
+    seed: int
+    samples: int
+    p50_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    max_ms: Optional[float] = None
+    throughput_per_s: Optional[float] = None
+    exceptions: int
+    exception_summary: Optional[dict] = None
+    memory_peak_kb: Optional[float] = None
+    load_error: Optional[str] = None
+    created_at: datetime
+    baseline_id: Optional[int] = None
+    p99_ratio: Optional[float] = None
+    regression: bool = False
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class LogicPayload(BaseModel):
     language: str = "Python"
     code: str
 
 
+class SimilarityQuery(BaseModel):
+    text: str
+    limit: int = 10
+    min_similarity: Optional[float] = None
+
+
+class SimilarDTLRead(BaseModel):
+    dtl_id: int
+    dtlib_id: int
+    law_identifier: str
+    title: str
+    legal_reference: str
+    similarity: float
+    review_status: Optional[str] = None
+    ontology: Optional[OntologyPayload] = None
+    interface: Optional[InterfacePayload] = None
+    configuration: Optional[ConfigurationPayload] = None
+    logic: Optional[LogicPayload] = None
+    tests: List[TestCaseRead] = []
+
+
+class ReuseSource(BaseModel):
+    dtl_id: int
+    similarity: float
+    mode: str
+
+
 class DTLGenerationResponse(BaseModel):
     ontology: OntologyPayload
     ontology_raw: str
@@ -171,6 +286,7 @@ class DTLGenerationResponse(BaseModel):
     tests_raw: str
     logic: LogicPayload
     logic_raw: str
+    reused_from: Optional[ReuseSource] = None
 
 
 class ReviewPayload(BaseModel):
@@ -200,6 +316,102 @@ class CommentRead(CommentCreate):
     model_config = ConfigDict(from_attributes=True)
 
 
+class DTLBundle(BaseModel):
+    dtl: Optional[DTLRead] = None
+    ontology: Optional[OntologyPayload] = None
+    interface: Optional[InterfacePayload] = None
+    configuration: Optional[ConfigurationPayload] = None
+    tests: Optional[List[TestCaseRead]] = None
+    logic: Optional[LogicPayload] = None
+    review: Optional[ReviewRead] = None
+    comments: Optional[List[CommentRead]] = None
+    versions: dict[str, Optional[int]] = Field(default_factory=dict)
+
+
+class BundleTestWrite(TestCaseBase):
+    id: Optional[int] = None
+
+
+class DTLBundleUpdate(BaseModel):
+    dtl: Optional[DTLUpdate] = None
+    ontology: Optional[OntologyPayload] = None
+    interface: Optional[InterfacePayload] = None
+    configuration: Optional[ConfigurationPayload] = None
+    logic: Optional[LogicPayload] = None
+    tests: Optional[List[BundleTestWrite]] = None
+    deleted_test_ids: List[int] = Field(default_factory=list)
+    base_versions: dict[str, Optional[int]] = Field(
+        default_factory=dict,
+        description="Section versions from the bundle read; a mismatch rejects the save with 409",
+    )
+
+
+class DTLBundleSaveResult(BaseModel):
+    applied: List[str]
+    versions: dict[str, Optional[int]]
+
+
+class GraphDefinition(BaseModel):
+    dtl_id: int
+    values: List[str]
+
+
+class GraphConflict(BaseModel):
+    iri: str
+    predicate: str
+    definitions: List[GraphDefinition]
+
+
+class GraphParseError(BaseModel):
+    dtl_id: int
+    error: str
+
+
+class GraphConflictReport(BaseModel):
+    graph: str
+    conflicts: List[GraphConflict]
+    parse_errors: List[GraphParseError]
+
+
+class OWLDiagnostic(BaseModel):
+    severity: str
+    message: str
+    term: Optional[str] = None
+
+
+class OWLValidationRead(BaseModel):
+    graph: str
+    is_valid: Optional[bool] = None
+    diagnostics: List[OWLDiagnostic]
+    validated_at: Optional[datetime] = None
+    pending: bool
+    term_count: int
+
+
+class DTLTermRead(BaseModel):
+    dtl_id: int
+    dtl_title: str
+    graph: str
+    iri: str
+    name: str
+    kind: str
+    label: Optional[str] = None
+
+
+class SyncEventRead(BaseModel):
+    id: int
+    dtlib_id: int
+    repository_url: str
+    branch: str
+    commit_id: Optional[str] = None
+    message: Optional[str] = None
+    status: str
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class OverviewSnapshot(BaseModel):
     dtlib: DTLIBRead
     dtls: List[DTLRead]
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, Literal
+
+SectionKind = Literal["division", "section", "article", "paragraph", "item", "letter"]
+
+CHUNK_CHARS = int(os.getenv("SEGMENTATION_CHUNK_CHARS", "60000"))
+
+# Nesting depth per kind; a marker closes every open unit at its depth or deeper.
+_LEVELS: dict[str, int] = {"division": 0, "section": 1, "article": 1, "paragraph": 2, "item": 3, "letter": 4}
+
+_ROMAN = r"[IVXLC]+"
+_DIVISIONS = r"(?:Teil|Hauptstück|Abschnitt|Unterabschnitt|Kapitel|Titel|Buch)"
+_MARKERS: list[tuple[SectionKind, re.Pattern[str]]] = [
+    (
+        "division",
+        re.compile(
+            rf"(?:(?:\d+|{_ROMAN})\.\s*{_DIVISIONS}\b|{_DIVISIONS}\s+(?:\d+[a-z]?|{_ROMAN})\b)\.?",
+        ),
+    ),
+    ("section", re.compile(r"§\s*(?P<number>\d+[a-z]?)\.?")),
+    ("article", re.compile(rf"Art(?:ikel|\.)\s*(?P<number>\d+[a-z]?|{_ROMAN})\.?")),
+    ("paragraph", re.compile(r"(?:Abs\.\s*)?\((?P<number>\d+[a-z]?)\)")),
+    ("item", re.compile(r"(?:Z(?:iffer|\.)?\s*)?(?P<number>\d+[a-z]?)\.(?=\s)")),
+    ("letter", re.compile(r"(?:lit\.\s*)?(?P<number>[a-z]{1,2})\)(?=\s)")),
+]
+# A wrapped line may start with a citation ("§ 5 Abs. 2 gilt ..."); headings
+# after a marker are capitalized, running text and citation parts are not.
+_CITATION = re.compile(r"\s*(?:Abs\.|Z\.?\s*\d|lit\.|bzw\.|[a-zäöüß]+\b)")
+_LINE = re.compile(r"[^\n]*\n?")
+_LEADING_SPACE = re.compile(r"[ \t\u00a0]*")
+
+
+@dataclass
+class Section:
+    """One structural unit of a statute: ``[start, end)`` offsets into the full text."""
+
+    kind: SectionKind
+    label: str
+    title: str | None
+    start: int
+    end: int
+    children: list["Section"] = field(default_factory=list)
+
+    @property
+    def level(self) -> int:
+        return _LEVELS[self.kind]
+
+    def walk(self) -> Iterator["Section"]:
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def _match_marker(line: str) -> tuple[SectionKind, re.Match[str]] | None:
+    for kind, pattern in _MARKERS:
+        match = pattern.match(line)
+        if match is not None:
+            return kind, match
+    return None
+
+
+def _title(rest: str) -> str | None:
+    """Heading text after a marker, unless the line goes straight on with a paragraph or sentence."""
+
+    rest = rest.strip(" \t.:–-")
+    if not rest or rest.startswith("(") or len(rest) > 120 or rest.endswith((".", ";", ",")):
+        return None
+    return rest
+
+
+def _heading(line: str) -> bool:
+    return bool(line) and len(line) <= 120 and line[0].isupper() and not line.endswith((".", ";", ",", ":"))
+
+
+def parse(full_text: str) -> list[Section]:
+    """Build the section tree of ``full_text`` in one pass over its lines.
+
+    Units open at lines starting with a marker (``§ 3``, ``Art. 5``, ``(2)``,
+    ``1.``, ``a)``, ``2. Abschnitt`` ...) and close where the next unit at the
+    same or a shallower level begins. Items and letters only count inside a
+    section, article or paragraph so that stray numbered lines in a preamble
+    stay plain text. A ``(1)`` directly after a ``§`` on the same line opens
+    the first paragraph as well.
+    """
+
+    roots: list[Section] = []
+    stack: list[Section] = []
+    # Headings often sit on their own line, after a division marker or before a
+    # section marker ("Anwendungsbereich" / "§ 1. (1) ..."); only a line that
+    # follows a finished sentence (or a blank line) counts as the latter.
+    untitled: Section | None = None
+    heading: tuple[int, str] | None = None
+    sentence_closed = True
+
+    def open_unit(kind: SectionKind, label: str, title: str | None, start: int) -> Section:
+        level = _LEVELS[kind]
+        while stack and stack[-1].level >= level:
+            stack.pop().end = start
+        unit = Section(kind=kind, label=label, title=title, start=start, end=len(full_text))
+        (stack[-1].children if stack else roots).append(unit)
+        stack.append(unit)
+        return unit
+
+    for line_match in _LINE.finditer(full_text):
+        line = line_match.group(0)
+        if not line:
+            break
+        indent = _LEADING_SPACE.match(line).end()
+        start = line_match.start() + indent
+        content = line[indent:].rstrip()
+        marker = _match_marker(content)
+        if marker is not None:
+            kind, match = marker
+            rest = content[match.end() :]
+            if (
+                (kind in ("item", "letter") and not any(unit.level in (1, 2) for unit in stack))
+                or (kind in ("division", "section", "article") and _CITATION.match(rest))
+                or (kind == "division" and len(content) > 120)
+            ):
+                marker = None
+        if marker is None:
+            if untitled is not None and _heading(content):
+                untitled.title = content
+                heading = None
+                sentence_closed = True
+            else:
+                heading = (start, content) if sentence_closed and _heading(content) else None
+                sentence_closed = not content or content.endswith((".", ";", ":"))
+            untitled = None
+            continue
+
+        label = match.group(0).strip()
+        title = _title(rest) if kind in ("division", "section", "article") else None
+        if kind in ("section", "article") and heading is not None:
+            start, title = heading
+        unit = open_unit(kind, label, title, start)
+        untitled = unit if kind in ("division", "section", "article") and title is None and not rest.strip() else None
+        heading = None
+        sentence_closed = True
+        if kind in ("section", "article"):
+            inline = re.match(r"\s*(\((\d+[a-z]?)\))", rest)
+            if inline is not None:
+                open_unit("paragraph", inline.group(1), None, line_match.start() + indent + match.end() + inline.start(1))
+
+    for unit in stack:
+        unit.end = len(full_text)
+    return roots
+
+
+def _trimmed(full_text: str, start: int, end: int) -> tuple[int, int]:
+    while end > start and full_text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def candidates(full_text: str, sections: list[Section] | None = None, max_chars: int = CHUNK_CHARS) -> list[Section]:
+    """Units that make sensible DTLs: every ``§``/article, split into paragraphs when longer than ``max_chars``.
+
+    Texts without sections or articles fall back to their top-level units, or
+    to the whole text.
+    """
+
+    sections = parse(full_text) if sections is None else sections
+    units = [unit for root in sections for unit in root.walk() if unit.kind in ("section", "article")]
+    if not units:
+        units = [unit for unit in sections if unit.kind != "division"] or [
+            Section(kind="section", label="", title=None, start=0, end=len(full_text))
+        ]
+    result = []
+    for unit in units:
+        paragraphs = [child for child in unit.children if child.kind == "paragraph"]
+        if unit.end - unit.start > max_chars and paragraphs:
+            result.extend(paragraphs)
+        else:
+            result.append(unit)
+    for unit in result:
+        unit.start, unit.end = _trimmed(full_text, unit.start, unit.end)
+    return [unit for unit in result if unit.end > unit.start]
+
+
+def chunks(full_text: str, max_chars: int = CHUNK_CHARS) -> list[tuple[int, int]]:
+    """Split ``full_text`` into ``[start, end)`` ranges of at most ``max_chars`` along structural boundaries.
+
+    Consecutive candidate units are packed greedily; a single unit longer than
+    ``max_chars`` is cut at the last line break before the limit.
+    """
+
+    if len(full_text) <= max_chars:
+        return [(0, len(full_text))]
+    boundaries = sorted({unit.start for unit in candidates(full_text, max_chars=max_chars)} | {0})
+    ranges: list[tuple[int, int]] = []
+    chunk_start = 0
+    previous = 0
+    for boundary in boundaries[1:] + [len(full_text)]:
+        if boundary - chunk_start > max_chars and previous > chunk_start:
+            ranges.append((chunk_start, previous))
+            chunk_start = previous
+        while boundary - chunk_start > max_chars:
+            cut = full_text.rfind("\n", chunk_start + 1, chunk_start + max_chars)
+            cut = cut + 1 if cut != -1 else chunk_start + max_chars
+            ranges.append((chunk_start, cut))
+            chunk_start = cut
+        previous = boundary
+    if chunk_start < len(full_text):
+        ranges.append((chunk_start, len(full_text)))
+    return ranges
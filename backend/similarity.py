@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import os
+import struct
+from hashlib import blake2b, shake_128
+from itertools import chain
+from typing import Any
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, selectinload
+
+from . import models
+from .alignment import normalize
+from .database import SessionLocal
+from .hashing import hash_text
+
+NUM_PERMUTATIONS = 128
+# 16 bands of 8 rows: pairs above ~0.7 Jaccard share a bucket with high
+# probability, pairs below ~0.4 almost never do.
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+SHINGLE_WORDS = 3
+CANDIDATE_LIMIT = 200
+MIN_SIMILARITY = float(os.getenv("SIMILARITY_MIN", "0.5"))
+REUSE_MIN_SIMILARITY = float(os.getenv("SIMILARITY_REUSE_MIN", "0.9"))
+BACKFILL_BATCH_SIZE = 200
+
+# Each shingle is expanded into NUM_PERMUTATIONS independent 64-bit hashes
+# with one SHAKE-128 call; unpacking and column-wise ``min`` then run in C.
+# The hash is unseeded so persisted signatures stay comparable across processes.
+_PACKING = struct.Struct(f"<{NUM_PERMUTATIONS}Q")
+_MINHASH_CHUNK = 512
+_TEXT_ATTRS = ("legal_text_stored", "legal_text_start", "legal_text_end")
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), "little")
+
+
+def shingles(text: str) -> set[bytes]:
+    """Word ``SHINGLE_WORDS``-grams of the case-, quote- and whitespace-folded text."""
+
+    tokens = normalize(text)[0].lower().split()
+    if len(tokens) <= SHINGLE_WORDS:
+        return {" ".join(tokens).encode()} if tokens else set()
+    return {
+        " ".join(tokens[index : index + SHINGLE_WORDS]).encode()
+        for index in range(len(tokens) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash(text: str) -> tuple[int, ...] | None:
+    grams = list(shingles(text))
+    if not grams:
+        return None
+    signature: list[int] | None = None
+    for offset in range(0, len(grams), _MINHASH_CHUNK):
+        chunk = grams[offset : offset + _MINHASH_CHUNK]
+        rows = [_PACKING.unpack(shake_128(gram).digest(_PACKING.size)) for gram in chunk]
+        minima = map(min, zip(*rows))
+        signature = list(minima) if signature is None else list(map(min, signature, minima))
+    return tuple(signature)
+
+
+def band_buckets(signature: tuple[int, ...]) -> list[int]:
+    """One signed 64-bit bucket key per band; the band number is part of the key."""
+
+    buckets = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS : (band + 1) * ROWS]
+        key = _hash64(struct.pack(f"<I{ROWS}Q", band, *rows))
+        buckets.append(key - (1 << 64) if key >= 1 << 63 else key)
+    return buckets
+
+
+def estimate(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERMUTATIONS
+
+
+def store_signature(connection: Connection, dtl_id: int, dtlib_id: int, text: str | None) -> None:
+    """(Re)index one DTL unless its text is unchanged since the last signature."""
+
+    text_hash = hash_text(text)
+    table = models.DTLSignature.__table__
+    current = connection.execute(select(table.c.text_hash).where(table.c.dtl_id == dtl_id)).scalar()
+    if current == text_hash:
+        return
+    connection.execute(delete(models.DTLSignatureBand.__table__).where(models.DTLSignatureBand.dtl_id == dtl_id))
+    connection.execute(delete(table).where(table.c.dtl_id == dtl_id))
+    signature = minhash(text or "")
+    if signature is None:
+        return
+    connection.execute(
+        insert(table).values(dtl_id=dtl_id, dtlib_id=dtlib_id, text_hash=text_hash, minhash=_PACKING.pack(*signature))
+    )
+    connection.execute(
+        insert(models.DTLSignatureBand.__table__),
+        [{"dtl_id": dtl_id, "band": band, "bucket": bucket} for band, bucket in enumerate(band_buckets(signature))],
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _maintain_signatures(session: Session, flush_context: Any) -> None:
+    """Re-sign DTLs whose legal text (stored copy or span) was written in this flush."""
+
+    connection = session.connection()
+    full_texts: dict[int, str] = {}
+    for obj in chain(session.new, session.dirty):
+        if not isinstance(obj, models.DTL) or obj in session.deleted:
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(state.attrs[name].history.has_changes() for name in _TEXT_ATTRS):
+            continue
+        # New rows cannot lazy-load their library yet, so spans are resolved via the connection.
+        if obj.legal_text_start is None:
+            text = obj.legal_text_stored
+        else:
+            if obj.dtlib_id not in full_texts:
+                full_texts[obj.dtlib_id] = connection.execute(
+                    select(models.DTLIB.full_text).where(models.DTLIB.id == obj.dtlib_id)
+                ).scalar_one()
+            text = full_texts[obj.dtlib_id][obj.legal_text_start : obj.legal_text_end]
+        store_signature(connection, obj.id, obj.dtlib_id, text)
+
+
+def backfill() -> None:
+    """Sign DTLs that predate the index; runs once in the background at startup."""
+
+    db = SessionLocal()
+    last_id = 0
+    try:
+        while True:
+            batch = db.scalars(
+                select(models.DTL)
+                .outerjoin(models.DTLSignature, models.DTLSignature.dtl_id == models.DTL.id)
+                .where(models.DTLSignature.dtl_id.is_(None), models.DTL.id > last_id)
+                .order_by(models.DTL.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not batch:
+                return
+            for dtl in batch:
+                store_signature(db.connection(), dtl.id, dtl.dtlib_id, dtl.legal_text)
+            last_id = batch[-1].id
+            db.commit()
+            db.expunge_all()
+    finally:
+        db.close()
+
+
+def similar(
+    db: Session,
+    text: str,
+    *,
+    limit: int = 10,
+    min_similarity: float = MIN_SIMILARITY,
+    exclude_dtl_id: int | None = None,
+    approved_only: bool = False,
+) -> list[tuple[models.DTL, float]]:
+    """DTLs in any library whose legal text is estimated at least ``min_similarity`` similar to ``text``.
+
+    Candidates are the DTLs sharing an LSH bucket with ``text``, ranked by the
+    number of shared buckets; their stored signatures then give the estimate.
+    """
+
+    signature = minhash(text)
+    if signature is None:
+        return []
+    band = models.DTLSignatureBand
+    # Filter before the LIMIT so deleted or unapproved DTLs do not crowd out candidates. The
+    # candidates are joined as a derived table: MySQL/MariaDB reject LIMIT in an IN subquery.
+    candidates = (
+        select(band.dtl_id)
+        .join(models.DTL, models.DTL.id == band.dtl_id)
+        .join(models.DTLIB, models.DTLIB.id == models.DTL.dtlib_id)
+        .where(
+            band.bucket.in_(band_buckets(signature)),
+            models.DTL.deleted_at.is_(None),
+            models.DTLIB.deleted_at.is_(None),
+        )
+        .group_by(band.dtl_id)
+        .order_by(func.count().desc())
+        .limit(CANDIDATE_LIMIT)
+    )
+    if exclude_dtl_id is not None:
+        candidates = candidates.where(band.dtl_id != exclude_dtl_id)
+    if approved_only:
+        candidates = candidates.join(models.DTLReview, models.DTLReview.dtl_id == band.dtl_id).where(
+            models.DTLReview.status == "Approved"
+        )
+    candidates = candidates.subquery()
+    rows = db.execute(
+        select(models.DTLSignature.dtl_id, models.DTLSignature.minhash).join(
+            candidates, candidates.c.dtl_id == models.DTLSignature.dtl_id
+        )
+    ).all()
+    scored = sorted(
+        ((estimate(signature, _PACKING.unpack(packed)), dtl_id) for dtl_id, packed in rows),
+        key=lambda pair: (-pair[0], pair[1]),
+    )
+    scored = [(score, dtl_id) for score, dtl_id in scored if score >= min_similarity][:limit]
+    if not scored:
+        return []
+    dtls = {
+        dtl.id: dtl
+        for dtl in db.scalars(
+            select(models.DTL)
+            .options(
+                *(
+                    selectinload(getattr(models.DTL, name))
+                    for name in ("review", "dtlib", "ontology", "interface", "configuration", "logic", "tests")
+                )
+            )
+            .where(models.DTL.id.in_([dtl_id for _, dtl_id in scored]))
+        )
+    }
+    return [(dtls[dtl_id], score) for score, dtl_id in scored if dtl_id in dtls]
+
+
+def best_approved_source(
+    db: Session, dtl: models.DTL, min_similarity: float = REUSE_MIN_SIMILARITY
+) -> tuple[models.DTL, float] | None:
+    """The most similar approved DTL to reuse artifacts from, if any clears ``min_similarity``."""
+
+    matches = similar(
+        db, dtl.legal_text or "", limit=1, min_similarity=min_similarity, exclude_dtl_id=dtl.id, approved_only=True
+    )
+    return matches[0] if matches else None
+
+
+def describe(dtl: models.DTL, score: float, with_artifacts: bool | None = None) -> dict[str, Any]:
+    """Response shape of a match; artifacts are included for approved DTLs unless ``with_artifacts`` says otherwise."""
+
+    approved = dtl.review is not None and dtl.review.status == "Approved"
+    if with_artifacts is not None:
+        approved = with_artifacts
+    interface = dtl.interface.interface_json if approved and dtl.interface else None
+    return {
+        "dtl_id": dtl.id,
+        "dtlib_id": dtl.dtlib_id,
+        "law_identifier": dtl.dtlib.law_identifier,
+        "title": dtl.title,
+        "legal_reference": dtl.legal_reference,
+        "similarity": score,
+        "review_status": dtl.review.status if dtl.review else None,
+        "ontology": {"ontology_owl": dtl.ontology.ontology_owl} if approved and dtl.ontology else None,
+        "configuration": (
+            {"configuration_owl": dtl.configuration.configuration_owl} if approved and dtl.configuration else None
+        ),
+        "interface": (
+            {
+                "function_name": interface.get("function_name") or dtl.title,
+                "inputs": interface.get("inputs", []),
+                "outputs": interface.get("outputs", []),
+                "mcp_spec": dtl.interface.mcp_spec,
+            }
+            if interface is not None
+            else None
+        ),
+        "logic": {"language": dtl.logic.language, "code": dtl.logic.code} if approved and dtl.logic else None,
+        "tests": [
+            {
+                "id": test.id,
+                "dtl_id": test.dtl_id,
+                "name": test.name,
+                "input": test.input_json,
+                "expected_output": test.expected_output_json,
+                "description": test.description,
+            }
+            for test in (dtl.tests if approved else [])
+        ],
+    }
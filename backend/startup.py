@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from sqlalchemy.exc import OperationalError
+
+from . import migrations
+from .database import Base, SessionLocal, engine
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# A database that is still coming up is retried with exponential backoff for this long before startup fails.
+STARTUP_DB_TIMEOUT_SECONDS = float(os.getenv("STARTUP_DB_TIMEOUT_SECONDS", "60"))
+STARTUP_RETRY_MAX_DELAY = 5.0
+# Cold starts (import plus startup) slower than this are logged as a warning and fail ``python -m backend.startup``.
+STARTUP_TARGET_SECONDS = float(os.getenv("STARTUP_TARGET_SECONDS", "3"))
+REPORT_TOP_MODULES = 15
+# Level of the ``backend.*`` loggers (LLM call summaries, startup report, migrations, slow requests).
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_IMPORT_TIME = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| (\s*)(\S+)")
+
+
+@dataclass
+class StartupReport:
+    """Wall time of each startup phase, in the order they ran."""
+
+    phases: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def log(self) -> None:
+        summary = ", ".join(f"{name} {seconds:.3f}s" for name, seconds in self.phases.items())
+        if self.total > STARTUP_TARGET_SECONDS:
+            logger.warning("Startup took %.3fs (target %.1fs): %s", self.total, STARTUP_TARGET_SECONDS, summary)
+        else:
+            logger.info("Startup took %.3fs: %s", self.total, summary)
+
+
+report = StartupReport()
+
+
+def configure_logging() -> None:
+    """Emit ``backend.*`` records at ``LOG_LEVEL`` on stderr.
+
+    Uvicorn only configures its own loggers, so without this the INFO records
+    of the backend fall through to Python's last-resort handler and are
+    dropped. A handler is only added when nothing has configured the root
+    logger; otherwise records propagate to it as usual.
+    """
+
+    backend = logging.getLogger("backend")
+    backend.setLevel(LOG_LEVEL)
+    if logging.getLogger().handlers or any(handler.get_name() == "backend" for handler in backend.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.set_name("backend")
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    backend.addHandler(handler)
+
+
+def retrying(step: Callable[[], None], name: str, timeout: float = STARTUP_DB_TIMEOUT_SECONDS) -> None:
+    """Run ``step``, retrying while the database refuses connections, until ``timeout`` has passed."""
+
+    deadline = time.monotonic() + timeout
+    delay = 0.25
+    attempt = 1
+    while True:
+        try:
+            step()
+            return
+        except OperationalError as exc:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning("%s failed (attempt %d), retrying in %.2fs: %s", name, attempt, delay, exc.orig)
+            time.sleep(delay)
+            delay = min(delay * 2, STARTUP_RETRY_MAX_DELAY)
+            attempt += 1
+
+
+def ensure_default_user() -> None:
+    db = SessionLocal()
+    try:
+        if not db.query(User).first():
+            system_user = User(
+                external_id="system",
+                display_name="System",
+                email="system@example.com",
+            )
+            db.add(system_user)
+            db.commit()
+    finally:
+        db.close()
+
+
+def initialize() -> None:
+    """Database work the app needs before serving; runs in the lifespan, not at import."""
+
+    with report.phase("schema"):
+        retrying(lambda: Base.metadata.create_all(bind=engine), "Creating the schema")
+    with report.phase("migrations"):
+        migrations.upgrade(engine)
+    with report.phase("default user"):
+        retrying(ensure_default_user, "Creating the default user")
+
+
+def _import_profile(stderr: str) -> list[tuple[str, float]]:
+    """Seconds spent importing each top-level package, from ``python -X importtime`` output."""
+
+    totals: dict[str, float] = defaultdict(float)
+    for line in stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if match is not None:
+            module = match.group(4)
+            package = ".".join(module.split(".")[:2]) if module.startswith("backend.") else module.split(".")[0]
+            totals[package] += int(match.group(1)) / 1e6
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main() -> int:
+    """Cold-start the app in a fresh interpreter and print where the time goes.
+
+    Exits non-zero when import plus startup exceed ``STARTUP_TARGET_SECONDS``,
+    so the check can gate a build.
+    """
+
+    probe = (
+        "import json; import backend.app; from backend import startup; "
+        "startup.initialize(); print(json.dumps(startup.report.phases))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        print(result.stderr, file=sys.stderr)
+        return result.returncode
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    total = sum(phases.values())
+
+    print(f"Cold start: {total:.3f}s (target {STARTUP_TARGET_SECONDS:.1f}s)")
+    for name, seconds in phases.items():
+        print(f"  {name:<24} {seconds:8.3f}s")
+    print("Slowest imports (self time per package):")
+    for package, seconds in _import_profile(result.stderr)[:REPORT_TOP_MODULES]:
+        print(f"  {package:<24} {seconds:8.3f}s")
+    return 1 if total > STARTUP_TARGET_SECONDS else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
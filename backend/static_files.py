@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from fastapi import Request, Response, status
+
+try:
+    import brotli
+except ImportError:  # optional: without it only pre-built .br files are served as brotli
+    brotli = None
+
+# Vite puts content-hashed bundles under assets/; they never change under the same name.
+IMMUTABLE_PREFIX = "assets/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MIN_COMPRESS_BYTES = 1024
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/xml", "image/svg+xml")
+# Server preference among the codings a client accepts.
+_CODINGS = ("br", "gzip")
+_PREBUILT_SUFFIXES = {".br": "br", ".gz": "gzip"}
+
+
+@dataclass
+class StaticFile:
+    media_type: str
+    etag: str
+    cache_control: str
+    bodies: dict[str, bytes]  # content coding ("identity", "gzip", "br") -> bytes
+
+    def etag_for(self, coding: str) -> str:
+        # Each encoding is a different representation and needs its own strong validator.
+        return f'"{self.etag}"' if coding == "identity" else f'"{self.etag}-{coding}"'
+
+
+def _compress(coding: str, data: bytes) -> bytes | None:
+    if coding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if coding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def accepted_codings(accept_encoding: str | None) -> list[str]:
+    """Codings from ``_CODINGS`` the client accepts (``q`` > 0), in server preference order."""
+
+    if not accept_encoding:
+        return []
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    return [coding for coding in _CODINGS if weights.get(coding, wildcard) > 0]
+
+
+class StaticIndex:
+    """The files of the frontend build, held in memory with their compressed variants.
+
+    ``load`` reads and compresses everything once (at startup); requests are
+    then a dictionary lookup. Pre-built ``.gz``/``.br`` siblings from the
+    build are used as they are; other compressible files are compressed here.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._files: dict[str, StaticFile] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def files(self) -> dict[str, StaticFile]:
+        if self._files is None:
+            self.load()
+        return self._files
+
+    def load(self) -> None:
+        with self._lock:
+            if self._files is not None:
+                return
+            files: dict[str, StaticFile] = {}
+            prebuilt: list[tuple[str, str, bytes]] = []
+            for path in sorted(self.root.rglob("*")):
+                if not path.is_file():
+                    continue
+                relative = path.relative_to(self.root).as_posix()
+                if path.suffix in _PREBUILT_SUFFIXES:
+                    prebuilt.append((relative[: -len(path.suffix)], _PREBUILT_SUFFIXES[path.suffix], path.read_bytes()))
+                    continue
+                files[relative] = self._read(relative, path.read_bytes())
+            for relative, coding, data in prebuilt:
+                if relative in files:
+                    files[relative].bodies[coding] = data
+            self._files = files
+
+    def _read(self, relative: str, data: bytes) -> StaticFile:
+        media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type == "application/javascript":
+            media_type = f"{media_type}; charset=utf-8"
+        bodies = {"identity": data}
+        if len(data) >= MIN_COMPRESS_BYTES and media_type.startswith(_COMPRESSIBLE):
+            for coding in _CODINGS:
+                compressed = _compress(coding, data)
+                if compressed is not None and len(compressed) < len(data):
+                    bodies[coding] = compressed
+        return StaticFile(
+            media_type=media_type,
+            etag=hashlib.sha256(data).hexdigest()[:32],
+            cache_control=IMMUTABLE_CACHE_CONTROL if relative.startswith(IMMUTABLE_PREFIX) else REVALIDATE_CACHE_CONTROL,
+            bodies=bodies,
+        )
+
+    def get(self, relative: str) -> StaticFile | None:
+        return self.files.get(relative)
+
+    def response(self, file: StaticFile, request: Request) -> Response:
+        coding = next(
+            (coding for coding in accepted_codings(request.headers.get("accept-encoding")) if coding in file.bodies),
+            "identity",
+        )
+        headers = {"ETag": file.etag_for(coding), "Cache-Control": file.cache_control, "Vary": "Accept-Encoding"}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if "*" in tags or tags & {file.etag_for(variant) for variant in file.bodies}:
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=file.bodies[coding], media_type=file.media_type, headers=headers)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import models, sandbox
+from .hashing import hash_json
+from .rollups import record_runs
+
+RunMode = Literal["all", "changed-only"]
+
+
+def _latest_runs(db: Session, test_ids: list[int]) -> dict[int, models.DTLTestRun]:
+    if not test_ids:
+        return {}
+    latest_ids = (
+        select(func.max(models.DTLTestRun.id))
+        .where(models.DTLTestRun.test_id.in_(test_ids))
+        .group_by(models.DTLTestRun.test_id)
+    )
+    runs = db.query(models.DTLTestRun).filter(models.DTLTestRun.id.in_(latest_ids)).all()
+    return {run.test_id: run for run in runs}
+
+
+def _outcome(expected: Any, call: sandbox.CallResult | None, load_error: str | None) -> tuple[str, Any, str | None]:
+    if load_error:
+        return "Error", None, load_error
+    if call is None:
+        return "Error", None, "sandbox returned no result"
+    if call.error:
+        return "Error", None, call.error
+    return ("Passed" if call.output == expected else "Failed"), call.output, None
+
+
+def _logic_hash(logic: models.DTLLogic | None, function_name: str | None) -> str | None:
+    """Digest of everything that decides what a test executes: code, language and entry point."""
+
+    if logic is None:
+        return None
+    return hash_json({"code": logic.code, "language": logic.language, "function_name": function_name})
+
+
+def run_dtl_tests(db: Session, dtl: models.DTL, mode: RunMode = "all") -> list[dict[str, Any]]:
+    """Execute the tests of ``dtl`` against its logic and record a run per executed test.
+
+    In ``changed-only`` mode a test whose logic (code, language and interface
+    function name), input and expected output hashes match its latest recorded
+    run is not executed again; the previous result is reported with ``reused``
+    set. Logic in a language the sandbox cannot execute is recorded as
+    ``Not Run``. The caller commits.
+    """
+
+    tests = db.query(models.DTLTest).filter_by(dtl_id=dtl.id).order_by(models.DTLTest.id).all()
+    logic = dtl.logic
+    function_name = (dtl.interface.interface_json or {}).get("function_name") if dtl.interface else None
+    logic_hash = _logic_hash(logic, function_name)
+    previous = _latest_runs(db, [test.id for test in tests]) if mode == "changed-only" else {}
+
+    results: dict[int, dict[str, Any]] = {}
+    pending: list[tuple[models.DTLTest, str, str]] = []
+    for test in tests:
+        input_hash = hash_json(test.input_json)
+        expected_hash = hash_json(test.expected_output_json)
+        prior = previous.get(test.id)
+        if prior and (prior.logic_hash, prior.input_hash, prior.expected_output_hash) == (
+            logic_hash,
+            input_hash,
+            expected_hash,
+        ):
+            results[test.id] = {
+                "test_id": test.id,
+                "result": prior.result,
+                "actual_output": prior.actual_output_json,
+                "notes": prior.notes,
+                "reused": True,
+            }
+            continue
+        pending.append((test, input_hash, expected_hash))
+
+    if pending:
+        runs: list[models.DTLTestRun] = []
+        executable = logic is not None and sandbox.supports(logic.language)
+        if executable:
+            execution = sandbox.execute(logic.code, function_name, [test.input_json for test, _, _ in pending])
+        executed_at = datetime.utcnow()
+        for index, (test, input_hash, expected_hash) in enumerate(pending):
+            if executable:
+                call = execution.calls[index] if index < len(execution.calls) else None
+                result, actual_output, notes = _outcome(test.expected_output_json, call, execution.load_error)
+            elif logic:
+                result, actual_output, notes = "Not Run", None, f"{logic.language} logic cannot be executed"
+            else:
+                result, actual_output, notes = "Not Run", None, "no logic to execute"
+            run = models.DTLTestRun(
+                test_id=test.id,
+                executed_at=executed_at,
+                result=result,
+                actual_output_json=actual_output,
+                notes=notes,
+                logic_hash=logic_hash,
+                input_hash=input_hash,
+                expected_output_hash=expected_hash,
+            )
+            db.add(run)
+            runs.append(run)
+            test.last_run_at = executed_at
+            test.last_result = result
+            db.add(test)
+            results[test.id] = {
+                "test_id": test.id,
+                "result": result,
+                "actual_output": actual_output,
+                "notes": notes,
+                "reused": False,
+            }
+        record_runs(db, dtl.id, runs)
+
+    return [results[test.id] for test in tests]
+
+
+def run_dtlib_tests(db: Session, dtlib: models.DTLIB, mode: RunMode = "all") -> list[dict[str, Any]]:
+    """Run the tests of every DTL in ``dtlib``; see :func:`run_dtl_tests`."""
+
+    dtls = (
+        db.query(models.DTL)
+        .filter_by(dtlib_id=dtlib.id, deleted_at=None)
+        .order_by(models.DTL.position, models.DTL.id)
+        .all()
+    )
+    return [{"dtl_id": dtl.id, "results": run_dtl_tests(db, dtl, mode)} for dtl in dtls]
@@ -0,0 +1,62 @@
+"""The tests run the app on a private SQLite database, chosen before ``backend.database`` is imported."""
+
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Iterator
+
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/tests.db"
+os.environ["DATABASE_REPLICA_URLS"] = ""
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator:
+    from fastapi.testclient import TestClient
+
+    from backend.app import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def user(client) -> dict:
+    return client.post(
+        "/api/users", json={"external_id": "tests", "display_name": "Tests", "email": "tests@example.com"}
+    ).json()
+
+
+@pytest.fixture
+def dtlib(client, user) -> dict:
+    """A fresh library over a two-paragraph statute."""
+
+    return client.post(
+        "/api/dtlibs",
+        json={
+            "law_name": "Testgesetz",
+            "law_identifier": "TG",
+            "jurisdiction": "AT",
+            "version": "1",
+            "full_text": "§ 1 Anwendungsbereich\n(1) Dieses Gesetz gilt.\n§ 2 Begriffe\n(1) Einkommen ist Geld.\n",
+            "created_by": user["id"],
+        },
+    ).json()
+
+
+@pytest.fixture
+def dtl_url(client, dtlib) -> str:
+    """URL of a DTL in ``dtlib`` covering § 1."""
+
+    dtl = client.post(
+        f"/api/dtlibs/{dtlib['id']}/dtls",
+        json={
+            "title": "Anwendungsbereich",
+            "version": "1",
+            "legal_reference": "§ 1",
+            "legal_text": "(1) Dieses Gesetz gilt.",
+        },
+    ).json()
+    return f"/api/dtlibs/{dtlib['id']}/dtls/{dtl['id']}"
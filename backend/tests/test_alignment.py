@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import pytest
+
+from backend import alignment
+from backend.llm import llm_service
+
+FULL_TEXT = "§ 1 Anwendungsbereich\n(1) Dieses Gesetz gilt.\n§ 2 Höhe\n(1) Die Beihilfe beträgt 120 Euro monatlich.\n"
+
+
+@pytest.mark.parametrize(
+    "excerpt, method, text",
+    [
+        ("(1) Dieses Gesetz gilt.", "exact", "(1) Dieses Gesetz gilt."),
+        ("§ 2  Höhe (1) Die Beihilfe", "normalized", "§ 2 Höhe\n(1) Die Beihilfe"),
+        ("(1) Die Beihilfe beträgt 100 Euro monatlich.", "fuzzy", "(1) Die Beihilfe beträgt 120 Euro monatlich."),
+    ],
+)
+def test_align_falls_back_from_exact_to_fuzzy(excerpt, method, text):
+    found = alignment.align(FULL_TEXT, excerpt)
+
+    assert found is not None and found.method == method
+    assert FULL_TEXT[found.start : found.end] == text
+
+
+def test_unrelated_excerpt_is_not_aligned():
+    assert alignment.align(FULL_TEXT, "völlig anderer Text hier drin") is None
+
+
+def test_segmentation_output_is_stored_as_spans(client, dtlib, monkeypatch):
+    segments = [
+        {"title": "a", "legal_text": "§ 1 Anwendungsbereich\n(1) Dieses Gesetz gilt."},
+        {"title": "b", "legal_text": "§ 2  Begriffe (1) Einkommen ist Geld."},
+        {"title": "c", "legal_text": "völlig anderer Text hier drin"},
+    ]
+    monkeypatch.setattr(llm_service, "generate_structured", lambda prompt: ("raw", {"segments": segments}))
+
+    suggestions = client.post(f"/api/dtlibs/{dtlib['id']}/segment").json()
+
+    assert [(suggestion["alignment_method"], suggestion["legal_text_start"]) for suggestion in suggestions] == [
+        ("exact", 0),
+        ("normalized", dtlib["full_text"].index("§ 2")),
+        (None, None),
+    ]
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.llm import llm_service
+
+OLD = """§ 1 Anwendungsbereich
+(1) Dieses Gesetz gilt für alle Personen im Bundesgebiet.
+§ 2 Höhe
+(1) Die Beihilfe beträgt 100 Euro monatlich.
+§ 3 Auszahlung
+(1) Die Auszahlung erfolgt monatlich.
+"""
+NEW = """§ 1 Anwendungsbereich
+(1) Dieses Gesetz gilt für alle Personen im Bundesgebiet.
+§ 2 Höhe
+(1) Die Beihilfe beträgt 120 Euro monatlich.
+§ 2a Zuschlag
+(1) Für Kinder gibt es einen Zuschlag.
+"""
+
+
+@pytest.fixture
+def amended_library(client, dtlib, monkeypatch) -> tuple[str, dict[str, int]]:
+    monkeypatch.setattr(llm_service, "generate_structured", lambda prompt: ("raw", {}))
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    client.put(library_url, json={"full_text": OLD})
+    ids = {}
+    for reference, line in zip(["§ 1", "§ 2", "§ 3"], OLD.splitlines()[1::2]):
+        ids[reference] = client.post(
+            f"{library_url}/dtls",
+            json={"title": reference, "version": "1", "legal_reference": reference, "legal_text": line},
+        ).json()["id"]
+    return library_url, ids
+
+
+def test_preview_classifies_dtls_by_section(client, amended_library):
+    library_url, ids = amended_library
+
+    preview = client.post(f"{library_url}/amendments/preview", json={"version": "2", "full_text": NEW}).json()
+
+    assert (preview["added_sections"], preview["removed_sections"]) == (["§ 2a"], ["§ 3"])
+    changes = {dtl["dtl_id"]: dtl["change"] for dtl in preview["dtls"]}
+    assert [changes[ids[reference]] for reference in ("§ 1", "§ 2", "§ 3")] == ["unchanged", "changed", "removed"]
+
+
+def test_amendment_supersedes_changed_dtls_and_rebases_spans(client, amended_library):
+    library_url, ids = amended_library
+
+    response = client.post(f"{library_url}/amendments", json={"version": "2", "full_text": NEW})
+
+    assert response.status_code == 201, response.text
+    successor_id = response.json()["report"]["successors"][str(ids["§ 2"])]
+    dtls = {dtl["id"]: dtl for dtl in client.get(f"{library_url}/dtls", params={"include_retired": "true"}).json()}
+    assert (dtls[ids["§ 2"]]["status"], dtls[ids["§ 3"]]["status"]) == ("Superseded", "Repealed")
+    successor = dtls[successor_id]
+    assert (successor["supersedes_id"], successor["version"]) == (ids["§ 2"], "2")
+    assert successor["legal_text"] == "(1) Die Beihilfe beträgt 120 Euro monatlich."
+    assert successor["legal_text_start"] == NEW.index(successor["legal_text"])
+    unchanged = dtls[ids["§ 1"]]
+    assert unchanged["legal_text_start"] == NEW.index(unchanged["legal_text"])
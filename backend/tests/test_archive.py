@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import io
+import tarfile
+
+import pytest
+
+
+@pytest.mark.parametrize("compression", ["gz", "none"])
+def test_export_then_import_roundtrips_a_library(client, user, dtlib, dtl_url, compression):
+    client.put(f"{dtl_url}/ontology", json={"ontology_owl": "<rdf:RDF/>"})
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return x\n"})
+    client.post(f"{dtl_url}/tests", json={"name": "t1", "input": {"x": 1}, "expected_output": 1})
+    client.post(f"{dtl_url}/comments", json={"author_id": user["id"], "role": "Reviewer", "comment": "ok"})
+
+    with client.stream("GET", f"/api/dtlibs/{dtlib['id']}/export", params={"compression": compression}) as response:
+        assert response.status_code == 200
+        blob = b"".join(response.iter_bytes())
+    assert "manifest.json" in tarfile.open(fileobj=io.BytesIO(blob)).getnames()
+
+    imported = client.post("/api/dtlibs/import", params={"created_by": user["id"]}, content=blob)
+
+    assert imported.status_code == 201, imported.text
+    assert imported.json()["law_identifier"] == dtlib["law_identifier"]
+    [dtl] = client.get(f"/api/dtlibs/{imported.json()['id']}/dtls").json()
+    bundle = client.get(f"/api/dtlibs/{imported.json()['id']}/dtls/{dtl['id']}/bundle").json()
+    assert bundle["ontology"]["ontology_owl"] == "<rdf:RDF/>"
+    assert bundle["logic"]["code"] == "def check(x):\n    return x\n"
+    assert [test["name"] for test in bundle["tests"]] == ["t1"]
+    assert [comment["comment"] for comment in bundle["comments"]] == ["ok"]
+    assert bundle["dtl"]["legal_text"] == "(1) Dieses Gesetz gilt."
+
+
+def test_unreadable_archive_is_rejected(client, user):
+    response = client.post("/api/dtlibs/import", params={"created_by": user["id"]}, content=b"garbage")
+
+    assert response.status_code == 400
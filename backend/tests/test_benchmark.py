@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def bench_url(client, dtl_url) -> str:
+    client.put(
+        f"{dtl_url}/interface",
+        json={"function_name": "check", "inputs": [{"name": "x", "type": "integer"}], "outputs": []},
+    )
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return {'ok': x > 3}\n"})
+    return dtl_url
+
+
+def test_benchmark_times_every_sample(client, bench_url):
+    response = client.post(f"{bench_url}/logic/benchmark", params={"samples": 50, "seed": 1})
+
+    assert response.status_code == 200, response.text
+    run = response.json()
+    assert (run["samples"], run["exceptions"], run["load_error"]) == (50, 0, None)
+    assert run["p50_ms"] <= run["p99_ms"] <= run["max_ms"]
+
+
+def test_non_python_logic_is_not_executed(client, bench_url):
+    client.put(f"{bench_url}/logic", json={"language": "JavaScript", "code": "function check(x) { return {}; }"})
+
+    run = client.post(f"{bench_url}/logic/benchmark", params={"samples": 10}).json()
+
+    assert run["load_error"] == "JavaScript logic cannot be executed"
+    assert run["p99_ms"] is None
+
+
+@pytest.mark.parametrize("samples", [0, 100_001])
+def test_samples_out_of_range_are_rejected(client, bench_url, samples):
+    assert client.post(f"{bench_url}/logic/benchmark", params={"samples": samples}).status_code == 422
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+
+def test_patch_applies_changed_sections(client, dtl_url):
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return x\n"})
+    versions = client.get(f"{dtl_url}/bundle").json()["versions"]
+
+    response = client.patch(
+        f"{dtl_url}/bundle",
+        json={
+            "logic": {"code": "def check(x):\n    return x + 1\n"},
+            "tests": [{"name": "new", "input": {"x": 1}, "expected_output": 2}],
+            "base_versions": versions,
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["applied"] == ["logic", "tests"]
+    assert body["versions"]["logic"] == versions["logic"] + 1
+    assert client.get(f"{dtl_url}/logic").json()["code"] == "def check(x):\n    return x + 1\n"
+
+
+def test_patch_on_stale_base_versions_conflicts(client, dtl_url):
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return x\n"})
+    versions = client.get(f"{dtl_url}/bundle").json()["versions"]
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return -x\n"})
+
+    response = client.patch(
+        f"{dtl_url}/bundle", json={"logic": {"code": "def check(x):\n    return 0\n"}, "base_versions": versions}
+    )
+
+    assert response.status_code == 409
+    assert response.json()["detail"]["sections"] == ["logic"]
+    assert client.get(f"{dtl_url}/logic").json()["code"] == "def check(x):\n    return -x\n"
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.mark.parametrize(
+    "path, edit",
+    [
+        ("", ("put", "", {"title": "Geltung"})),
+        ("/logic", ("put", "/logic", {"code": "def check(x):\n    return 1\n"})),
+        ("/bundle", ("put", "/logic", {"code": "def check(x):\n    return 1\n"})),
+        ("/tests", ("post", "/tests", {"name": "t", "input": {}, "expected_output": {}})),
+    ],
+)
+def test_etag_revalidates_until_an_edit(client, dtl_url, path, edit):
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return 0\n"})
+    response = client.get(f"{dtl_url}{path}")
+    tag = response.headers["etag"]
+
+    assert client.get(f"{dtl_url}{path}", headers={"If-None-Match": tag}).status_code == 304
+
+    method, edit_path, body = edit
+    assert getattr(client, method)(f"{dtl_url}{edit_path}", json=body).status_code < 300
+    changed = client.get(f"{dtl_url}{path}", headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != tag
+
+
+def test_library_etags_follow_dtl_edits(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}/overview"
+    tag = client.get(library_url).headers["etag"]
+
+    assert client.get(library_url, headers={"If-None-Match": tag}).status_code == 304
+    client.put(dtl_url, json={"status": "Approved"})
+    assert client.get(library_url, headers={"If-None-Match": tag}).status_code == 200
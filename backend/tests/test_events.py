@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from backend import events, models
+from backend.database import SessionLocal
+
+
+class RecordingBackend:
+    def __init__(self) -> None:
+        self.published: list[dict[str, Any]] = []
+
+    def publish(self, batch: list[dict[str, Any]]) -> None:
+        self.published.extend(batch)
+
+
+@pytest.fixture
+def published(monkeypatch) -> list[dict[str, Any]]:
+    backend = RecordingBackend()
+    monkeypatch.setattr(events.broker, "backend", backend)
+    return backend.published
+
+
+def _dtl_id(dtl_url: str) -> int:
+    return int(dtl_url.rsplit("/", 1)[1])
+
+
+def test_events_are_published_after_commit(dtl_url, published):
+    with SessionLocal() as db:
+        db.get(models.DTL, _dtl_id(dtl_url)).title = "Geltung"
+        db.flush()
+        assert published == []
+        db.commit()
+
+    assert [(event["entity"], event["action"], event["fields"]) for event in published] == [
+        ("dtl", "updated", ["title"])
+    ]
+
+
+def test_rolled_back_changes_publish_nothing(dtl_url, published):
+    with SessionLocal() as db:
+        db.get(models.DTL, _dtl_id(dtl_url)).title = "Geltung"
+        db.flush()
+        db.rollback()
+        db.commit()
+
+    assert published == []
+
+
+def test_subscribers_receive_artifact_changes(client, dtl_url):
+    with client.websocket_connect(f"{dtl_url}/events") as websocket:
+        client.put(f"{dtl_url}/ontology", json={"ontology_owl": "<rdf:RDF/>"})
+        event = websocket.receive_json()
+
+    assert (event["entity"], event["action"], event["dtl_id"]) == ("ontology", "created", _dtl_id(dtl_url))
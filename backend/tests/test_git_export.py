@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+
+from backend import git_export
+
+pytestmark = pytest.mark.skipif(not git_export.git_available(), reason="git is not installed")
+
+
+def _git(bare, *args: str) -> str:
+    return subprocess.run(["git", f"--git-dir={bare}", *args], capture_output=True, text=True, check=True).stdout
+
+
+def sync(client, library_url: str) -> dict:
+    started = client.post(f"{library_url}/sync")
+    assert started.status_code == 202, started.text
+    return client.get(f"{library_url}/sync/{started.json()['id']}").json()
+
+
+def test_sync_commits_only_changed_dtls(client, dtlib, dtl_url, tmp_path, monkeypatch):
+    monkeypatch.setattr(git_export, "EXPORT_ROOT", tmp_path / "worktrees")
+    bare = tmp_path / "remote.git"
+    subprocess.run(["git", "init", "-q", "--bare", str(bare)], check=True)
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    client.put(library_url, json={"repository_url": str(bare), "repository_branch": "main"})
+    second = client.post(
+        f"{library_url}/dtls", json={"title": "Begriffe", "version": "1", "legal_reference": "§ 2", "legal_text": "x"}
+    ).json()
+
+    first = sync(client, library_url)
+    assert (first["status"], first["message"]) == ("Completed", "Sync TG: 2 DTLs updated, 0 removed")
+
+    client.put(f"{dtl_url}/ontology", json={"ontology_owl": "<changed/>"})
+    edited = sync(client, library_url)
+    assert edited["message"] == "Sync TG: 1 DTLs updated, 0 removed"
+    assert _git(bare, "show", "--name-only", "--format=", "main").split() == [
+        f"dtls/{int(dtl_url.rsplit('/', 1)[1]):05d}-anwendungsbereich/ontology.owl"
+    ]
+
+    assert sync(client, library_url)["message"] == "No changes"
+
+    client.delete(f"{library_url}/dtls/{second['id']}")
+    assert sync(client, library_url)["message"] == "Sync TG: 0 DTLs updated, 1 removed"
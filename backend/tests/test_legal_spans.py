@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+FULL_TEXT = "§ 1 Anwendungsbereich\n(1) Dieses Gesetz gilt.\n§ 2 Begriffe\n(1) Einkommen ist Geld.\n"
+INCOME = "(1) Einkommen ist Geld."
+
+
+def add_dtl(client, library_url: str, legal_reference: str, legal_text: str) -> dict:
+    return client.post(
+        f"{library_url}/dtls",
+        json={"title": legal_reference, "version": "1", "legal_reference": legal_reference, "legal_text": legal_text},
+    ).json()
+
+
+def test_legal_text_is_stored_as_a_span_of_the_library_text(client, dtlib):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+
+    dtl = add_dtl(client, library_url, "§ 2", INCOME)
+    outside = add_dtl(client, library_url, "§ 9", "not in text")
+
+    start = FULL_TEXT.index(INCOME)
+    assert (dtl["legal_text_start"], dtl["legal_text_end"]) == (start, start + len(INCOME))
+    assert (outside["legal_text_start"], outside["legal_text"]) == (None, "not in text")
+
+
+def test_spans_follow_edits_of_the_library_text(client, dtlib):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    dtl = add_dtl(client, library_url, "§ 2", INCOME)
+
+    client.put(library_url, json={"full_text": "Präambel.\n" + FULL_TEXT})
+    moved = client.get(f"{library_url}/dtls/{dtl['id']}").json()
+    assert (moved["legal_text_start"], moved["legal_text"]) == (dtl["legal_text_start"] + len("Präambel.\n"), INCOME)
+
+    client.put(library_url, json={"full_text": FULL_TEXT.replace("Geld", "Vermögen")})
+    detached = client.get(f"{library_url}/dtls/{dtl['id']}").json()
+    assert (detached["legal_text_start"], detached["legal_text"]) == (None, INCOME)
+
+
+def test_covering_finds_dtls_by_offset_and_text(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    second = add_dtl(client, library_url, "§ 2", INCOME)
+
+    by_offset = client.get(f"{library_url}/dtls/covering", params={"start": FULL_TEXT.index("Geld")}).json()
+    by_text = client.get(f"{library_url}/dtls/covering", params={"text": "Dieses Gesetz"}).json()
+
+    assert [dtl["id"] for dtl in by_offset] == [second["id"]]
+    assert [dtl["id"] for dtl in by_text] == [int(dtl_url.rsplit("/", 1)[1])]
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+PREFIXES = (
+    "@prefix : <http://ex.org/> . @prefix owl: <http://www.w3.org/2002/07/owl#> . "
+    "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> . "
+)
+INCOME = PREFIXES + ':Income a owl:Class ; rdfs:label "Income" . :threshold a owl:DatatypeProperty .'
+INCOME_CONFLICT = PREFIXES + ':Income a owl:Class ; rdfs:label "Einkommen" . :threshold a owl:ObjectProperty .'
+
+
+def test_aggregated_graph_unions_dtl_ontologies(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    second = client.post(
+        f"{library_url}/dtls", json={"title": "Begriffe", "version": "1", "legal_reference": "§ 2", "legal_text": "x"}
+    ).json()
+    client.put(f"{dtl_url}/ontology", json={"ontology_owl": INCOME})
+    client.put(f"{library_url}/dtls/{second['id']}/ontology", json={"ontology_owl": INCOME_CONFLICT})
+
+    aggregated = client.get(f"{library_url}/overview").json()["aggregated_ontology"]
+
+    assert '<http://ex.org/Income> <http://www.w3.org/2000/01/rdf-schema#label> "Einkommen" .' in aggregated
+    assert '<http://ex.org/Income> <http://www.w3.org/2000/01/rdf-schema#label> "Income" .' in aggregated
+
+    client.delete(f"{library_url}/dtls/{second['id']}")
+    assert '"Einkommen"' not in client.get(f"{library_url}/overview").json()["aggregated_ontology"]
+
+
+def test_conflicting_definitions_are_reported_until_resolved(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    second = client.post(
+        f"{library_url}/dtls", json={"title": "Begriffe", "version": "1", "legal_reference": "§ 2", "legal_text": "x"}
+    ).json()
+    client.put(f"{dtl_url}/ontology", json={"ontology_owl": INCOME})
+    client.put(f"{library_url}/dtls/{second['id']}/ontology", json={"ontology_owl": INCOME_CONFLICT})
+
+    conflicts = client.get(f"{library_url}/ontology/conflicts").json()["conflicts"]
+
+    assert [(conflict["iri"], len(conflict["definitions"])) for conflict in conflicts] == [
+        ("http://ex.org/threshold", 2)
+    ]
+
+    client.put(f"{library_url}/dtls/{second['id']}/ontology", json={"ontology_owl": INCOME})
+    assert client.get(f"{library_url}/ontology/conflicts").json()["conflicts"] == []
+
+
+def test_unparseable_artifacts_are_listed(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    client.put(f"{dtl_url}/configuration", json={"configuration_owl": "not owl at all {"})
+
+    report = client.get(f"{library_url}/ontology/conflicts", params={"graph": "configuration"}).json()
+
+    assert [error["dtl_id"] for error in report["parse_errors"]] == [int(dtl_url.rsplit("/", 1)[1])]
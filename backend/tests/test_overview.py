@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from backend import overview
+from backend.database import SessionLocal
+
+
+def test_maintained_snapshot_matches_a_fresh_build(client, dtlib, dtl_url):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    client.get(f"{library_url}/overview")
+    second = client.post(
+        f"{library_url}/dtls",
+        json={"title": "Begriffe", "version": "1", "legal_reference": "§ 2", "legal_text": "(1) Einkommen ist Geld."},
+    ).json()
+    third = client.post(
+        f"{library_url}/dtls", json={"title": "Rest", "version": "1", "legal_reference": "§ 3", "legal_text": "x"}
+    ).json()
+    client.put(f"{library_url}/dtls/{second['id']}/interface", json={"function_name": "f", "inputs": [], "outputs": []})
+    client.put(dtl_url, json={"status": "Approved", "legal_reference": "§ 1 Abs. 1"})
+    client.delete(f"{library_url}/dtls/{third['id']}")
+
+    served = client.get(f"{library_url}/overview").json()
+
+    with SessionLocal() as db:
+        fresh = overview.render(overview.build_snapshot(db, dtlib["id"]))
+    assert {key: served[key] for key in fresh} == fresh
+    assert [entry["dtl_id"] for entry in fresh["traceability"]] == [int(dtl_url.rsplit("/", 1)[1]), second["id"]]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+ONTOLOGY = (
+    "@prefix : <http://ex.org/> . @prefix owl: <http://www.w3.org/2002/07/owl#> . "
+    "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> . @prefix xsd: <http://www.w3.org/2001/XMLSchema#> . "
+    '<http://ex.org/> a owl:Ontology . :Income a owl:Class ; rdfs:label "Income" . '
+    ":incomeThreshold a owl:DatatypeProperty ; rdfs:range xsd:integer ."
+)
+
+
+def test_valid_ontology_is_indexed(client, dtlib, dtl_url):
+    client.put(f"{dtl_url}/ontology", json={"ontology_owl": ONTOLOGY})
+
+    [validation] = client.get(f"{dtl_url}/validation").json()
+
+    assert (validation["graph"], validation["is_valid"], validation["term_count"]) == ("ontology", True, 2)
+    terms_url = f"/api/dtlibs/{dtlib['id']}/terms"
+    terms = client.get(terms_url, params={"name": "income_threshold"}).json()
+    assert [(term["iri"], term["kind"]) for term in terms] == [("http://ex.org/incomeThreshold", "datatype_property")]
+    terms = client.get(terms_url, params={"name": "http://ex.org/Income", "kind": "class"}).json()
+    assert [term["label"] for term in terms] == ["Income"]
+
+
+def test_unparseable_configuration_is_invalid(client, dtl_url):
+    client.put(f"{dtl_url}/configuration", json={"configuration_owl": "<broken"})
+
+    validations = {validation["graph"]: validation for validation in client.get(f"{dtl_url}/validation").json()}
+
+    assert validations["configuration"]["is_valid"] is False
+    assert validations["configuration"]["diagnostics"][0]["severity"] == "error"
+
+
+def test_terms_require_a_name(client, dtlib):
+    assert client.get(f"/api/dtlibs/{dtlib['id']}/terms").status_code == 422
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+
+from backend import models, purge
+from backend.database import SessionLocal
+
+
+def _rows(dtlib_id: int) -> dict[str, int]:
+    dtl_ids = select(models.DTL.id).where(models.DTL.dtlib_id == dtlib_id)
+    with SessionLocal() as db:
+        return {
+            "dtlibs": db.scalar(select(func.count()).select_from(models.DTLIB).where(models.DTLIB.id == dtlib_id)),
+            "dtls": db.scalar(select(func.count()).where(models.DTL.dtlib_id == dtlib_id)),
+            "tests": db.scalar(select(func.count()).where(models.DTLTest.dtl_id.in_(dtl_ids))),
+            "runs": db.scalar(
+                select(func.count())
+                .select_from(models.DTLTestRun)
+                .join(models.DTLTest)
+                .where(models.DTLTest.dtl_id.in_(dtl_ids))
+            ),
+        }
+
+
+def _with_test_run(client, dtl_url: str) -> None:
+    client.put(f"{dtl_url}/interface", json={"function_name": "check", "inputs": [], "outputs": []})
+    client.put(f"{dtl_url}/logic", json={"code": "def check():\n    return 1\n"})
+    client.post(f"{dtl_url}/tests", json={"name": "t", "input": {}, "expected_output": 1})
+    client.post(f"{dtl_url}/tests/run")
+
+
+def test_deleted_library_is_hidden_until_purged(client, dtlib, dtl_url, monkeypatch):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    _with_test_run(client, dtl_url)
+    purge_dtlib = purge.purge_dtlib
+    monkeypatch.setattr(purge, "purge_dtlib", lambda dtlib_id: None)
+
+    assert client.delete(library_url).status_code == 204
+
+    assert client.get(library_url).status_code == 404
+    assert client.get(dtl_url).status_code == 404
+    assert dtlib["id"] not in [library["id"] for library in client.get("/api/dtlibs").json()]
+    assert _rows(dtlib["id"]) == {"dtlibs": 1, "dtls": 1, "tests": 1, "runs": 1}
+
+    purge_dtlib(dtlib["id"])
+
+    assert _rows(dtlib["id"]) == {"dtlibs": 0, "dtls": 0, "tests": 0, "runs": 0}
+
+
+def test_deleted_dtl_leaves_covering_and_trends(client, dtlib, dtl_url, monkeypatch):
+    library_url = f"/api/dtlibs/{dtlib['id']}"
+    _with_test_run(client, dtl_url)
+    monkeypatch.setattr(purge, "purge_dtl", lambda dtl_id: None)
+
+    assert client.delete(dtl_url).status_code == 204
+
+    assert client.get(dtl_url).status_code == 404
+    assert client.get(f"{library_url}/dtls/covering", params={"text": "Dieses Gesetz"}).json() == []
+    assert client.get(f"{library_url}/tests/trends").json() == []
+    assert client.get(f"{library_url}/tests/flaky").json() == []
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from backend import check_queries
+
+pytest_plugins = ["backend.pytest_plugin"]
+
+SMALL, LARGE = 2, 8
+BUDGETED = [path for path, endpoint in check_queries.get_routes() if hasattr(endpoint, "query_budget")]
+
+
+@pytest.fixture(scope="module")
+def libraries(client) -> list[dict[str, int]]:
+    user = client.post(
+        "/api/users", json={"external_id": "budgets", "display_name": "Budgets", "email": "budgets@example.com"}
+    ).json()
+    return [check_queries.build_library(client, user["id"], count) for count in (SMALL, LARGE)]
+
+
+@pytest.mark.parametrize("path", BUDGETED)
+def test_get_stays_within_budget(client, libraries, query_budgets, path):
+    """Over budget or repeated SELECTs raise in the request; the count must not grow with the library."""
+
+    counts = []
+    for ids in libraries:
+        query_budgets.clear()
+        response = client.get(path.format(**ids))
+        assert response.status_code == 200, response.text
+        counts.append(query_budgets[-1].log.count)
+    assert counts[1] <= counts[0], f"{LARGE} DTLs take more queries than {SMALL}: {counts}"
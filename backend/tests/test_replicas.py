@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+from starlette.requests import Request
+
+from backend import app as app_module
+from backend import database, models
+
+
+def _request(method: str, headers: dict[str, str] | None = None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": method, "path": "/", "headers": raw})
+
+
+def test_replica_session_rejects_writes():
+    db = database.ReplicaSession(bind=database.engine)
+    try:
+        db.add(models.User(external_id="replica-write", display_name="Replica", email="replica@example.com"))
+        with pytest.raises(RuntimeError, match="read-only"):
+            db.flush()
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize(
+    "method, headers, primary",
+    [
+        ("GET", {}, False),
+        ("POST", {}, True),
+        ("GET", {"Cookie": f"{database.READ_PRIMARY_COOKIE}=1"}, True),
+        ("GET", {database.READ_PRIMARY_HEADER: "1"}, True),
+    ],
+)
+def test_writes_and_recent_writers_read_the_primary(method, headers, primary):
+    assert database.reads_primary(_request(method, headers)) is primary
+
+
+def test_writes_set_the_read_primary_cookie(client, dtl_url, monkeypatch):
+    monkeypatch.setattr(app_module, "replica_engines", [database.engine])
+
+    response = client.put(dtl_url, json={"title": "Geltung"})
+
+    assert response.status_code == 200
+    assert database.READ_PRIMARY_COOKIE in response.cookies
+
+
+def test_reads_fall_back_to_the_primary_without_healthy_replicas(monkeypatch):
+    monkeypatch.setattr(database, "healthy_replicas", [])
+
+    assert database.replica_session() is None
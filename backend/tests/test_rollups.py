@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+
+from backend import rollups
+
+
+@pytest.fixture
+def run_url(client, dtl_url) -> str:
+    client.put(f"{dtl_url}/interface", json={"function_name": "check", "inputs": [], "outputs": []})
+    client.put(f"{dtl_url}/logic", json={"code": "def check(x):\n    return {'ok': x > 3}\n"})
+    client.post(f"{dtl_url}/tests", json={"name": "high", "input": {"x": 5}, "expected_output": {"ok": True}})
+    client.post(f"{dtl_url}/tests", json={"name": "low", "input": {"x": 1}, "expected_output": {"ok": True}})
+    client.post(f"{dtl_url}/tests", json={"name": "bad", "input": {"y": 1}, "expected_output": {"ok": True}})
+    return dtl_url
+
+
+def test_trends_count_each_outcome(client, run_url):
+    client.post(f"{run_url}/tests/run")
+    client.post(f"{run_url}/tests/run")
+    library_url = run_url.rsplit("/dtls/", 1)[0]
+
+    for url in (run_url, library_url):
+        trends = client.get(f"{url}/tests/trends").json()
+        assert trends == [
+            {
+                "day": datetime.utcnow().date().isoformat(),
+                "passed": 2,
+                "failed": 2,
+                "errored": 2,
+                "skipped": 0,
+                "pass_rate": pytest.approx(1 / 3),
+            }
+        ]
+
+
+def test_flaky_tests_flip_between_outcomes(client, run_url):
+    client.post(f"{run_url}/tests/run")
+    client.put(f"{run_url}/logic", json={"code": "def check(x):\n    return {'ok': x > 0}\n"})
+    client.post(f"{run_url}/tests/run")
+
+    flaky = client.get(f"{run_url}/tests/flaky").json()
+
+    assert [(test["name"], test["passed"], test["failing"]) for test in flaky] == [("low", 1, 1)]
+
+
+@pytest.mark.parametrize("days", [0, rollups.TEST_RUN_RETENTION_DAYS + 1])
+@pytest.mark.parametrize("endpoint", ["trends", "flaky"])
+def test_days_outside_the_retention_window_are_rejected(client, run_url, endpoint, days):
+    library_url = run_url.rsplit("/dtls/", 1)[0]
+
+    for url in (run_url, library_url):
+        assert client.get(f"{url}/tests/{endpoint}", params={"days": days}).status_code == 422
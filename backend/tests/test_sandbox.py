@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from backend import sandbox
+
+
+def test_calls_the_entry_point_per_input():
+    result = sandbox.execute("def double(x):\n    return x * 2\n", "double", [1, {"x": 4}])
+
+    assert result.load_error is None
+    assert [call.output for call in result.calls] == [2, 8]
+
+
+def test_child_does_not_see_the_parent_environment(monkeypatch):
+    monkeypatch.setenv("FOO_SECRET", "do-not-leak")
+    code = "import os\ndef read(x):\n    return os.environ.get('FOO_SECRET')\n"
+
+    result = sandbox.execute(code, "read", [1])
+
+    assert result.load_error is None
+    assert result.calls[0].output is None
+
+
+def test_file_writes_are_capped(tmp_path):
+    target = tmp_path / "big.bin"
+    code = f"def write(x):\n    open({str(target)!r}, 'wb').write(b'0' * {sandbox.SANDBOX_FILE_LIMIT_BYTES * 2})\n"
+
+    result = sandbox.execute(code, "write", [1])
+
+    assert result.calls == [] or result.calls[0].error is not None
+    assert not target.exists() or target.stat().st_size <= sandbox.SANDBOX_FILE_LIMIT_BYTES
+
+
+def test_timeout_is_reported_as_load_error():
+    result = sandbox.execute("def spin(x):\n    while True:\n        pass\n", "spin", [1], timeout=1)
+
+    assert result.load_error is not None
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from backend import segmenter
+
+STATUTE = """§ 1 Geltung
+(1) Dieses Gesetz gilt.
+(2) Es gilt:
+1. für Personen,
+2. für Vereine
+a) im Inland,
+b) im Ausland.
+§ 2 Höhe
+Die Beihilfe beträgt 100 Euro.
+"""
+
+
+def _outline(sections: list[segmenter.Section]) -> list[tuple[str, str, str]]:
+    return [
+        (unit.kind, unit.label, STATUTE[unit.start : unit.end].split("\n", 1)[0])
+        for section in sections
+        for unit in section.walk()
+    ]
+
+
+def test_parse_nests_paragraphs_items_and_letters():
+    sections = segmenter.parse(STATUTE)
+
+    assert _outline(sections) == [
+        ("section", "§ 1", "§ 1 Geltung"),
+        ("paragraph", "(1)", "(1) Dieses Gesetz gilt."),
+        ("paragraph", "(2)", "(2) Es gilt:"),
+        ("item", "1.", "1. für Personen,"),
+        ("item", "2.", "2. für Vereine"),
+        ("letter", "a)", "a) im Inland,"),
+        ("letter", "b)", "b) im Ausland."),
+        ("section", "§ 2", "§ 2 Höhe"),
+    ]
+    assert [section.title for section in sections] == ["Geltung", "Höhe"]
+    assert (sections[0].start, sections[-1].end) == (0, len(STATUTE))
+
+
+def test_chunks_cover_the_text_within_the_size_limit():
+    chunks = segmenter.chunks(STATUTE, max_chars=40)
+
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(STATUTE)
+    assert all(end - start <= 40 for start, end in chunks)
+    assert all(previous[1] == following[0] for previous, following in zip(chunks, chunks[1:]))
+
+
+def test_structure_endpoint_serves_the_outline(client, dtlib):
+    response = client.get(f"/api/dtlibs/{dtlib['id']}/structure")
+
+    assert response.status_code == 200
+    assert [section["label"] for section in response.json()] == ["§ 1", "§ 2"]
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from backend import similarity
+
+CLAIM = (
+    "(1) Anspruch auf Familienbeihilfe haben Personen, die im Bundesgebiet einen Wohnsitz oder ihren gewöhnlichen "
+    "Aufenthalt haben, für minderjährige Kinder und für volljährige Kinder, die das 24. Lebensjahr noch nicht "
+    "vollendet haben."
+)
+UNRELATED = "Ganz anderer Inhalt ohne jede Ähnlichkeit zu den übrigen Bestimmungen des Gesetzes über Gebühren."
+
+
+def test_minhash_estimates_jaccard_similarity():
+    near = similarity.estimate(similarity.minhash(CLAIM), similarity.minhash(CLAIM.replace("24.", "25.")))
+    far = similarity.estimate(similarity.minhash(CLAIM), similarity.minhash(UNRELATED))
+
+    assert near > 0.75
+    assert far < similarity.MIN_SIMILARITY
+
+
+def test_similar_finds_near_duplicates_only(client, dtlib):
+    library_url = f"/api/dtlibs/{dtlib['id']}/dtls"
+    ids = {
+        title: client.post(
+            library_url, json={"title": title, "version": "1", "legal_reference": "§ 3", "legal_text": text}
+        ).json()["id"]
+        for title, text in [("original", CLAIM), ("amended", CLAIM.replace("24.", "25.")), ("other", UNRELATED)]
+    }
+
+    matches = client.get(f"{library_url}/{ids['amended']}/similar").json()
+
+    assert ids["original"] in [match["dtl_id"] for match in matches]
+    assert ids["other"] not in [match["dtl_id"] for match in matches]
+    assert ids["amended"] not in [match["dtl_id"] for match in matches]
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import pytest
+
+CHECK = "def check(x):\n    return {'ok': x > 3}\n"
+
+
+@pytest.fixture
+def tested_url(client, dtl_url) -> str:
+    client.put(f"{dtl_url}/interface", json={"function_name": "check", "inputs": [], "outputs": []})
+    client.put(f"{dtl_url}/logic", json={"code": CHECK})
+    client.post(f"{dtl_url}/tests", json={"name": "high", "input": {"x": 5}, "expected_output": {"ok": True}})
+    client.post(f"{dtl_url}/tests", json={"name": "low", "input": {"x": 1}, "expected_output": {"ok": True}})
+    return dtl_url
+
+
+def run(client, url: str, mode: str = "all") -> list[dict]:
+    response = client.post(f"{url}/tests/run", params={"mode": mode})
+    assert response.status_code == 200, response.text
+    return response.json()["results"]
+
+
+def test_run_records_outcomes(client, tested_url):
+    assert [result["result"] for result in run(client, tested_url)] == ["Passed", "Failed"]
+
+
+def test_changed_only_reuses_unchanged_tests(client, tested_url):
+    first = run(client, tested_url)
+    test_id = first[1]["test_id"]
+    client.put(f"{tested_url}/tests/{test_id}", json={"expected_output": {"ok": False}})
+
+    results = run(client, tested_url, "changed-only")
+
+    assert [result["reused"] for result in results] == [True, False]
+    assert [result["result"] for result in results] == ["Passed", "Passed"]
+
+
+@pytest.mark.parametrize(
+    "section, edit",
+    [
+        ("logic", {"code": CHECK.replace("x > 3", "x > 0")}),
+        ("interface", {"function_name": "check_x", "inputs": [], "outputs": []}),
+    ],
+)
+def test_changed_only_reruns_after_a_logic_edit(client, tested_url, section, edit):
+    """Code and the interface's entry point both key the reuse, not just the test's own hashes."""
+
+    run(client, tested_url)
+    client.put(f"{tested_url}/{section}", json=edit)
+
+    assert [result["reused"] for result in run(client, tested_url, "changed-only")] == [False, False]
+
+
+def test_non_python_logic_is_not_run(client, tested_url):
+    run(client, tested_url)
+    client.put(f"{tested_url}/logic", json={"language": "JavaScript", "code": "function check(x) { return {}; }"})
+
+    results = run(client, tested_url, "changed-only")
+
+    assert [(result["reused"], result["result"]) for result in results] == [(False, "Not Run"), (False, "Not Run")]
+    assert results[0]["notes"] == "JavaScript logic cannot be executed"
+
+
+def test_unknown_mode_is_rejected(client, tested_url):
+    assert client.post(f"{tested_url}/tests/run", params={"mode": "bogus"}).status_code == 422
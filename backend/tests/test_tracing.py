@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+
+from backend import tracing
+
+TRACE_ID, PARENT_ID = "a" * 32, "b" * 16
+
+
+@pytest.fixture
+def exported(monkeypatch) -> list[tracing.Trace]:
+    traces: list[tracing.Trace] = []
+    monkeypatch.setattr(tracing, "_exporting", lambda: True)
+    monkeypatch.setattr(tracing, "_export", traces.append)
+    return traces
+
+
+def test_traceparent_is_continued(client, dtl_url, exported):
+    client.get(f"{dtl_url}/tests", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+
+    [trace] = exported
+    spans = tracing.to_otlp(trace)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert {span["traceId"] for span in spans} == {TRACE_ID}
+    assert spans[0]["parentSpanId"] == PARENT_ID
+    assert spans[0]["name"] == "GET /dtlibs/{dtlib_id}/dtls/{dtl_id}/tests"
+    assert all(span["parentSpanId"] == spans[0]["spanId"] for span in spans[1:] if span["name"] == "db.query")
+
+
+def test_malformed_traceparent_starts_a_new_trace(client, dtl_url, exported):
+    client.get(f"{dtl_url}/tests", headers={"traceparent": "not-a-trace"})
+
+    [trace] = exported
+    assert trace.remote_parent_id is None
+    assert re.fullmatch(r"[0-9a-f]{32}", trace.trace_id)
+
+
+def test_server_timing_reports_database_time(client, dtl_url):
+    response = client.get(f"{dtl_url}/tests")
+
+    timing = response.headers["Server-Timing"]
+    queries = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing)
+    assert queries is not None and int(queries.group(1)) > 0
+    assert re.search(r"total;dur=[\d.]+$", timing)
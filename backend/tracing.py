@@ -0,0 +1,427 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+from typing import Any, Iterator
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+# Requests slower than this are logged as a WARNING with their span tree.
+TRACE_SLOW_REQUEST_MS = float(os.getenv("TRACE_SLOW_REQUEST_MS", "1000"))
+# OTLP/JSON export: one ``ExportTraceServiceRequest`` per line to a file, and/or POSTed to a collector.
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+TRACE_EXPORT_MAX_MB = int(os.getenv("TRACE_EXPORT_MAX_MB", "50"))
+TRACE_EXPORT_BACKUPS = int(os.getenv("TRACE_EXPORT_BACKUPS", "5"))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT")
+# Fraction of requests exported; slow and failed requests are always exported.
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "dtl-backend")
+MAX_SPANS = 2000
+MAX_STATEMENT_CHARS = 500
+MAX_LOG_LINES = 200
+EXPORT_QUEUE_SIZE = 1000
+
+# OTLP span kinds.
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+
+class Trace:
+    """The spans of one request; ``totals`` are filled in when it finishes."""
+
+    def __init__(self, trace_id: str | None = None, remote_parent_id: str | None = None) -> None:
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.remote_parent_id = remote_parent_id
+        self.root: Span | None = None
+        self.span_count = 0
+        self.dropped = 0
+        self.finished = False
+        self.totals: dict[str, Any] = {}
+
+
+class Span:
+    __slots__ = ("name", "trace", "parent", "kind", "attributes", "span_id", "start_ns", "end_ns", "error", "children")
+
+    def __init__(self, name: str, trace: Trace, parent: Span | None, kind: int, attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.kind = kind
+        self.attributes = attributes
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.error = False
+        self.children: list[Span] = []
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current.get()
+
+
+def start_span(name: str, kind: int = INTERNAL, **attributes: Any) -> Span | None:
+    """A child of the current span, or ``None`` outside a traced request (or once it has finished)."""
+
+    parent = _current.get()
+    if parent is None or parent.trace.finished:
+        return None
+    trace = parent.trace
+    if trace.span_count >= MAX_SPANS:
+        trace.dropped += 1
+        return None
+    trace.span_count += 1
+    started = Span(name, trace, parent, kind, attributes)
+    parent.children.append(started)
+    return started
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes: Any) -> Iterator[Span | None]:
+    """Time the block as a child span that becomes the current span inside it."""
+
+    started = start_span(name, kind, **attributes)
+    if started is None:
+        yield None
+        return
+    token = _current.set(started)
+    try:
+        yield started
+    except BaseException:
+        started.error = True
+        raise
+    finally:
+        _current.reset(token)
+        started.end()
+
+
+async def trace_request(request: Request, call_next):
+    """HTTP middleware body: trace the request, add ``Server-Timing``, log it if slow and export it."""
+
+    if not TRACING_ENABLED:
+        return await call_next(request)
+    match = _TRACEPARENT.match(request.headers.get("traceparent", ""))
+    trace = Trace(*match.groups()) if match else Trace()
+    root = trace.root = Span(
+        f"{request.method} {request.url.path}",
+        trace,
+        None,
+        SERVER,
+        {"http.request.method": request.method, "url.path": request.url.path},
+    )
+    token = _current.set(root)
+    response = None
+    try:
+        response = await call_next(request)
+        return response
+    finally:
+        _current.reset(token)
+        route = getattr(request.scope.get("route"), "path", None)
+        if route:
+            root.name = f"{request.method} {route}"
+            root.attributes["http.route"] = route
+        if response is not None:
+            root.attributes["http.response.status_code"] = response.status_code
+        root.error = response is None or response.status_code >= 500
+        _finish(trace)
+        if response is not None:
+            response.headers["Server-Timing"] = server_timing(trace)
+
+
+def _finish(trace: Trace) -> None:
+    root = trace.root
+    root.end()
+    trace.finished = True
+    totals = {"db.queries": 0, "db.rows": 0, "db.ms": 0.0, "llm.calls": 0, "llm.ms": 0.0}
+    for item in _walk(root):
+        if item.end_ns is None:  # e.g. a commit that raised
+            item.end_ns = root.end_ns
+            item.error = True
+        if item.name in ("db.query", "db.relationship_load"):
+            totals["db.queries"] += 1
+            totals["db.rows"] += item.attributes.get("db.rows", 0)
+            totals["db.ms"] += item.duration_ms
+        elif item.name.startswith("llm."):
+            totals["llm.calls"] += 1
+            totals["llm.ms"] += item.duration_ms
+    totals["db.ms"] = round(totals["db.ms"], 1)
+    totals["llm.ms"] = round(totals["llm.ms"], 1)
+    trace.totals = totals
+    root.attributes.update(totals)
+    if trace.dropped:
+        root.attributes["trace.dropped_spans"] = trace.dropped
+
+    slow = root.duration_ms >= TRACE_SLOW_REQUEST_MS
+    if slow:
+        logger.warning(
+            "Slow request %s: %.0f ms, %d queries (%.0f ms), %d LLM calls (%.0f ms)\n%s",
+            root.name,
+            root.duration_ms,
+            totals["db.queries"],
+            totals["db.ms"],
+            totals["llm.calls"],
+            totals["llm.ms"],
+            render(root),
+        )
+    if _exporting() and (slow or root.error or random.random() < TRACE_SAMPLE_RATE):
+        _export(trace)
+
+
+def _walk(root: Span) -> Iterator[Span]:
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        yield item
+        stack.extend(reversed(item.children))
+
+
+def server_timing(trace: Trace) -> str:
+    totals = trace.totals
+    return (
+        f'db;dur={totals["db.ms"]};desc="{totals["db.queries"]} queries", '
+        f'llm;dur={totals["llm.ms"]};desc="{totals["llm.calls"]} calls", '
+        f"total;dur={trace.root.duration_ms:.1f}"
+    )
+
+
+def _label(item: Span) -> str:
+    statement = item.attributes.get("db.statement")
+    if statement:
+        return f"{item.name} {' '.join(statement.split())[:160]}"
+    if not item.name.startswith("llm."):
+        return item.name
+    return f"{item.name} ({', '.join(f'{key}={value}' for key, value in item.attributes.items())})"
+
+
+def render(root: Span) -> str:
+    """The span tree as indented lines; runs of identical sibling spans (N+1 loads) are folded into one."""
+
+    lines: list[str] = []
+
+    def visit(item: Span, depth: int) -> None:
+        lines.append(f"{'  ' * depth}{item.duration_ms:9.1f} ms  {_label(item)}")
+        index = 0
+        while index < len(item.children) and len(lines) < MAX_LOG_LINES:
+            child = item.children[index]
+            label = _label(child)
+            run = index + 1
+            while run < len(item.children) and not item.children[run].children and _label(item.children[run]) == label:
+                run += 1
+            if run - index > 1 and not child.children:
+                total = sum(sibling.duration_ms for sibling in item.children[index:run])
+                lines.append(f"{'  ' * (depth + 1)}{total:9.1f} ms  {run - index} x {label}")
+            else:
+                visit(child, depth + 1)
+                run = index + 1
+            index = run
+
+    visit(root, 0)
+    if len(lines) >= MAX_LOG_LINES:
+        lines.append("  ... (truncated)")
+    return "\n".join(lines)
+
+
+# SQLAlchemy hooks: every statement run in a traced request becomes a client span.
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _tag_relationship_loads(state: ORMExecuteState) -> None:
+    if state.is_relationship_load and _current.get() is not None:
+        state.update_execution_options(trace_span_name="db.relationship_load")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    name = context.execution_options.get("trace_span_name", "db.query") if context is not None else "db.query"
+    started = start_span(
+        name, CLIENT, **{"db.system": conn.dialect.name, "db.statement": statement[:MAX_STATEMENT_CHARS]}
+    )
+    if started is not None:
+        conn.info["trace_span"] = started
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    finished = conn.info.pop("trace_span", None)
+    if finished is None:
+        return
+    finished.end()
+    # SQLite reports -1 for SELECTs; MySQL drivers buffer the result and report its size.
+    if cursor.rowcount >= 0:
+        finished.attributes["db.rows"] = cursor.rowcount
+
+
+@event.listens_for(Engine, "handle_error")
+def _cursor_error(exception_context) -> None:
+    connection = exception_context.connection
+    failed = connection.info.pop("trace_span", None) if connection is not None else None
+    if failed is not None:
+        failed.error = True
+        failed.end()
+
+
+@event.listens_for(Session, "before_commit")
+def _start_commit(session: Session) -> None:
+    started = start_span("db.commit")
+    if started is not None:
+        session.info["trace_commit"] = started
+
+
+@event.listens_for(Session, "after_commit")
+def _end_commit(session: Session) -> None:
+    finished = session.info.pop("trace_commit", None)
+    if finished is not None:
+        finished.end()
+
+
+@event.listens_for(Session, "after_rollback")
+def _abandon_commit(session: Session) -> None:
+    failed = session.info.pop("trace_commit", None)
+    if failed is not None:
+        failed.error = True
+        failed.end()
+
+
+# OTLP export, off the request path: finished traces are queued and written by a background thread.
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace: Trace) -> dict[str, Any]:
+    """The trace as an OTLP/JSON ``ExportTraceServiceRequest``."""
+
+    spans = []
+    for item in _walk(trace.root):
+        parent_id = item.parent.span_id if item.parent is not None else trace.remote_parent_id
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": item.kind,
+            "startTimeUnixNano": str(item.start_ns),
+            "endTimeUnixNano": str(item.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in item.attributes.items()],
+            "status": {"code": 2} if item.error else {},
+        }
+        if parent_id:
+            otlp_span["parentSpanId"] = parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+_exports: queue.Queue[Trace | None] = queue.Queue(EXPORT_QUEUE_SIZE)
+_exporter: threading.Thread | None = None
+_exporter_lock = threading.Lock()
+
+
+def _exporting() -> bool:
+    return bool(TRACE_EXPORT_PATH or TRACE_OTLP_ENDPOINT)
+
+
+def _export(trace: Trace) -> None:
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = threading.Thread(target=_run_exporter, name="trace-exporter", daemon=True)
+                _exporter.start()
+                atexit.register(stop)
+    try:
+        _exports.put_nowait(trace)
+    except queue.Full:
+        pass  # tracing must never slow requests down
+
+
+def _run_exporter() -> None:
+    file_handler = None
+    if TRACE_EXPORT_PATH:
+        directory = os.path.dirname(TRACE_EXPORT_PATH)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            TRACE_EXPORT_PATH,
+            maxBytes=TRACE_EXPORT_MAX_MB * 1024 * 1024,
+            backupCount=TRACE_EXPORT_BACKUPS,
+            encoding="utf-8",
+            delay=True,
+        )
+    try:
+        while (trace := _exports.get()) is not None:
+            body = json.dumps(to_otlp(trace), separators=(",", ":"))
+            if file_handler is not None:
+                file_handler.emit(logging.makeLogRecord({"msg": body}))
+            if TRACE_OTLP_ENDPOINT:
+                _post(body)
+    finally:
+        if file_handler is not None:
+            file_handler.close()
+
+
+def _post(body: str) -> None:
+    request = urllib.request.Request(
+        f"{TRACE_OTLP_ENDPOINT.rstrip('/')}/v1/traces",
+        data=body.encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=5):
+            pass
+    except Exception as exc:
+        logger.warning("Exporting a trace to %s failed: %s", TRACE_OTLP_ENDPOINT, exc)
+
+
+def stop() -> None:
+    """Write out the queued traces and stop the exporter thread."""
+
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            return
+        _exports.put(None)
+        _exporter.join(timeout=10)
+        _exporter = None
@@ -127,13 +127,18 @@ export function DTLWorkflow({ dtlib, dtl, onBack, onUpdateDTL }: Props) {
       setIsLoadingArtifacts(true);
       setArtifactError(null);
       try {
-        const [existingOntology, existingInterface, existingConfiguration, existingTests, existingLogic] = await Promise.all([
-          ontologyAPI.get(dtlib.id, dtl.id),
-          interfaceAPI.get(dtlib.id, dtl.id),
-          configurationAPI.get(dtlib.id, dtl.id),
-          testAPI.list(dtlib.id, dtl.id),
-          logicAPI.get(dtlib.id, dtl.id),
+        const bundle = await dtlAPI.getBundle(dtlib.id, dtl.id, [
+          'ontology',
+          'interface',
+          'configuration',
+          'tests',
+          'logic',
         ]);
+        const existingOntology = bundle.ontology ?? null;
+        const existingInterface = bundle.interface ?? null;
+        const existingConfiguration = bundle.configuration ?? null;
+        const existingTests = bundle.tests ?? [];
+        const existingLogic = bundle.logic ?? null;
 
         setOntology(existingOntology);
         setInterfaceSpec(existingInterface);
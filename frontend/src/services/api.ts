@@ -87,6 +87,8 @@ export interface DTLAPI {
   owner_user_id?: number | null;
   version: string;
   legal_text: string;
+  legal_text_start?: number | null;
+  legal_text_end?: number | null;
   legal_reference: string;
   source_url?: string;
   classification?: string;
@@ -144,6 +146,38 @@ export interface LogicData {
   code: string;
 }
 
+export interface SyncEvent {
+  id: number;
+  dtlib_id: number;
+  repository_url: string;
+  branch: string;
+  commit_id?: string | null;
+  message?: string | null;
+  status: 'Started' | 'Running' | 'Completed' | 'Failed';
+  created_at: string;
+  completed_at?: string | null;
+}
+
+export interface BenchmarkResult {
+  id: number;
+  dtl_id: number;
+  logic_hash: string;
+  seed: number;
+  samples: number;
+  p50_ms?: number | null;
+  p99_ms?: number | null;
+  max_ms?: number | null;
+  throughput_per_s?: number | null;
+  exceptions: number;
+  exception_summary?: Record<string, number> | null;
+  memory_peak_kb?: number | null;
+  load_error?: string | null;
+  created_at: string;
+  baseline_id?: number | null;
+  p99_ratio?: number | null;
+  regression: boolean;
+}
+
 export interface DTLGenerationResult {
   ontology: OntologyData;
   ontology_raw: string;
@@ -166,6 +200,39 @@ export interface ReviewComment {
   type?: string;
 }
 
+export type BundleSection =
+  | 'dtl'
+  | 'ontology'
+  | 'interface'
+  | 'configuration'
+  | 'tests'
+  | 'logic'
+  | 'review'
+  | 'comments';
+
+export interface DTLBundle {
+  dtl?: DTLAPI;
+  ontology?: OntologyData | null;
+  interface?: InterfaceData | null;
+  configuration?: ConfigurationData | null;
+  tests?: TestCase[];
+  logic?: LogicData | null;
+  review?: { status: string; approved_version?: string | null; approved_at?: string | null; last_comment?: string | null };
+  comments?: ReviewComment[];
+  versions: Record<string, number | null>;
+}
+
+export interface DTLBundleUpdate {
+  dtl?: Partial<DTLAPI>;
+  ontology?: OntologyData;
+  interface?: InterfaceData;
+  configuration?: ConfigurationData;
+  logic?: LogicData;
+  tests?: Array<Pick<TestCase, 'name' | 'input' | 'expected_output' | 'description'> & { id?: string }>;
+  deleted_test_ids?: string[];
+  base_versions?: Record<string, number | null>;
+}
+
 class APIError extends Error {
   constructor(public status: number, message: string) {
     super(message);
@@ -281,22 +348,57 @@ export const dtlibAPI = {
     });
   },
 
+  // Diff a new version of the law text against the current one without changing anything
+  previewAmendment: async (dtlibId: string, version: string, fullText: string): Promise<any> => {
+    return fetchAPI<any>(`/dtlibs/${dtlibId}/amendments/preview`, {
+      method: 'POST',
+      body: JSON.stringify({ version, full_text: fullText }),
+    });
+  },
+
+  // Move the library to a new version of the law; DTLs over changed sections are regenerated
+  amend: async (dtlibId: string, version: string, fullText: string, effectiveDate?: string): Promise<any> => {
+    return fetchAPI<any>(`/dtlibs/${dtlibId}/amendments`, {
+      method: 'POST',
+      body: JSON.stringify({ version, full_text: fullText, effective_date: effectiveDate ?? null }),
+    });
+  },
+
+  // Segment law text by its § / article structure (no LLM call)
+  segmentStructural: async (dtlibId: string): Promise<SegmentationSuggestion[]> => {
+    return fetchAPI<SegmentationSuggestion[]>(`/dtlibs/${dtlibId}/segment/structural`, {
+      method: 'POST',
+    });
+  },
+
   // Get governance overview
   getOverview: async (dtlibId: string): Promise<any> => {
     return fetchAPI<any>(`/dtlibs/${dtlibId}/overview`);
   },
 
-  // Sync with GitHub
-  syncGitHub: async (dtlibId: string): Promise<{
-    repository_url: string;
-    branch: string;
-    commit_id: string;
-    message: string;
-  }> => {
-    return fetchAPI(`/dtlibs/${dtlibId}/sync`, {
+  // URL of the streamed tar export (use as a download link)
+  exportUrl: (dtlibId: string, compression: 'gz' | 'none' = 'gz'): string => {
+    return `${API_BASE_URL}/dtlibs/${dtlibId}/export?compression=${compression}`;
+  },
+
+  // Create a library from an exported archive
+  importArchive: async (archive: Blob, createdBy: number): Promise<DTLibAPI> => {
+    return fetchAPI<DTLibAPI>(`/dtlibs/import?created_by=${createdBy}`, {
+      method: 'POST',
+      body: archive,
+    });
+  },
+
+  // Start an incremental git export; poll getSyncEvent until it completes
+  syncGitHub: async (dtlibId: string): Promise<SyncEvent> => {
+    return fetchAPI<SyncEvent>(`/dtlibs/${dtlibId}/sync`, {
       method: 'POST',
     });
   },
+
+  getSyncEvent: async (dtlibId: string, eventId: number): Promise<SyncEvent> => {
+    return fetchAPI<SyncEvent>(`/dtlibs/${dtlibId}/sync/${eventId}`);
+  },
 };
 
 // DTL Endpoints
@@ -359,8 +461,35 @@ export const dtlAPI = {
     });
   },
 
-  generateAll: async (dtlibId: string, dtlId: string): Promise<DTLGenerationResult> => {
-    return fetchAPI<DTLGenerationResult>(`/dtlibs/${dtlibId}/dtls/${dtlId}/generate-all`, {
+  // Get the DTL and its artifacts in a single request
+  getBundle: async (
+    dtlibId: string,
+    dtlId: string,
+    fields?: BundleSection[],
+  ): Promise<DTLBundle> => {
+    const query = fields?.length ? `?fields=${fields.join(',')}` : '';
+    return fetchAPI<DTLBundle>(`/dtlibs/${dtlibId}/dtls/${dtlId}/bundle${query}`);
+  },
+
+  // Save several workflow sections in one transaction; rejects with 409 on concurrent edits
+  saveBundle: async (
+    dtlibId: string,
+    dtlId: string,
+    data: DTLBundleUpdate,
+  ): Promise<{ applied: BundleSection[]; versions: Record<string, number | null> }> => {
+    return fetchAPI(`/dtlibs/${dtlibId}/dtls/${dtlId}/bundle`, {
+      method: 'PATCH',
+      body: JSON.stringify(data),
+    });
+  },
+
+  // reuse: take over ('copy') or start from ('seed') the artifacts of a near-identical approved DTL
+  generateAll: async (
+    dtlibId: string,
+    dtlId: string,
+    reuse: 'none' | 'copy' | 'seed' = 'none',
+  ): Promise<DTLGenerationResult> => {
+    return fetchAPI<DTLGenerationResult>(`/dtlibs/${dtlibId}/dtls/${dtlId}/generate-all?reuse=${reuse}`, {
       method: 'POST',
     });
   },
@@ -542,8 +671,12 @@ export const testAPI = {
   },
 
   // Run tests
-  run: async (dtlibId: string, dtlId: string): Promise<{ results: Array<TestCase & { actual_output?: any }> }> => {
-    return fetchAPI(`/dtlibs/${dtlibId}/dtls/${dtlId}/tests/run`, {
+  run: async (
+    dtlibId: string,
+    dtlId: string,
+    mode: 'all' | 'changed-only' = 'all',
+  ): Promise<{ results: Array<TestCase & { actual_output?: any; reused?: boolean }> }> => {
+    return fetchAPI(`/dtlibs/${dtlibId}/dtls/${dtlId}/tests/run?mode=${mode}`, {
       method: 'POST',
     });
   },
@@ -586,6 +719,28 @@ export const logicAPI = {
     });
   },
 
+  // Benchmark logic against synthesized inputs
+  benchmark: async (
+    dtlibId: string,
+    dtlId: string,
+    params?: { samples?: number; seed?: number },
+  ): Promise<BenchmarkResult> => {
+    const queryParams = new URLSearchParams();
+    if (params?.samples) queryParams.set('samples', params.samples.toString());
+    if (params?.seed !== undefined) queryParams.set('seed', params.seed.toString());
+
+    const query = queryParams.toString();
+    return fetchAPI<BenchmarkResult>(
+      `/dtlibs/${dtlibId}/dtls/${dtlId}/logic/benchmark${query ? `?${query}` : ''}`,
+      { method: 'POST' },
+    );
+  },
+
+  // List stored benchmarks, newest first
+  listBenchmarks: async (dtlibId: string, dtlId: string): Promise<BenchmarkResult[]> => {
+    return fetchAPI<BenchmarkResult[]>(`/dtlibs/${dtlibId}/dtls/${dtlId}/logic/benchmarks`);
+  },
+
   // Generate logic proposal
   generate: async (dtlibId: string, dtlId: string): Promise<LogicData | null> => {
     try {